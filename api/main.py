@@ -1,10 +1,23 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from kinyvoice_ai.configs.settings import Settings
-from kinyvoice_ai.configs.connect_timescale_db import init_db_pool, close_db_pool
-from kinyvoice_ai.api.routers import asr, health, metrics
-from kinyvoice_ai.src.model.asr_model import ASRModel
+from kinyvoice_ai.configs.connect_timescale_db import init_db_pool, close_db_pool, PoolTimeout
+from kinyvoice_ai.api.routers import admin, asr, health, metrics, transcriptions
+from kinyvoice_ai.api.middleware import UploadSizeLimitMiddleware, ProfilingMiddleware
+from kinyvoice_ai.api.startup import startup_state, require_ready
+from kinyvoice_ai.src.model.registry import get_asr_model
+from kinyvoice_ai.src.model.engines import get_engine_registry
+from kinyvoice_ai.src.model.admission import AdmissionRejected
+from kinyvoice_ai.src.jobs.manager import get_job_manager
+from kinyvoice_ai.src.database.writer import get_transcription_writer
 from kinyvoice_ai.src.database.models import create_tables
+from kinyvoice_ai.src.utils.profiling import get_trace_store
+from kinyvoice_ai.src.utils.telemetry import (
+    REGISTRY, CONTENT_TYPE, IN_FLIGHT_REQUESTS, REQUEST_SECONDS, record_error
+)
 
 app = FastAPI(
     title="KinyaVoice AI API",
@@ -14,8 +27,8 @@ app = FastAPI(
 
 settings = Settings()
 
-# Initialize ASR model (singleton)
-asr_model = ASRModel()
+# Shared ASR model (singleton), also injected into the routers
+asr_model = get_asr_model()
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,23 +39,118 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(asr.router, prefix="/api/v1/asr", tags=["ASR"])
+# Transcription waits for the warm start; health and metrics answer right away
+app.include_router(asr.router, prefix="/api/v1/asr", tags=["ASR"], dependencies=[Depends(require_ready)])
 app.include_router(health.router, prefix="/api/v1/health", tags=["Health"])
 app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["Metrics"])
+app.include_router(transcriptions.router, prefix="/api/v1/transcriptions", tags=["Transcriptions"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Count in-flight requests, time them per route and count unhandled errors."""
+    with IN_FLIGHT_REQUESTS.track_inprogress():
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            record_error("http", e)
+            raise
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            route=getattr(route, "path", "unmatched")
+        )
+    return response
+
+# Wraps the handlers and request tracking, so a profile covers the whole request
+app.add_middleware(
+    ProfilingMiddleware,
+    store=get_trace_store(),
+    paths=settings.profiling_paths,
+    sample_rate=settings.profiling_sample_rate,
+    allow_header=settings.profiling_allow_header,
+    stack_interval_s=settings.profiling_stack_interval_ms / 1000.0
+)
+
+# Added last so it wraps everything else and sees request bodies first
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/v1/asr/transcribe": settings.max_upload_mb * 1024 * 1024,
+        "/api/v1/asr/batch-transcribe": settings.max_batch_upload_mb * 1024 * 1024,
+    }
+)
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    """Report an exhausted database pool as a retryable 503."""
+    record_error("db_pool", exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load fast with 429/503 and a hint of when capacity frees up."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": exc.retry_after}
+    )
+
+async def _start_database():
+    # Pool creation and DDL are blocking psycopg2 calls
+    await asyncio.to_thread(init_db_pool)
+    await asyncio.to_thread(create_tables)
+    await get_transcription_writer().start()
+
+async def _load_model():
+    await asr_model.load_model()
+    await asr_model.warm_up(settings.warmup_lengths_s)
+
+async def _start_workers():
+    await get_engine_registry().start()
+    await get_job_manager().start()
+
+async def warm_start():
+    """Bring up the database and the warmed model concurrently, then the workers."""
+    try:
+        await asyncio.gather(
+            startup_state.phase("database", _start_database),
+            startup_state.phase("model", _load_model),
+        )
+        await startup_state.phase("workers", _start_workers)
+    except Exception:
+        # Stays live but never ready, so the orchestrator restarts or holds traffic
+        return
+    startup_state.mark_ready()
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize DB pool, create tables, and load ASR model on startup."""
-    init_db_pool()
-    create_tables()
-    await asr_model.load_model()
+    """Start the warm start in the background so liveness is served immediately."""
+    startup_state.task = asyncio.create_task(warm_start())
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Cleanup DB pool and unload ASR model on shutdown."""
+    """Stop batch workers, flush pending writes, cleanup DB pool and unload ASR model on shutdown."""
+    if startup_state.task is not None and not startup_state.task.done():
+        startup_state.task.cancel()
+        await asyncio.gather(startup_state.task, return_exceptions=True)
+    await get_job_manager().stop()
+    await get_engine_registry().stop()
+    await get_transcription_writer().stop()
     close_db_pool()
     await asr_model.unload_model()
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus exposition of stage timings, queue waits, gauges and error counters."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/", include_in_schema=False)
 async def root():
     """Root endpoint for API status."""
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import random
+import uuid
+from typing import Dict, Sequence
+
+from kinyvoice_ai.src.utils.profiling import (
+    PROFILE_HEADER, PROFILE_ID_HEADER, RequestProfile, StackSampler, TraceStore, activate
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies above a per-path byte limit before reading them.
+
+    A declared ``Content-Length`` over the limit is answered with 413
+    straight away, without receiving any of the body. Chunked uploads are
+    counted as they stream in and cut off as soon as they cross the limit,
+    so an oversized upload is never spooled to disk in full.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if exceeded and not response_started:
+                # Form parsing turns the aborted read into its own 400; the 413 replaces it
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except Exception:
+            if not exceeded or response_started:
+                raise
+        if exceeded and not response_started:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({
+            "detail": f"Request body exceeds the {limit // (1024 * 1024)}MB upload limit"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class ProfilingMiddleware:
+    """Profile a sampled fraction of requests, or with ``allow_header`` those sending ``X-Profile: 1``.
+
+    A profiled request records torch operator timings of the instrumented
+    sections of the inference path, their wall times and Python stack
+    samples of the threads running those sections, and stores them as one
+    trace in ``store``. The trace id is returned in the ``X-Profile-Id``
+    response header. One request is profiled at a time; others run
+    unprofiled meanwhile.
+    Requests that are not profiled only pass through a path and header check.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: TraceStore,
+        paths: Sequence[str],
+        sample_rate: float = 0.0,
+        allow_header: bool = False,
+        stack_interval_s: float = 0.01
+    ):
+        self.app = app
+        self.store = store
+        self.paths = tuple(paths)
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+        self.stack_interval_s = stack_interval_s
+        self._active = False
+
+    def _wanted(self, scope) -> bool:
+        if scope["type"] != "http" or self._active or not scope.get("path", "").startswith(self.paths):
+            return False
+        if self.allow_header:
+            value = dict(scope.get("headers") or []).get(PROFILE_HEADER.encode("ascii"))
+            if value is not None and value.strip().lower() in (b"1", b"true", b"yes"):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        profile = RequestProfile(uuid.uuid4().hex, scope.get("method", ""), scope["path"])
+        # Threads shared with other requests are only sampled while they run this one's sections
+        sampler = StackSampler(self.stack_interval_s, threads=profile.active_threads)
+        status = None
+
+        async def profiled_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (PROFILE_ID_HEADER.encode("ascii"), profile.trace_id.encode("ascii")),
+                    ],
+                }
+            await send(message)
+
+        sampler.start()
+        try:
+            with activate(profile):
+                await self.app(scope, receive, profiled_send)
+        finally:
+            self._active = False
+            # Joining the sampler and writing the trace both block
+            await asyncio.to_thread(self._save, profile, sampler, status)
+
+    def _save(self, profile: RequestProfile, sampler: StackSampler, status):
+        stacks = sampler.stop()
+        try:
+            self.store.save(profile.to_dict(status, stacks, sampler.samples))
+        except Exception as e:
+            logger.error(f"Error saving profile {profile.trace_id}: {e}")
@@ -0,0 +1,49 @@
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Optional
+
+from kinyvoice_ai.src.utils.profiling import TraceStore, get_trace_store, collapsed_stacks
+from kinyvoice_ai.configs.settings import Settings
+
+settings = Settings()
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Check the admin token; without a configured token the admin routes do not exist."""
+    if not settings.profiling_admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode("utf-8"), settings.profiling_admin_token.encode("utf-8")
+    ):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+async def list_profiles(store: TraceStore = Depends(get_trace_store)):
+    """List the stored request profiles, newest first."""
+    return {
+        "sample_rate": settings.profiling_sample_rate,
+        "max_traces": store.max_traces,
+        "profiles": store.list()
+    }
+
+@router.get("/profiles/{trace_id}")
+async def download_profile(
+    trace_id: str,
+    format: str = Query("json", description="json, or collapsed stacks for flamegraph tools"),
+    store: TraceStore = Depends(get_trace_store)
+):
+    """Download one profile: operator timings, section times and stack samples."""
+    if format not in ("json", "collapsed"):
+        raise HTTPException(status_code=400, detail=f"Unsupported profile format: {format}")
+    # Read once, so a trace rotated out meanwhile is a 404 rather than an error
+    trace = await run_in_threadpool(store.load, trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(trace))
+    return JSONResponse(
+        trace, headers={"Content-Disposition": f'attachment; filename="profile-{trace_id}.json"'}
+    )
@@ -1,18 +1,51 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import (
+    APIRouter, UploadFile, File, HTTPException, Depends,
+    WebSocket, WebSocketDisconnect
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
+import numpy as np
 import uuid
+import time
 from datetime import datetime
 
 from kinyvoice_ai.src.model.asr_model import ASRModel
-from kinyvoice_ai.src.utils.audio_processing import validate_audio_file
+from kinyvoice_ai.src.model.registry import get_asr_model
+from kinyvoice_ai.src.model.engines import EngineRegistry, get_engine_registry
+from kinyvoice_ai.src.model.admission import (
+    AdmissionController, AdmissionRejected, get_admission_controller, INTERACTIVE
+)
+from kinyvoice_ai.src.model.decoding import DECODERS
+from kinyvoice_ai.src.jobs.manager import JobManager, get_job_manager
+from kinyvoice_ai.src.utils.audio_processing import (
+    AudioInfo, decode_audio, validate_audio, probe_audio, check_audio_info
+)
 from kinyvoice_ai.src.utils.metrics import calculate_wer, calculate_cer
+from kinyvoice_ai.src.utils.profiling import profiled
 from kinyvoice_ai.src.database.models import TranscriptionRecord
-from kinyvoice_ai.configs.connect_timescale_db import get_db_connection, release_db_connection
+from kinyvoice_ai.src.database.writer import TranscriptionWriter, get_transcription_writer
+from kinyvoice_ai.configs.connect_timescale_db import db_connection
+from kinyvoice_ai.configs.settings import Settings
 
 router = APIRouter()
-asr_model = ASRModel()
+settings = Settings()
+
+class SegmentResponse(BaseModel):
+    """A transcribed speech region with its timestamps in seconds."""
+    start: float
+    end: float
+    text: str
+    confidence: float
+
+class WordResponse(BaseModel):
+    """A CTC-aligned word with its timestamps in seconds and calibrated confidences."""
+    word: str
+    start: float
+    end: float
+    confidence: float
+    token_confidences: List[float]
 
 class TranscriptionResponse(BaseModel):
     """Response model for a single transcription."""
@@ -23,116 +56,295 @@ class TranscriptionResponse(BaseModel):
     wer: Optional[float] = None
     cer: Optional[float] = None
     created_at: datetime
+    segments: Optional[List[SegmentResponse]] = None
+    words: Optional[List[WordResponse]] = None
+    compute_saved_seconds: Optional[float] = None
+
+async def check_upload(file: UploadFile) -> AudioInfo:
+    """Read and check an upload's header; raises 400 if it is invalid."""
+    # Only the container header is read, so rejected files are never decoded
+    try:
+        info = await run_in_threadpool(probe_audio, file.file)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid audio file format")
+    reason = check_audio_info(
+        info,
+        max_duration_s=settings.max_audio_duration_s,
+        min_duration_s=settings.min_audio_duration_s,
+        formats=settings.allowed_audio_formats
+    )
+    if reason is not None:
+        raise HTTPException(status_code=400, detail=reason)
+    return info
+
+def _decode_audio(source) -> Tuple[np.ndarray, int]:
+    with profiled("audio_decode"):
+        return decode_audio(source)
+
+async def decode_upload(file: UploadFile) -> Tuple[np.ndarray, int]:
+    """Decode an upload whose header passed ``check_upload``; raises 400 if it is invalid."""
+    try:
+        audio, sample_rate = await run_in_threadpool(_decode_audio, file.file)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid audio file format")
+    # Headers can misstate the length, so the decoded buffer is checked as well
+    if not validate_audio(
+        audio, sample_rate, settings.max_audio_duration_s, settings.min_audio_duration_s
+    ):
+        raise HTTPException(status_code=400, detail="Invalid audio file format")
+    return audio, sample_rate
 
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     file: UploadFile = File(...),
-    reference_text: Optional[str] = None
+    reference_text: Optional[str] = None,
+    long_form: Optional[bool] = None,
+    vad: Optional[bool] = None,
+    decoder: Optional[str] = None,
+    domain: Optional[str] = None,
+    engine: Optional[str] = None,
+    latency_budget_ms: Optional[float] = None,
+    deadline_ms: Optional[float] = None,
+    word_timestamps: bool = False,
+    engines: EngineRegistry = Depends(get_engine_registry),
+    admission: AdmissionController = Depends(get_admission_controller),
+    writer: TranscriptionWriter = Depends(get_transcription_writer)
 ):
-    """Transcribe a single audio file and return text, confidence, and metrics."""
-    # Validate audio file
-    if not validate_audio_file(file):
-        raise HTTPException(status_code=400, detail="Invalid audio file format")
+    """Transcribe a single audio file and return text, confidence, and metrics.
+    
+    The engine is chosen from ``domain``, the audio duration and
+    ``latency_budget_ms`` unless ``engine`` names one explicitly.
+    Requests that cannot finish within ``deadline_ms`` (counted from
+    arrival), or that would queue too long, are rejected up front with
+    503/429 and a Retry-After hint. With ``word_timestamps`` the response
+    lists each word with its aligned times and confidences.
+    """
+    arrived = time.monotonic()
+    if decoder is not None and decoder not in DECODERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported decoder: {decoder}")
+    
+    # The header gives the duration, so cost is known before any decoding
+    decode_started = time.perf_counter()
+    info = await check_upload(file)
+    decode_time = time.perf_counter() - decode_started
+    try:
+        engine_name = engines.route(
+            domain=domain,
+            duration_s=info.duration,
+            latency_budget_ms=latency_budget_ms if latency_budget_ms is not None else deadline_ms,
+            engine=engine
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Process audio
+    deadline_s = None
+    if deadline_ms is not None:
+        deadline_s = deadline_ms / 1000.0 - (time.monotonic() - arrived)
+    async with admission.admit(
+        info.duration,
+        priority=INTERACTIVE,
+        deadline_s=deadline_s,
+        service_s=engines.estimate_latency_s(engine_name, info.duration)
+    ):
+        decode_started = time.perf_counter()
+        audio, sample_rate = await decode_upload(file)
+        timings = {"decode_time": decode_time + time.perf_counter() - decode_started}
+        record, segments, words, compute_saved_seconds = await _run_transcription(
+            engines, engine_name, audio, sample_rate, timings,
+            long_form=long_form, vad=vad, decoder=decoder, domain=domain,
+            reference_text=reference_text, word_timestamps=word_timestamps
+        )
+    
+    # Buffered write-behind; the insert happens off the request path
+    with profiled("db_write", operators=False):
+        await writer.write(record)
+    
+    return TranscriptionResponse(
+        transcription_id=record.id,
+        text=record.text,
+        confidence=record.confidence,
+        processing_time=record.processing_time,
+        wer=record.wer,
+        cer=record.cer,
+        created_at=record.created_at,
+        segments=segments,
+        words=words,
+        compute_saved_seconds=compute_saved_seconds
+    )
+
+async def _run_transcription(
+    engines: EngineRegistry,
+    engine_name: str,
+    audio: np.ndarray,
+    sample_rate: int,
+    timings: dict,
+    long_form: Optional[bool],
+    vad: Optional[bool],
+    decoder: Optional[str],
+    domain: Optional[str],
+    reference_text: Optional[str],
+    word_timestamps: bool = False
+):
+    """Transcribe on the chosen engine and build the record to store."""
     start_time = datetime.now()
-    text, confidence = await asr_model.transcribe(file)
+    segments = None
+    # Engines without CTC alignment leave the list empty
+    words = [] if word_timestamps else None
+    compute_saved_seconds = None
+    async with engines.use(engine_name) as backend:
+        use_vad = settings.vad_enabled if vad is None else vad
+        if use_vad and hasattr(backend, "transcribe_segments"):
+            # Only the detected speech regions go through the model
+            result = await backend.transcribe_segments(
+                audio, sample_rate, decoder=decoder, domain=domain, timings=timings,
+                word_timestamps=word_timestamps
+            )
+            text, confidence = result["text"], result["confidence"]
+            segments = result["segments"]
+            if word_timestamps:
+                words = result.get("words", [])
+            compute_saved_seconds = result["compute_saved_seconds"]
+        else:
+            text, confidence = await backend.transcribe(
+                audio, sample_rate, long_form=long_form, decoder=decoder, domain=domain,
+                timings=timings, words=words
+            )
     processing_time = (datetime.now() - start_time).total_seconds()
     
     # Calculate metrics if reference text is provided
     wer = calculate_wer(reference_text, text) if reference_text else None
     cer = calculate_cer(reference_text, text) if reference_text else None
     
-    # Store in database
-    transcription_id = str(uuid.uuid4())
     record = TranscriptionRecord(
-        id=transcription_id,
+        id=str(uuid.uuid4()),
         text=text,
         confidence=confidence,
         processing_time=processing_time,
         wer=wer,
         cer=cer,
-        created_at=datetime.now()
+        created_at=datetime.now(),
+        audio_duration=len(audio) / sample_rate,
+        model_version=backend.version,
+        decoder=backend.decoder_label(decoder),
+        **timings
     )
+    return record, segments, words, compute_saved_seconds
+
+# Supported raw PCM encodings for streaming, mapped to numpy dtypes and scale
+PCM_ENCODINGS = {
+    "pcm_s16le": (np.dtype("<i2"), 1.0 / 32768.0),
+    "pcm_f32le": (np.dtype("<f4"), 1.0),
+}
+# Input sample rates a stream may declare
+STREAM_SAMPLE_RATES = (8000, 192000)
+
+@router.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    sample_rate: int = 16000,
+    encoding: str = "pcm_s16le",
+    asr_model: ASRModel = Depends(get_asr_model),
+    admission: AdmissionController = Depends(get_admission_controller)
+):
+    """Transcribe live audio sent as binary PCM frames.
     
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO transcriptions (id, text, confidence, processing_time, wer, cer, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                record.id, record.text, record.confidence, record.processing_time,
-                record.wer, record.cer, record.created_at
-            ))
-    finally:
-        release_db_connection(conn)
+    Partial hypotheses are pushed as ``{"type": "partial", "text": ...}`` while
+    audio arrives. Sending the text message ``"EOS"`` ends the stream and
+    returns ``{"type": "final", "text": ..., "confidence": ...}``. Every model
+    pass over the stream is admitted like an interactive request; a stream
+    shed by admission control is closed with 1013 (try again later).
+    """
+    await websocket.accept()
+    if encoding not in PCM_ENCODINGS:
+        await websocket.close(code=1003, reason=f"Unsupported encoding: {encoding}")
+        return
+    if not STREAM_SAMPLE_RATES[0] <= sample_rate <= STREAM_SAMPLE_RATES[1]:
+        await websocket.close(code=1003, reason=f"Unsupported sample rate: {sample_rate}")
+        return
+    if not asr_model.is_loaded():
+        await websocket.close(code=1011, reason="Model not loaded")
+        return
     
-    return TranscriptionResponse(
-        transcription_id=record.id,
-        text=record.text,
-        confidence=record.confidence,
-        processing_time=record.processing_time,
-        wer=record.wer,
-        cer=record.cer,
-        created_at=record.created_at
-    )
+    dtype, scale = PCM_ENCODINGS[encoding]
+    session = asr_model.create_stream(sample_rate, admission=admission)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                if len(message["bytes"]) % dtype.itemsize:
+                    await websocket.close(
+                        code=1007, reason=f"Frame is not a whole number of {encoding} samples"
+                    )
+                    return
+                samples = np.frombuffer(message["bytes"], dtype=dtype)
+                audio = samples.astype(np.float32) * scale
+                partial = await session.feed(audio)
+                if partial is not None:
+                    await websocket.send_json({"type": "partial", "text": partial})
+            elif message.get("text") == "EOS":
+                break
+        
+        text, confidence = await session.finish()
+        await websocket.send_json({"type": "final", "text": text, "confidence": confidence})
+        await websocket.close()
+    except AdmissionRejected as e:
+        await websocket.close(code=1013, reason=e.detail)
+    except WebSocketDisconnect:
+        return
 
 @router.post("/batch-transcribe")
 async def batch_transcribe(
-    background_tasks: BackgroundTasks,
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    job_manager: JobManager = Depends(get_job_manager)
 ):
-    """Transcribe multiple audio files in batch asynchronously."""
-    job_id = str(uuid.uuid4())
-    
-    # Start background task for processing
-    background_tasks.add_task(
-        process_batch_transcription,
-        job_id=job_id,
-        files=files
-    )
-    
-    return {"job_id": job_id, "status": "processing"}
+    """Queue multiple audio files as a durable batch transcription job."""
+    job_id = await job_manager.submit(files)
+    return {"job_id": job_id, "status": "queued", "total_items": len(files)}
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, job_manager: JobManager = Depends(get_job_manager)):
+    """Get status and progress of a batch transcription job."""
+    job = await job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, job_manager: JobManager = Depends(get_job_manager)):
+    """Get per-file results of a batch transcription job."""
+    job = await job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job": job, "items": await job_manager.get_results(job_id)}
+
+@router.get("/engines")
+async def get_engines(engines: EngineRegistry = Depends(get_engine_registry)):
+    """List ASR engines with their load state, memory and measured performance."""
+    return engines.report()
+
+@router.get("/admission")
+async def get_admission_stats(admission: AdmissionController = Depends(get_admission_controller)):
+    """Get admitted audio-seconds, waiting requests and rejections of admission control."""
+    return admission.report()
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats(asr_model: ASRModel = Depends(get_asr_model)):
+    """Get throughput and latency statistics of the batching scheduler."""
+    if asr_model.scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **asr_model.scheduler.report()}
 
 @router.get("/transcription/{transcription_id}")
 async def get_transcription(transcription_id: str):
     """Get transcription result by ID."""
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT * FROM transcriptions WHERE id = %s
-            """, (transcription_id,))
-            result = cur.fetchone()
-            
-            if not result:
-                raise HTTPException(status_code=404, detail="Transcription not found")
-            
-            return result
-    finally:
-        release_db_connection(conn)
-
-async def process_batch_transcription(job_id: str, files: List[UploadFile]):
-    """Process batch transcription in background and store results in DB."""
-    conn = get_db_connection()
-    try:
-        for file in files:
-            if validate_audio_file(file):
-                start_time = datetime.now()
-                text, confidence = await asr_model.transcribe(file)
-                processing_time = (datetime.now() - start_time).total_seconds()
-                
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        INSERT INTO transcriptions (id, text, confidence, processing_time, created_at)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (
-                        str(uuid.uuid4()),
-                        text,
-                        confidence,
-                        processing_time,
-                        datetime.now()
-                    ))
-    finally:
-        release_db_connection(conn) 
\ No newline at end of file
+    async with db_connection() as conn:
+        result = await conn.fetchone("""
+            SELECT * FROM transcriptions WHERE id = %s
+        """, (transcription_id,))
+    
+    if not result:
+        raise HTTPException(status_code=404, detail="Transcription not found")
+    
+    return result
@@ -1,17 +1,32 @@
-from fastapi import APIRouter, HTTPException
-from kinyvoice_ai.configs.connect_timescale_db import get_db_connection, release_db_connection
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import JSONResponse
+from kinyvoice_ai.api.startup import startup_state
+from kinyvoice_ai.configs.connect_timescale_db import db_connection
 from kinyvoice_ai.src.model.asr_model import ASRModel
+from kinyvoice_ai.src.model.registry import get_asr_model
 
 router = APIRouter()
-asr_model = ASRModel()
 
 @router.get("/")
 async def health_check():
     """Basic health check endpoint"""
     return {"status": "healthy"}
 
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness():
+    """Readiness probe: 503 until the database is up and the model is loaded and warm"""
+    report = startup_state.report()
+    if not report["ready"]:
+        return JSONResponse(status_code=503, content=report, headers={"Retry-After": "5"})
+    return report
+
 @router.get("/detailed")
-async def detailed_health_check():
+async def detailed_health_check(asr_model: ASRModel = Depends(get_asr_model)):
     """Detailed health check including database and model status"""
     health_status = {
         "status": "healthy",
@@ -22,15 +37,12 @@ async def detailed_health_check():
     }
     
     # Check database connection
-    conn = get_db_connection()
     try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT 1")
+        async with db_connection() as conn:
+            await conn.execute("SELECT 1")
     except Exception as e:
         health_status["components"]["database"] = "unhealthy"
         health_status["status"] = "degraded"
-    finally:
-        release_db_connection(conn)
     
     # Check model status
     if not asr_model.is_loaded():
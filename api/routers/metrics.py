@@ -1,9 +1,31 @@
-from fastapi import APIRouter, Query
+import math
+from fastapi import APIRouter, Query, Depends
 from typing import List, Optional
 from datetime import datetime, timedelta
-from kinyvoice_ai.configs.connect_timescale_db import get_db_connection, release_db_connection
+from kinyvoice_ai.configs.connect_timescale_db import db_connection, get_db_pool_stats
+from kinyvoice_ai.src.model.asr_model import ASRModel
+from kinyvoice_ai.src.model.registry import get_asr_model
+from kinyvoice_ai.src.database.writer import TranscriptionWriter, get_transcription_writer
+from kinyvoice_ai.src.database.models import (
+    PERCENTILE_VALUES, SKETCH_ROLLUP, HISTOGRAM_ROLLUP,
+    HISTOGRAM_MIN, HISTOGRAM_MAX, HISTOGRAM_BUCKETS
+)
+from kinyvoice_ai.src.utils.ttl_cache import TTLCache
+from kinyvoice_ai.configs.settings import Settings
 
 router = APIRouter()
+settings = Settings()
+
+# Dashboards poll these endpoints; identical queries within the TTL share one result
+response_cache = TTLCache(ttl_s=settings.metrics_cache_ttl_s)
+
+def _default_window(start_time: Optional[datetime], end_time: Optional[datetime]):
+    """Fill in the default 7-day window"""
+    if not start_time:
+        start_time = datetime.now() - timedelta(days=7)
+    if not end_time:
+        end_time = datetime.now()
+    return start_time, end_time
 
 @router.get("/summary")
 async def get_metrics_summary(
@@ -11,71 +33,70 @@ async def get_metrics_summary(
     end_time: Optional[datetime] = Query(None, description="End time for metrics")
 ):
     """Get summary metrics for the specified time period"""
-    if not start_time:
-        start_time = datetime.now() - timedelta(days=7)
-    if not end_time:
-        end_time = datetime.now()
+    return await response_cache.get_or_compute(
+        ("summary", start_time, end_time),
+        lambda: _query_summary(*_default_window(start_time, end_time))
+    )
+
+async def _query_summary(start_time: datetime, end_time: datetime) -> dict:
+    # Served from the hourly rollup, so cost depends on hours, not rows
+    async with db_connection() as conn:
+        # Get average WER and CER
+        metrics = await conn.fetchone("""
+            SELECT 
+                SUM(wer_sum) / NULLIF(SUM(wer_count), 0) as avg_wer,
+                SUM(cer_sum) / NULLIF(SUM(cer_count), 0) as avg_cer,
+                SUM(processing_time_sum) / NULLIF(SUM(request_count), 0) as avg_processing_time,
+                SUM(confidence_sum) / NULLIF(SUM(request_count), 0) as avg_confidence,
+                COALESCE(SUM(request_count), 0) as total_transcriptions
+            FROM transcriptions_hourly
+            WHERE hour >= time_bucket(INTERVAL '1 hour', %s::timestamptz) AND hour <= %s
+        """, (start_time, end_time))
+        
+        # Get hourly distribution
+        hourly_distribution = await conn.fetchall("""
+            SELECT 
+                hour,
+                request_count as count
+            FROM transcriptions_hourly
+            WHERE hour >= time_bucket(INTERVAL '1 hour', %s::timestamptz) AND hour <= %s
+            ORDER BY hour
+        """, (start_time, end_time))
     
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            # Get average WER and CER
-            cur.execute("""
-                SELECT 
-                    AVG(wer) as avg_wer,
-                    AVG(cer) as avg_cer,
-                    AVG(processing_time) as avg_processing_time,
-                    AVG(confidence) as avg_confidence,
-                    COUNT(*) as total_transcriptions
-                FROM transcriptions
-                WHERE created_at BETWEEN %s AND %s
-            """, (start_time, end_time))
-            metrics = cur.fetchone()
-            
-            # Get hourly distribution
-            cur.execute("""
-                SELECT 
-                    date_trunc('hour', created_at) as hour,
-                    COUNT(*) as count
-                FROM transcriptions
-                WHERE created_at BETWEEN %s AND %s
-                GROUP BY hour
-                ORDER BY hour
-            """, (start_time, end_time))
-            hourly_distribution = cur.fetchall()
-            
-            return {
-                "summary": metrics,
-                "hourly_distribution": hourly_distribution
-            }
-    finally:
-        release_db_connection(conn)
+    return {
+        "summary": metrics,
+        "hourly_distribution": hourly_distribution
+    }
 
 @router.get("/transcription/{transcription_id}/metrics")
 async def get_transcription_metrics(transcription_id: str):
     """Get detailed metrics for a specific transcription"""
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT 
-                    id,
-                    wer,
-                    cer,
-                    processing_time,
-                    confidence,
-                    created_at
-                FROM transcriptions
-                WHERE id = %s
-            """, (transcription_id,))
-            metrics = cur.fetchone()
-            
-            if not metrics:
-                return {"error": "Transcription not found"}
-            
-            return metrics
-    finally:
-        release_db_connection(conn)
+    async with db_connection() as conn:
+        metrics = await conn.fetchone("""
+            SELECT 
+                id,
+                wer,
+                cer,
+                processing_time,
+                confidence,
+                audio_duration,
+                processing_time / NULLIF(audio_duration, 0) as real_time_factor,
+                model_version,
+                decoder,
+                decode_time,
+                resample_time,
+                forward_time,
+                decode_text_time,
+                db_time,
+                created_at
+            FROM transcriptions
+            WHERE id = %s
+        """, (transcription_id,))
+    
+    if not metrics:
+        return {"error": "Transcription not found"}
+    
+    return metrics
 
 @router.get("/performance")
 async def get_performance_metrics(
@@ -83,32 +104,143 @@ async def get_performance_metrics(
     end_time: Optional[datetime] = Query(None, description="End time for metrics")
 ):
     """Get detailed performance metrics"""
-    if not start_time:
-        start_time = datetime.now() - timedelta(days=7)
-    if not end_time:
-        end_time = datetime.now()
+    return await response_cache.get_or_compute(
+        ("performance", start_time, end_time),
+        lambda: _query_performance(*_default_window(start_time, end_time))
+    )
+
+# Percentiles reported for latencies, real-time factors and stage timings
+PERCENTILES = (0.5, 0.95, 0.99)
+STAGES = ("decode_time", "resample_time", "forward_time", "decode_text_time", "db_time")
+
+# Which percentile rollup create_tables built; looked up on first use
+_percentile_rollup: Optional[str] = None
+
+async def _find_percentile_rollup(conn) -> str:
+    global _percentile_rollup
+    if _percentile_rollup is None:
+        row = await conn.fetchone("SELECT to_regclass(%s) IS NOT NULL AS sketches", (SKETCH_ROLLUP,))
+        _percentile_rollup = SKETCH_ROLLUP if row["sketches"] else HISTOGRAM_ROLLUP
+    return _percentile_rollup
+
+def _named_percentiles(values: Optional[List[Optional[float]]]) -> Optional[dict]:
+    """Label a list of percentile values, e.g. ``{"p95": ...}``"""
+    if values is None or all(value is None for value in values):
+        return None
+    return {f"p{round(q * 100):d}": value for q, value in zip(PERCENTILES, values)}
+
+def histogram_percentiles(counts: Optional[List[int]]) -> Optional[List[Optional[float]]]:
+    """Percentiles from a ``histogram`` of log-values built by the histogram rollup.
     
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            # Get performance metrics
-            cur.execute("""
-                SELECT 
-                    date_trunc('hour', created_at) as hour,
-                    AVG(processing_time) as avg_processing_time,
-                    MIN(processing_time) as min_processing_time,
-                    MAX(processing_time) as max_processing_time,
-                    AVG(confidence) as avg_confidence,
-                    COUNT(*) as request_count
-                FROM transcriptions
-                WHERE created_at BETWEEN %s AND %s
-                GROUP BY hour
-                ORDER BY hour
-            """, (start_time, end_time))
-            performance_metrics = cur.fetchall()
-            
-            return {
-                "performance_metrics": performance_metrics
-            }
-    finally:
-        release_db_connection(conn) 
\ No newline at end of file
+    ``counts`` has an underflow bucket, ``HISTOGRAM_BUCKETS`` log-spaced
+    buckets and an overflow bucket. Values are interpolated geometrically
+    within a bucket, so the relative error is at most one bucket's width
+    (about 12%); values outside the histogram range are clamped to it.
+    """
+    if not counts or sum(counts) == 0:
+        return None
+    low, high = math.log(HISTOGRAM_MIN), math.log(HISTOGRAM_MAX)
+    width = (high - low) / HISTOGRAM_BUCKETS
+    total = sum(counts)
+    values = []
+    for q in PERCENTILES:
+        target = q * total
+        cumulative = 0
+        for bucket, count in enumerate(counts):
+            if count and cumulative + count >= target:
+                if bucket == 0:
+                    values.append(HISTOGRAM_MIN)
+                elif bucket > HISTOGRAM_BUCKETS:
+                    values.append(HISTOGRAM_MAX)
+                else:
+                    fraction = (target - cumulative) / count
+                    values.append(math.exp(low + (bucket - 1 + fraction) * width))
+                break
+            cumulative += count
+    return values
+
+def _percentile_columns(rollup: str) -> str:
+    columns = []
+    for value, _ in PERCENTILE_VALUES:
+        if rollup == SKETCH_ROLLUP:
+            # One row per hour, so each sketch is read as is
+            estimates = ", ".join(f"approx_percentile({q}, {value}_agg)" for q in PERCENTILES)
+            columns.append(f"ARRAY[{estimates}] AS {value}_percentiles")
+        else:
+            columns.append(f"{value}_hist")
+    return ",\n                ".join(columns)
+
+async def _query_performance(start_time: datetime, end_time: datetime) -> dict:
+    # Served from the hourly percentile rollup: mergeable sketches when
+    # timescaledb_toolkit is installed, log histograms otherwise (see
+    # histogram_percentiles), so cost depends on hours, not rows
+    async with db_connection() as conn:
+        rollup = await _find_percentile_rollup(conn)
+        rows = await conn.fetchall(f"""
+            SELECT 
+                hour,
+                request_count,
+                processing_time_sum / NULLIF(request_count, 0) AS avg_processing_time,
+                max_processing_time,
+                audio_seconds,
+                confidence_sum / NULLIF(request_count, 0) AS avg_confidence,
+                {_percentile_columns(rollup)},
+                -- Seconds of the window covered by this bucket, for throughput
+                EXTRACT(EPOCH FROM
+                    LEAST(hour + INTERVAL '1 hour', %(end)s::timestamptz)
+                    - GREATEST(hour, %(start)s::timestamptz)
+                ) AS wall_seconds
+            FROM {rollup}
+            WHERE hour >= time_bucket(INTERVAL '1 hour', %(start)s::timestamptz) AND hour <= %(end)s
+            ORDER BY hour
+        """, {"start": start_time, "end": end_time})
+    
+    def percentiles(row: dict, value: str) -> Optional[dict]:
+        if rollup == SKETCH_ROLLUP:
+            return _named_percentiles(row[f"{value}_percentiles"])
+        return _named_percentiles(histogram_percentiles(row[f"{value}_hist"]))
+    
+    performance_metrics = []
+    for row in rows:
+        wall_seconds = row["wall_seconds"] or None
+        performance_metrics.append({
+            "hour": row["hour"],
+            "request_count": row["request_count"],
+            "avg_processing_time": row["avg_processing_time"],
+            "max_processing_time": row["max_processing_time"],
+            "latency": percentiles(row, "latency"),
+            "real_time_factor": percentiles(row, "rtf"),
+            "stages": {stage: percentiles(row, stage) for stage in STAGES},
+            "avg_confidence": row["avg_confidence"],
+            "throughput": {
+                "requests_per_second": row["request_count"] / wall_seconds if wall_seconds else None,
+                "audio_seconds": row["audio_seconds"],
+                "audio_seconds_per_second": (
+                    row["audio_seconds"] / wall_seconds
+                    if wall_seconds and row["audio_seconds"] is not None else None
+                ),
+            },
+        })
+    
+    return {
+        "percentiles": list(PERCENTILES),
+        "percentile_method": "sketch" if rollup == SKETCH_ROLLUP else "histogram",
+        "performance_metrics": performance_metrics
+    }
+
+@router.get("/cache")
+async def get_cache_metrics(asr_model: ASRModel = Depends(get_asr_model)):
+    """Get hit and miss counters of the transcription result cache"""
+    if asr_model.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **asr_model.cache.stats()}
+
+@router.get("/db-writer")
+async def get_db_writer_metrics(writer: TranscriptionWriter = Depends(get_transcription_writer)):
+    """Get buffer occupancy and flush counters of the transcription writer"""
+    return writer.stats()
+
+@router.get("/db-pool")
+async def get_db_pool_metrics():
+    """Get database pool size, utilization and acquire wait times"""
+    return get_db_pool_stats()
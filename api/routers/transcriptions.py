@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+
+from kinyvoice_ai.src.database.reader import (
+    EXPORT_FORMATS, EXPORT_MEDIA_TYPES, export_slot_available, list_transcriptions,
+    export_transcriptions
+)
+
+router = APIRouter()
+
+@router.get("/")
+async def get_transcriptions(
+    limit: int = Query(100, ge=1, le=1000, description="Rows per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    start_time: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+    end_time: Optional[datetime] = Query(None, description="Only rows created before this time"),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_confidence: Optional[float] = Query(None, ge=0.0, le=1.0)
+):
+    """List transcriptions newest first, paginated by ``(created_at, id)`` keyset."""
+    try:
+        return await list_transcriptions(
+            limit,
+            cursor=cursor,
+            start_time=start_time,
+            end_time=end_time,
+            min_confidence=min_confidence,
+            max_confidence=max_confidence
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export")
+async def export(
+    format: str = Query("ndjson", description=f"One of {', '.join(EXPORT_FORMATS)}"),
+    start_time: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+    end_time: Optional[datetime] = Query(None, description="Only rows created before this time"),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_confidence: Optional[float] = Query(None, ge=0.0, le=1.0)
+):
+    """Stream every matching transcription as NDJSON or CSV, oldest first.
+
+    Answers 429 while ``export_max_concurrent`` exports are already running.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    if not export_slot_available():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many exports in progress",
+            headers={"Retry-After": "30"}
+        )
+    return StreamingResponse(
+        export_transcriptions(
+            format,
+            start_time=start_time,
+            end_time=end_time,
+            min_confidence=min_confidence,
+            max_confidence=max_confidence
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transcriptions.{format}"'}
+    )
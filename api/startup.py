@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+import logging
+
+from fastapi import HTTPException
+
+from kinyvoice_ai.src.utils.telemetry import record_error
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    """Progress of the background warm start, reported by the readiness probe.
+
+    The server accepts connections as soon as the process is up, so
+    liveness is answered immediately; readiness only turns true once every
+    phase (database, model load, warm-up, ...) has finished.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.phases: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    async def phase(self, name: str, fn: Callable[[], Awaitable]):
+        """Run one startup phase, recording its status and duration"""
+        self.phases[name] = "running"
+        started = time.perf_counter()
+        try:
+            await fn()
+        except Exception as e:
+            self.phases[name] = "failed"
+            self.errors[name] = str(e)
+            record_error(f"startup_{name}", e)
+            logger.error(f"Startup phase '{name}' failed: {e}")
+            raise
+        self.phases[name] = "done"
+        logger.info(f"Startup phase '{name}' finished in {time.perf_counter() - started:.2f}s")
+
+    def mark_ready(self):
+        self.ready_at = time.time()
+        logger.info(f"Service ready {self.ready_at - self.started_at:.2f}s after start")
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "seconds_since_start": time.time() - self.started_at,
+            "startup_seconds": self.ready_at - self.started_at if self.ready else None,
+            "phases": dict(self.phases),
+            "errors": dict(self.errors),
+        }
+
+
+startup_state = StartupState()
+
+
+def require_ready():
+    """Dependency that answers 503 until the warm start has finished"""
+    if not startup_state.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is starting up",
+            headers={"Retry-After": "5"}
+        )
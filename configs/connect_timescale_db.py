@@ -1,20 +1,81 @@
-from kinyvoice_ai.configs import settings
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Optional
+
+import numpy as np
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from psycopg2 import pool
 from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.src.utils.telemetry import QUEUE_WAIT_SECONDS
 
 settings = Settings()
 
-# Create a connection pool
-connection_pool = None
 
-def init_db_pool():
-    global connection_pool
-    try:
-        connection_pool = pool.SimpleConnectionPool(
-            minconn=1,
-            maxconn=10,
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the acquire timeout"""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class DatabasePool:
+    """Thread-safe, health-aware psycopg2 connection pool.
+
+    ``acquire`` blocks up to ``acquire_timeout`` for a free connection and
+    raises ``PoolTimeout`` instead of returning ``None``. Connections older
+    than ``max_lifetime`` are recycled, and connections idle for longer than
+    ``validate_after`` are checked with ``SELECT 1`` before being handed out.
+    Wait times and utilization are tracked for sizing the pool under load.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 5.0,
+        max_lifetime: float = 1800.0,
+        validate_after: float = 30.0,
+        stats_window: int = 1024,
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+        self._idle = deque()
+        self._in_use = {}
+        self._reserved = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._wait_times = deque(maxlen=stats_window)
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.failed_validations = 0
+
+        # Queries of async callers run here; one thread per connection is enough
+        self._query_executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix="db-query")
+        # Waiting for a free connection happens on separate threads so that
+        # blocked waiters never starve the threads running queries
+        self._acquire_executor = ThreadPoolExecutor(max_workers=max(4, max_size), thread_name_prefix="db-acquire")
+
+        for _ in range(min_size):
+            self._idle.append(self._connect())
+
+    def _connect(self) -> _PooledConnection:
+        conn = psycopg2.connect(
             host=settings.db_config['host'],
             port=settings.db_config['port'],
             user=settings.db_config['user'],
@@ -22,27 +83,222 @@ def init_db_pool():
             dbname=settings.db_config['db_name'],
             cursor_factory=RealDictCursor
         )
+        conn.autocommit = True
+        return _PooledConnection(conn)
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._reserved
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        if pooled.conn.closed:
+            return False
+        if time.monotonic() - pooled.last_used < self.validate_after:
+            return True
+        try:
+            with pooled.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            self.failed_validations += 1
+            return False
+
+    def _discard(self, pooled: _PooledConnection):
+        try:
+            pooled.conn.close()
+        except psycopg2.Error:
+            pass
+
+    def acquire(self, deadline: Optional[float] = None):
+        """Take a healthy connection, waiting until ``deadline`` at most"""
+        started = time.monotonic()
+        if deadline is None:
+            deadline = started + self.acquire_timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Database pool is closed")
+                if self._idle or self.size < self.max_size:
+                    # Reuse an idle connection or open a new one; either way the
+                    # slot stays reserved while it is checked outside the lock
+                    pooled = self._idle.pop() if self._idle else None
+                    self._reserved += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.acquire_timeout:.1f}s"
+                    )
+                self._condition.wait(remaining)
+
+        try:
+            if pooled is None:
+                pooled = self._connect()
+            elif time.monotonic() - pooled.created_at > self.max_lifetime or not self._is_healthy(pooled):
+                self.recycled += 1
+                self._discard(pooled)
+                pooled = self._connect()
+        except Exception:
+            with self._condition:
+                self._reserved -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._reserved -= 1
+            self._in_use[id(pooled.conn)] = pooled
+            self.acquisitions += 1
+            self._wait_times.append(time.monotonic() - started)
+        QUEUE_WAIT_SECONDS.observe(time.monotonic() - started, queue="db_pool")
+        return pooled.conn
+
+    def release(self, conn):
+        """Return a connection; broken connections are closed and not reused"""
+        with self._condition:
+            pooled = self._in_use.pop(id(conn), None)
+            if pooled is not None:
+                if conn.closed or self._closed:
+                    self._discard(pooled)
+                else:
+                    pooled.last_used = time.monotonic()
+                    self._idle.append(pooled)
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Async context manager yielding an ``AsyncConnection``"""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.acquire_timeout
+        acquiring = loop.run_in_executor(self._acquire_executor, self.acquire, deadline)
+        try:
+            conn = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The blocked acquire still completes; hand its connection back
+            acquiring.add_done_callback(self._release_abandoned)
+            raise
+        try:
+            yield AsyncConnection(conn, self._query_executor)
+        finally:
+            self.release(conn)
+
+    def _release_abandoned(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is None:
+            self.release(future.result())
+
+    def close(self):
+        """Close idle connections; in-use ones are closed when released"""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._condition.notify_all()
+        self._acquire_executor.shutdown(wait=False)
+        self._query_executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Pool size, utilization and acquire wait-time statistics"""
+        waits = np.asarray(self._wait_times, dtype=np.float64) * 1000.0
+        in_use = len(self._in_use)
+        return {
+            "size": self.size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "in_use": in_use,
+            "idle": len(self._idle),
+            "utilization": in_use / self.max_size if self.max_size else 0.0,
+            "acquisitions": self.acquisitions,
+            "timeouts": self.timeouts,
+            "recycled": self.recycled,
+            "failed_validations": self.failed_validations,
+            "wait_ms": {
+                "mean": float(waits.mean()) if waits.size else None,
+                "p95": float(np.percentile(waits, 95)) if waits.size else None,
+                "max": float(waits.max()) if waits.size else None,
+            },
+        }
+
+
+class AsyncConnection:
+    """Pooled connection whose blocking calls run on the DB thread pool"""
+
+    def __init__(self, conn, executor: ThreadPoolExecutor):
+        self.conn = conn
+        self._executor = executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(conn, *args, **kwargs)`` on a DB thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, self.conn, *args, **kwargs))
+
+    @staticmethod
+    def _execute(conn, query, params, fetch):
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            if fetch == "one":
+                return cur.fetchone()
+            if fetch == "all":
+                return cur.fetchall()
+            return cur.rowcount
+
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        """Execute a statement and return the affected row count"""
+        return await self.run(self._execute, query, params, None)
+
+    async def fetchone(self, query: str, params: tuple = ()):
+        return await self.run(self._execute, query, params, "one")
+
+    async def fetchall(self, query: str, params: tuple = ()):
+        return await self.run(self._execute, query, params, "all")
+
+
+# Create a connection pool
+connection_pool: Optional[DatabasePool] = None
+
+def init_db_pool():
+    global connection_pool
+    try:
+        connection_pool = DatabasePool(
+            min_size=settings.db_pool_min_size,
+            max_size=settings.db_pool_max_size,
+            acquire_timeout=settings.db_pool_acquire_timeout_s,
+            max_lifetime=settings.db_pool_max_lifetime_s,
+            validate_after=settings.db_pool_validate_after_s,
+        )
         print("Database connection pool initialized successfully.")
     except Exception as e:
         print(f"Error initializing database connection pool: {e}")
         raise
 
-def get_db_connection():
+def _get_pool() -> DatabasePool:
     if connection_pool is None:
         init_db_pool()
-    try:
-        connection = connection_pool.getconn()
-        connection.autocommit = True
-        return connection
-    except Exception as e:
-        print(f"Error getting connection from pool: {e}")
-        return None
+    return connection_pool
+
+def get_db_connection():
+    """Blocking acquire for code already running on a worker thread"""
+    return _get_pool().acquire()
 
 def release_db_connection(connection):
-    if connection_pool is not None:
-        connection_pool.putconn(connection)
+    if connection_pool is not None and connection is not None:
+        connection_pool.release(connection)
+
+def db_connection():
+    """Async context manager used by request handlers:
+
+        async with db_connection() as conn:
+            row = await conn.fetchone("SELECT ...", params)
+    """
+    return _get_pool().connection()
+
+def get_db_pool_stats() -> dict:
+    if connection_pool is None:
+        return {"initialized": False}
+    return {"initialized": True, **connection_pool.stats()}
 
 def close_db_pool():
+    global connection_pool
     if connection_pool is not None:
-        connection_pool.closeall()
-        print("Database connection pool closed.")
\ No newline at end of file
+        connection_pool.close()
+        connection_pool = None
+        print("Database connection pool closed.")
@@ -14,8 +14,126 @@ class Settings :
       "password" : "#nelprox92",
       "db_name" : "kinyvoiceai"
     }
+    # Database connection pool
+    self.db_pool_min_size = 1
+    self.db_pool_max_size = 10
+    self.db_pool_acquire_timeout_s = 5.0
+    self.db_pool_max_lifetime_s = 1800.0
+    self.db_pool_validate_after_s = 30.0
+    # TimescaleDB rollups and data lifecycle
+    self.metrics_rollup_refresh_interval_s = 300
+    self.metrics_cache_ttl_s = 15.0
+    self.db_compress_after_days = 7
+    self.db_retention_days = 365  # None keeps raw transcriptions forever
     self.cors_origins = ["*"]
+    # Upload limits, checked from headers before any audio is decoded
+    self.max_audio_duration_s = 600.0
+    self.min_audio_duration_s = 0.1
+    self.allowed_audio_formats = ["WAV", "FLAC", "OGG", "MP3"]
+    self.max_upload_mb = 100
+    self.max_batch_upload_mb = 1024
     self.api_prefix = f"/api/{self.version}"
+    # ASR model weights and CPU optimization mode
+    self.model_name = "facebook/wav2vec2-large-xlsr-53"  # Base model, to be fine-tuned
+    self.model_precision = "fp32"  # fp32 | int8 | bf16
+    self.model_compile = "none"  # none | torchscript | compile
+    self.model_artifact_dir = "models/optimized"
+    self.model_save_artifact = True
+    # Local safetensors snapshot, memory-mapped at startup instead of using the Hub
+    self.model_snapshot_dir = "models/snapshots"
+    self.model_save_snapshot = True
+    # Input lengths pushed through every inference worker before reporting ready
+    self.warmup_lengths_s = [1.0, 5.0, 20.0]
+    # Engines served by the API and how requests are routed between them
+    self.engine_default = "wav2vec2"  # wav2vec2 | whisper
+    self.engine_long_form = None  # e.g. "whisper" for recordings past the threshold
+    self.engine_long_form_threshold_s = 30.0
+    self.engine_domain_routes = {}  # domain -> engine, e.g. {"government": "whisper"}
+    self.engine_memory_budget_mb = 8192
+    self.engine_idle_ttl_s = 900.0  # unload unpinned engines idle this long, 0 disables
+    self.whisper_model_name = "openai/whisper-small"
+    self.whisper_language = None  # None lets Whisper detect the language
+    self.whisper_batch_size = 4
+    self.whisper_num_beams = 1
+    self.whisper_max_new_tokens = 440
+    # Dynamic micro-batching of concurrent inference requests
+    self.batching_enabled = True
+    self.batch_max_size = 8
+    self.batch_max_wait_ms = 10.0
+    self.batch_max_length_ratio = 1.5
+    # Worker pool that runs decoding and inference off the event loop
+    self.inference_workers = 2
+    self.torch_intra_op_threads = 0  # 0 keeps torch's default
+    # Admission control: audio-seconds in flight, bulk share and queueing limits
+    self.admission_capacity_audio_s = 600.0
+    self.admission_bulk_share = 0.5
+    self.admission_max_queue_wait_s = 5.0
+    self.admission_nominal_rate = 10.0  # audio seconds finished per second before any are measured
+    self.job_max_backlog_audio_s = 6 * 3600.0
+    # Long-form transcription with overlapping windows
+    self.long_form_threshold_s = 30.0
+    self.long_form_chunk_s = 20.0
+    self.long_form_stride_s = 4.0
+    self.long_form_batch_size = 4
+    # Energy-based voice activity detection ahead of inference
+    self.vad_enabled = False
+    self.vad_threshold_db = 12.0
+    self.vad_noise_ceiling_db = -40.0  # highest noise floor estimate trusted, in dBFS
+    self.vad_min_speech_ms = 250.0
+    self.vad_min_silence_ms = 300.0
+    self.vad_padding_ms = 150.0
+    # CTC decoding: greedy by default, prefix beam search with optional LM
+    self.decoder = "greedy"  # greedy | beam
+    self.beam_width = 16
+    self.beam_token_top_k = 8
+    self.beam_token_prune_logp = -10.0
+    self.beam_blank_skip_prob = 0.999
+    self.lm_path = None  # ARPA n-gram language model
+    self.lm_alpha = 0.5
+    self.lm_beta = 1.0
+    self.hotwords_dir = None  # <domain>.txt files with one hotword per line
+    self.hotword_weight = 5.0
+    # Confidence calibration; a fitted temperature file takes precedence over the default
+    self.confidence_temperature = 1.0
+    self.confidence_calibration_path = "models/calibration.json"
+    # Beam search text is force-aligned in pieces cut at pauses of at least
+    # alignment_pause_frames, each at most alignment_max_frames (20ms frames) long
+    self.alignment_max_frames = 1500
+    self.alignment_pause_frames = 10
+    # Transcription result cache keyed by audio fingerprint
+    self.cache_enabled = True
+    self.cache_max_entries = 1024
+    self.cache_ttl_s = 3600.0
+    self.cache_disk_dir = None  # e.g. "data/cache" to persist across restarts
+    self.cache_disk_ttl_s = 7 * 24 * 3600.0
+    self.cache_disk_max_bytes = 1024 ** 3  # oldest entries are deleted past either limit
+    self.cache_disk_max_entries = 100_000
+    self.cache_disk_sweep_interval_s = 600.0
+    # Write-behind buffer for transcription records
+    self.db_writer_batch_size = 500
+    self.db_writer_flush_interval_ms = 200.0
+    self.db_writer_max_pending = 10000
+    self.db_writer_max_retries = 3  # attempts per batch at shutdown; before that failed batches are retried until stored
+    # Transcription exports hold a pooled connection and a transaction for the whole download
+    self.export_max_concurrent = 2
+    self.export_statement_timeout_s = 300.0  # per FETCH of the server-side cursor
+    self.export_idle_in_transaction_timeout_s = 60.0  # ends exports whose client stops reading
+    # Durable batch transcription jobs
+    self.job_upload_dir = "data/uploads"
+    self.job_workers = 4
+    # Real-time streaming over WebSocket
+    self.stream_chunk_s = 1.0
+    self.stream_left_context_s = 2.0
+    self.stream_right_context_s = 0.5
+    # Opt-in request profiling: a sampled fraction of requests, or with profiling_allow_header
+    # those sending "X-Profile: 1"; off unless one of the two is enabled
+    self.profiling_sample_rate = 0.0
+    self.profiling_allow_header = False  # lets any client trigger a profile
+    self.profiling_paths = ["/api/v1/asr/"]  # path prefixes that may be profiled
+    self.profiling_stack_interval_ms = 10.0
+    self.profiling_trace_dir = "data/profiles"
+    self.profiling_max_traces = 100
+    self.profiling_admin_token = None  # X-Admin-Token for trace downloads; admin routes are off without it
 
   def get_db_url(self):
     return f"postgresql://{self.db_config['user']}:{self.db_config['password']}@{self.db_config['host']}:{self.db_config['port']}/{self.db_config['db_name']}"
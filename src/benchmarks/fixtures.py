@@ -0,0 +1,127 @@
+import io
+import json
+import os
+from typing import List, Tuple
+
+import numpy as np
+import soundfile as sf
+
+# Kinyarwanda is written in the Latin alphabet; CTC blank is the pad token
+VOCAB = ["<pad>", "<s>", "</s>", "<unk>", "|"] + list("abcdefghijklmnopqrstuvwxyz'")
+
+
+def build_tiny_model(directory: str, seed: int = 0) -> str:
+    """Write a randomly initialized Wav2Vec2ForCTC and its processor to ``directory``.
+
+    The model keeps the real convolutional front end (so frame rates and
+    output lengths match the production model) but only has a few small
+    transformer layers, so it loads instantly and runs without a network.
+    """
+    import torch
+    from transformers import (
+        Wav2Vec2Config, Wav2Vec2CTCTokenizer, Wav2Vec2FeatureExtractor,
+        Wav2Vec2ForCTC, Wav2Vec2Processor
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    vocab_path = os.path.join(directory, "vocab.json")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        json.dump({token: index for index, token in enumerate(VOCAB)}, f)
+
+    tokenizer = Wav2Vec2CTCTokenizer(
+        vocab_path, unk_token="<unk>", pad_token="<pad>", word_delimiter_token="|"
+    )
+    feature_extractor = Wav2Vec2FeatureExtractor(
+        feature_size=1,
+        sampling_rate=16000,
+        padding_value=0.0,
+        do_normalize=True,
+        return_attention_mask=True,
+    )
+    Wav2Vec2Processor(feature_extractor=feature_extractor, tokenizer=tokenizer).save_pretrained(directory)
+
+    torch.manual_seed(seed)
+    config = Wav2Vec2Config(
+        vocab_size=len(VOCAB),
+        pad_token_id=0,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        conv_dim=(32,) * 7,
+        num_conv_pos_embeddings=16,
+        feat_extract_norm="layer",
+        do_stable_layer_norm=True,
+    )
+    Wav2Vec2ForCTC(config).eval().save_pretrained(directory)
+    return directory
+
+
+def synthetic_audio(seconds: float, sample_rate: int, channels: int = 1, seed: int = 0) -> np.ndarray:
+    """Deterministic speech-like float32 ``(frames, channels)`` audio.
+
+    Voiced bursts (harmonic tones with a syllable-rate envelope) alternate
+    with quiet gaps, so the VAD and long-form paths see realistic structure.
+    """
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * sample_rate)
+    t = np.arange(frames, dtype=np.float64) / sample_rate
+
+    pitch = 120.0 + 40.0 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1.0 + np.sin(2 * np.pi * 4.0 * t))
+
+    # 0.6s of speech, then 0.3s of near silence
+    speaking = (t % 0.9) < 0.6
+    signal = 0.3 * voiced * envelope * speaking + 0.003 * rng.standard_normal(frames)
+
+    audio = np.empty((frames, channels), dtype=np.float32)
+    for channel in range(channels):
+        # Slightly different gain and noise per channel, like a real stereo recording
+        audio[:, channel] = signal * (1.0 - 0.1 * channel) + 0.002 * rng.standard_normal(frames)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def encode_wav(audio: np.ndarray, sample_rate: int) -> bytes:
+    """16-bit PCM WAV bytes, as a client would upload them"""
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def audio_cases(
+    lengths_s: List[float],
+    sample_rates: List[int],
+    channels: List[int],
+) -> List[Tuple[float, int, int]]:
+    """Every (seconds, sample_rate, channels) combination to benchmark"""
+    return [
+        (seconds, sample_rate, num_channels)
+        for seconds in lengths_s
+        for sample_rate in sample_rates
+        for num_channels in channels
+    ]
+
+
+class InMemoryWriter:
+    """Stand-in for ``TranscriptionWriter`` that keeps records in a list.
+
+    Lets the API be benchmarked without a database while keeping the
+    ``write``/``stats`` interface the routers depend on.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def write(self, record):
+        self.records.append(record)
+
+    def stats(self) -> dict:
+        return {"pending": 0, "flushed_records": len(self.records)}
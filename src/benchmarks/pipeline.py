@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import logging
+
+import numpy as np
+
+from kinyvoice_ai.src.benchmarks.fixtures import (
+    InMemoryWriter, audio_cases, build_tiny_model, encode_wav, synthetic_audio
+)
+
+logger = logging.getLogger(__name__)
+
+RESULTS_VERSION = 1
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def summarize(samples: List[float]) -> dict:
+    """Latency statistics in milliseconds"""
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    if values.size == 0:
+        return {"n": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None, "min_ms": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "n": int(values.size),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "min_ms": float(values.min()),
+    }
+
+
+def _time_call(fn: Callable, repeats: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def _time_coroutine(make: Callable, repeats: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        await make()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await make()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def load_benchmark_model(model_dir: str, precision: str, compile_mode: str, batching: bool):
+    """Load ``ASRModel`` on the tiny local weights with result caching off"""
+    from kinyvoice_ai.src.model import asr_model as asr_module
+
+    # Benchmarks must never write artifacts or snapshots next to the production ones
+    asr_module.settings.model_save_artifact = False
+    asr_module.settings.model_save_snapshot = False
+    asr_model = asr_module.ASRModel(precision=precision, compile_mode=compile_mode, batching=batching)
+    asr_model.model_name = model_dir
+    # Every repeat must do the full work, not hit the transcription cache
+    asr_model.cache = None
+    await asr_model.load_model()
+    return asr_model
+
+
+async def bench_stages(asr_model, cases, repeats: int, decoders: List[str], seed: int) -> List[dict]:
+    """Latency of each pipeline stage for every synthetic audio case"""
+    from kinyvoice_ai.src.utils.audio_processing import decode_audio
+
+    results = []
+    for seconds, sample_rate, channels in cases:
+        audio = synthetic_audio(seconds, sample_rate, channels, seed=seed)
+        wav = encode_wav(audio, sample_rate)
+        waveform = asr_model._prepare_waveform(audio, sample_rate)
+        long_form = asr_model._is_long_form(waveform, None)
+        if long_form:
+            forward = lambda: asr_model._forward_long(waveform)
+        else:
+            forward = lambda: asr_model._forward_logits([waveform])[0]
+        logits = forward()
+
+        stages = {
+            "audio_decode": _time_call(lambda: decode_audio(io.BytesIO(wav)), repeats),
+            "resample": _time_call(lambda: asr_model._prepare_waveform(audio, sample_rate), repeats),
+            "vad": _time_call(lambda: asr_model._detect_speech(waveform), repeats),
+            "forward": _time_call(forward, repeats),
+        }
+        for decoder in decoders:
+            stages[f"postprocess_{decoder}"] = _time_call(
+                lambda: asr_model._postprocess(logits, decoder), repeats
+            )
+        stages["end_to_end"] = await _time_coroutine(
+            lambda: asr_model.transcribe(audio, sample_rate), repeats
+        )
+
+        case = {
+            "audio_seconds": seconds,
+            "sample_rate": sample_rate,
+            "channels": channels,
+            "long_form": long_form,
+            "stages": {name: summarize(samples) for name, samples in stages.items()},
+        }
+        end_to_end = case["stages"]["end_to_end"]["p50_ms"]
+        case["real_time_factor_p50"] = end_to_end / 1000.0 / seconds if seconds else None
+        results.append(case)
+        logger.info(f"Stages done for {seconds}s @ {sample_rate}Hz x{channels}")
+    return results
+
+
+async def bench_throughput(
+    asr_model,
+    concurrency_levels: List[int],
+    requests_per_level: int,
+    audio_seconds: float,
+    seed: int,
+) -> List[dict]:
+    """Requests per second through the FastAPI app with the DB replaced in memory"""
+    import httpx
+    from kinyvoice_ai.api.main import app
+    from kinyvoice_ai.api.startup import require_ready
+    from kinyvoice_ai.src.model.registry import get_asr_model
+    from kinyvoice_ai.src.model.engines import EngineRegistry, Wav2Vec2Backend, get_engine_registry
+    from kinyvoice_ai.src.model.admission import AdmissionController, get_admission_controller
+    from kinyvoice_ai.src.database.writer import get_transcription_writer
+
+    writer = InMemoryWriter()
+    engines = EngineRegistry(memory_budget_bytes=1024 ** 4, idle_ttl_s=0)
+    engines.register("wav2vec2", lambda: Wav2Vec2Backend(asr_model), pinned=True)
+    app.dependency_overrides[get_asr_model] = lambda: asr_model
+    app.dependency_overrides[get_engine_registry] = lambda: engines
+    app.dependency_overrides[get_transcription_writer] = lambda: writer
+    # Measure raw throughput, not load shedding
+    admission = AdmissionController(capacity_audio_s=float("inf"))
+    app.dependency_overrides[get_admission_controller] = lambda: admission
+    # The model is loaded here, without the app's warm start
+    app.dependency_overrides[require_ready] = lambda: None
+    wav = encode_wav(synthetic_audio(audio_seconds, 16000, 1, seed=seed), 16000)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            async def send() -> float:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/asr/transcribe", files={"file": ("clip.wav", wav, "audio/wav")}
+                )
+                response.raise_for_status()
+                return time.perf_counter() - started
+
+            # Warm up the route, the executor threads and the scheduler
+            await send()
+
+            for concurrency in concurrency_levels:
+                slots = asyncio.Semaphore(concurrency)
+                latencies = []
+                errors = 0
+
+                async def limited():
+                    nonlocal errors
+                    async with slots:
+                        try:
+                            latencies.append(await send())
+                        except Exception as e:
+                            errors += 1
+                            logger.error(f"Benchmark request failed: {e}")
+
+                started = time.perf_counter()
+                await asyncio.gather(*(limited() for _ in range(requests_per_level)))
+                elapsed = time.perf_counter() - started
+
+                results.append({
+                    "concurrency": concurrency,
+                    "requests": requests_per_level,
+                    "errors": errors,
+                    "seconds": elapsed,
+                    "requests_per_second": len(latencies) / elapsed if elapsed > 0 else None,
+                    "audio_seconds_per_second": (
+                        len(latencies) * audio_seconds / elapsed if elapsed > 0 else None
+                    ),
+                    "latency": summarize(latencies),
+                })
+                logger.info(f"Throughput done at concurrency {concurrency}")
+    finally:
+        app.dependency_overrides.clear()
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment() -> dict:
+    import torch
+    import transformers
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "transformers": transformers.__version__,
+        "git_commit": _git_commit(),
+    }
+
+
+async def run(args) -> dict:
+    """Run every benchmark section and return the results document"""
+    import torch
+
+    torch.manual_seed(args.seed)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("command", "func")
+        },
+        "environment": _environment(),
+        "memory": {"baseline_peak_rss_bytes": peak_rss_bytes()},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="kinyvoice-bench-") as model_dir:
+        build_tiny_model(model_dir, seed=args.seed)
+        asr_model = await load_benchmark_model(
+            model_dir, args.precision, args.compile_mode, batching=not args.no_batching
+        )
+        report["memory"]["after_load_peak_rss_bytes"] = peak_rss_bytes()
+        try:
+            cases = audio_cases(args.lengths, args.sample_rates, args.channels)
+            report["stages"] = await bench_stages(asr_model, cases, args.repeats, args.decoders, args.seed)
+            report["memory"]["after_stages_peak_rss_bytes"] = peak_rss_bytes()
+
+            if not args.skip_api:
+                report["throughput"] = await bench_throughput(
+                    asr_model, args.concurrency, args.requests, args.api_audio_seconds, args.seed
+                )
+                report["memory"]["after_throughput_peak_rss_bytes"] = peak_rss_bytes()
+        finally:
+            await asr_model.unload_model()
+
+    report["memory"]["peak_rss_bytes"] = peak_rss_bytes()
+    return report
+
+
+def _flatten(report: dict) -> Dict[str, float]:
+    """Comparable metrics keyed by a stable name; lower is better except throughput"""
+    metrics = {}
+    for case in report.get("stages", []):
+        prefix = f"{case['audio_seconds']}s@{case['sample_rate']}x{case['channels']}"
+        for stage, summary in case["stages"].items():
+            if summary["p50_ms"] is not None:
+                metrics[f"stage/{prefix}/{stage}/p50_ms"] = summary["p50_ms"]
+    for level in report.get("throughput", []):
+        if level["requests_per_second"] is not None:
+            metrics[f"throughput/c{level['concurrency']}/requests_per_second"] = level["requests_per_second"]
+        if level["latency"]["p95_ms"] is not None:
+            metrics[f"throughput/c{level['concurrency']}/p95_ms"] = level["latency"]["p95_ms"]
+    metrics["memory/peak_rss_bytes"] = report["memory"]["peak_rss_bytes"]
+    return metrics
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> List[dict]:
+    """Relative change of every metric present in both result files"""
+    before = _flatten(baseline)
+    after = _flatten(candidate)
+    rows = []
+    for name in sorted(set(before) & set(after)):
+        if not before[name]:
+            continue
+        change = (after[name] - before[name]) / before[name]
+        higher_is_better = name.endswith("requests_per_second")
+        worse = -change if higher_is_better else change
+        rows.append({
+            "metric": name,
+            "baseline": before[name],
+            "candidate": after[name],
+            "change": change,
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(item) for item in value.split(",") if item]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv: Optional[List[str]] = None):
+    from kinyvoice_ai.src.model.optimization import PRECISIONS, COMPILE_MODES
+    from kinyvoice_ai.src.model.decoding import DECODERS
+
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the transcription pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Benchmark stages, API throughput and memory")
+    run_parser.add_argument("--output", required=True, help="Where to write the JSON results")
+    run_parser.add_argument("--lengths", type=_float_list, default=[1.0, 5.0, 15.0, 45.0],
+                            help="Comma-separated audio lengths in seconds")
+    run_parser.add_argument("--sample-rates", type=_int_list, default=[8000, 16000, 44100])
+    run_parser.add_argument("--channels", type=_int_list, default=[1, 2])
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--decoders", type=lambda v: v.split(","), default=["greedy"],
+                            help=f"Comma-separated subset of {','.join(DECODERS)}")
+    run_parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16])
+    run_parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    run_parser.add_argument("--api-audio-seconds", type=float, default=5.0)
+    run_parser.add_argument("--skip-api", action="store_true", help="Skip the API throughput section")
+    run_parser.add_argument("--precision", choices=PRECISIONS, default="fp32")
+    run_parser.add_argument("--compile-mode", choices=COMPILE_MODES, default="none")
+    run_parser.add_argument("--no-batching", action="store_true")
+    run_parser.add_argument("--threads", type=int, default=0, help="torch threads, 0 keeps the default")
+    run_parser.add_argument("--seed", type=int, default=0)
+
+    compare_parser = subparsers.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Relative slowdown reported as a regression")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "run":
+        # Everything is generated locally; never reach out to the model hub
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        report = asyncio.run(run(args))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(args.output)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['metric']:<60} {row['baseline']:>14.3f} {row['candidate']:>14.3f} {row['change']:>+8.1%} {flag}")
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 class TranscriptionRecord(BaseModel):
     """Model for storing transcription records"""
@@ -11,13 +14,185 @@ class TranscriptionRecord(BaseModel):
     wer: Optional[float] = None
     cer: Optional[float] = None
     created_at: datetime
+    job_id: Optional[str] = None
+    audio_duration: Optional[float] = None
+    model_version: Optional[str] = None
+    decoder: Optional[str] = None
+    # Per-stage latencies in seconds; unset stages (e.g. on cache hits) stay NULL
+    decode_time: Optional[float] = None
+    resample_time: Optional[float] = None
+    forward_time: Optional[float] = None
+    decode_text_time: Optional[float] = None
+    db_time: Optional[float] = None
 
     class Config:
         orm_mode = True
 
+class JobRecord(BaseModel):
+    """Model for batch transcription jobs"""
+    id: str
+    status: str
+    total_items: int
+    completed_items: int = 0
+    failed_items: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class JobItemRecord(BaseModel):
+    """Model for a single file within a batch transcription job"""
+    id: str
+    job_id: str
+    position: int
+    filename: str
+    path: str
+    status: str
+    transcription_id: Optional[str] = None
+    error: Optional[str] = None
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+# Hourly rollup of the transcriptions hypertable. Sums and counts are kept
+# (not averages) so that any range of hours can be re-aggregated exactly.
+HOURLY_ROLLUP_VIEW = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS transcriptions_hourly
+    WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+    SELECT
+        time_bucket(INTERVAL '1 hour', created_at) AS hour,
+        COUNT(*) AS request_count,
+        SUM(processing_time) AS processing_time_sum,
+        MIN(processing_time) AS min_processing_time,
+        MAX(processing_time) AS max_processing_time,
+        SUM(confidence) AS confidence_sum,
+        COUNT(wer) AS wer_count,
+        SUM(wer) AS wer_sum,
+        COUNT(cer) AS cer_count,
+        SUM(cer) AS cer_sum
+    FROM transcriptions
+    GROUP BY hour
+    WITH NO DATA
+"""
+
+# Values with latency percentiles in the hourly percentile rollup, by name
+PERCENTILE_VALUES = (
+    ("latency", "processing_time"),
+    ("rtf", "processing_time / NULLIF(audio_duration, 0)"),
+    ("decode_time", "decode_time"),
+    ("resample_time", "resample_time"),
+    ("forward_time", "forward_time"),
+    ("decode_text_time", "decode_text_time"),
+    ("db_time", "db_time"),
+)
+
+# Without the Toolkit, percentiles come from log-spaced histograms over this
+# range: each of the buckets spans ~12%, which bounds the relative error
+HISTOGRAM_MIN = 1e-4
+HISTOGRAM_MAX = 1e3
+HISTOGRAM_BUCKETS = 140
+
+SKETCH_ROLLUP = "transcriptions_hourly_sketches"
+HISTOGRAM_ROLLUP = "transcriptions_hourly_histograms"
+
+def percentile_rollup_view(toolkit: bool) -> str:
+    """Hourly rollup with mergeable percentile state for every ``PERCENTILE_VALUES`` entry.
+    
+    With timescaledb_toolkit each value keeps a ``percentile_agg`` sketch;
+    otherwise a ``histogram`` of its logarithm, which core TimescaleDB
+    provides.
+    """
+    if toolkit:
+        name = SKETCH_ROLLUP
+        columns = [f"percentile_agg({expression}) AS {value}_agg" for value, expression in PERCENTILE_VALUES]
+    else:
+        name = HISTOGRAM_ROLLUP
+        columns = [
+            f"histogram(ln(GREATEST({expression}, {HISTOGRAM_MIN})), "
+            f"ln({HISTOGRAM_MIN}), ln({HISTOGRAM_MAX}), {HISTOGRAM_BUCKETS}) "
+            # GREATEST ignores NULLs, so unset stage times must be filtered out first
+            f"FILTER (WHERE {expression} IS NOT NULL) AS {value}_hist"
+            for value, expression in PERCENTILE_VALUES
+        ]
+    value_columns = ",\n        ".join(columns)
+    return f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {name}
+    WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+    SELECT
+        time_bucket(INTERVAL '1 hour', created_at) AS hour,
+        COUNT(*) AS request_count,
+        SUM(processing_time) AS processing_time_sum,
+        MAX(processing_time) AS max_processing_time,
+        SUM(audio_duration) AS audio_seconds,
+        SUM(confidence) AS confidence_sum,
+        {value_columns}
+    FROM transcriptions
+    GROUP BY hour
+    WITH NO DATA
+"""
+
+def _enable_toolkit(cur) -> bool:
+    """Whether timescaledb_toolkit is (or could be made) available"""
+    try:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS timescaledb_toolkit")
+        return True
+    except Exception as e:
+        logger.info(f"timescaledb_toolkit unavailable, percentiles use histograms: {e}")
+        return False
+
+def _refresh_policy(view: str, settings) -> tuple:
+    return ("""
+            SELECT add_continuous_aggregate_policy(%s,
+                start_offset => INTERVAL '3 days',
+                end_offset => INTERVAL '1 hour',
+                schedule_interval => %s * INTERVAL '1 second',
+                if_not_exists => TRUE)
+        """, (view, settings.metrics_rollup_refresh_interval_s))
+
+def _apply_timescale_policies(cur, settings):
+    """Create the hourly rollups plus refresh, compression and retention policies.
+    
+    Each statement runs on its own: continuous aggregates cannot be created
+    inside a transaction block, and policies that already exist (or options
+    that cannot be changed once chunks are compressed) must not abort startup.
+    """
+    toolkit = _enable_toolkit(cur)
+    statements = [
+        HOURLY_ROLLUP_VIEW,
+        _refresh_policy("transcriptions_hourly", settings),
+        percentile_rollup_view(toolkit),
+        _refresh_policy(SKETCH_ROLLUP if toolkit else HISTOGRAM_ROLLUP, settings),
+        """
+            ALTER TABLE transcriptions SET (
+                timescaledb.compress,
+                timescaledb.compress_orderby = 'created_at DESC'
+            )
+        """,
+        ("""
+            SELECT add_compression_policy('transcriptions',
+                %s * INTERVAL '1 day', if_not_exists => TRUE)
+        """, (settings.db_compress_after_days,)),
+    ]
+    if settings.db_retention_days:
+        statements.append(("""
+            SELECT add_retention_policy('transcriptions',
+                %s * INTERVAL '1 day', if_not_exists => TRUE)
+        """, (settings.db_retention_days,)))
+    
+    for statement in statements:
+        query, params = statement if isinstance(statement, tuple) else (statement, ())
+        try:
+            cur.execute(query, params)
+        except Exception as e:
+            logger.warning(f"Skipping TimescaleDB policy statement: {e}")
+
 def create_tables():
     """Create necessary database tables if they don't exist"""
     from kinyvoice_ai.configs.connect_timescale_db import get_db_connection, release_db_connection
+    from kinyvoice_ai.configs.settings import Settings
+    settings = Settings()
     
     conn = get_db_connection()
     try:
@@ -43,6 +218,53 @@ def create_tables():
                 
                 CREATE INDEX IF NOT EXISTS idx_transcriptions_confidence 
                 ON transcriptions (confidence DESC);
+                
+                -- Link batch results back to their job
+                ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS job_id UUID;
+                
+                -- Audio length, producing model and per-stage latencies
+                ALTER TABLE transcriptions
+                    ADD COLUMN IF NOT EXISTS audio_duration FLOAT,
+                    ADD COLUMN IF NOT EXISTS model_version TEXT,
+                    ADD COLUMN IF NOT EXISTS decoder TEXT,
+                    ADD COLUMN IF NOT EXISTS decode_time FLOAT,
+                    ADD COLUMN IF NOT EXISTS resample_time FLOAT,
+                    ADD COLUMN IF NOT EXISTS forward_time FLOAT,
+                    ADD COLUMN IF NOT EXISTS decode_text_time FLOAT,
+                    ADD COLUMN IF NOT EXISTS db_time FLOAT;
+                
+                -- Batch transcription jobs and their items
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id UUID PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    total_items INTEGER NOT NULL,
+                    completed_items INTEGER NOT NULL DEFAULT 0,
+                    failed_items INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMPTZ NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL
+                );
+                
+                CREATE TABLE IF NOT EXISTS job_items (
+                    id UUID PRIMARY KEY,
+                    job_id UUID NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    transcription_id UUID,
+                    error TEXT,
+                    updated_at TIMESTAMPTZ NOT NULL
+                );
+                
+                CREATE INDEX IF NOT EXISTS idx_job_items_job_id 
+                ON job_items (job_id, position);
+                
+                -- Only unfinished items are scanned when resuming after a restart
+                CREATE INDEX IF NOT EXISTS idx_job_items_unfinished 
+                ON job_items (status) WHERE status IN ('pending', 'running');
             """)
+            
+            # Rollups and data lifecycle policies for the metrics endpoints
+            _apply_timescale_policies(cur, settings)
     finally:
         release_db_connection(conn) 
\ No newline at end of file
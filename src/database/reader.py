@@ -0,0 +1,219 @@
+import asyncio
+import base64
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+import logging
+
+from kinyvoice_ai.configs.connect_timescale_db import db_connection
+from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.src.database.writer import TRANSCRIPTION_COLUMNS
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+_SELECT_COLUMNS = ", ".join(TRANSCRIPTION_COLUMNS)
+
+# Each running export pins a pooled connection; the cap leaves the rest of the pool to requests
+_export_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_export_slots() -> asyncio.Semaphore:
+    global _export_slots
+    if _export_slots is None:
+        _export_slots = asyncio.Semaphore(max(1, settings.export_max_concurrent))
+    return _export_slots
+
+
+def export_slot_available() -> bool:
+    """Whether an export can start now without waiting for another to finish"""
+    return not _get_export_slots().locked()
+
+
+def encode_cursor(created_at: datetime, transcription_id) -> str:
+    """Opaque page token for the ``(created_at, id)`` position of a row"""
+    raw = json.dumps([created_at.isoformat(), str(transcription_id)])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed token"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, transcription_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(uuid.UUID(transcription_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _where(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    min_confidence: Optional[float],
+    max_confidence: Optional[float],
+    after: Optional[Tuple[datetime, str]] = None
+) -> Tuple[str, dict]:
+    """WHERE clause shared by listing and export.
+
+    Time bounds are plain ``created_at`` ranges so TimescaleDB excludes
+    chunks and the ``created_at`` index drives the scan. The keyset
+    condition repeats ``created_at <=`` as a sargable bound next to the
+    row comparison that breaks ties on ``id``.
+    """
+    clauses = []
+    params = {}
+    if start_time is not None:
+        clauses.append("created_at >= %(start_time)s")
+        params["start_time"] = start_time
+    if end_time is not None:
+        clauses.append("created_at < %(end_time)s")
+        params["end_time"] = end_time
+    if min_confidence is not None:
+        clauses.append("confidence >= %(min_confidence)s")
+        params["min_confidence"] = min_confidence
+    if max_confidence is not None:
+        clauses.append("confidence <= %(max_confidence)s")
+        params["max_confidence"] = max_confidence
+    if after is not None:
+        clauses.append(
+            "created_at <= %(after_created_at)s "
+            "AND (created_at, id) < (%(after_created_at)s, %(after_id)s::uuid)"
+        )
+        params["after_created_at"], params["after_id"] = after
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+async def list_transcriptions(
+    limit: int,
+    cursor: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None
+) -> dict:
+    """One page of transcriptions, newest first, with the token of the next page"""
+    where, params = _where(
+        start_time, end_time, min_confidence, max_confidence,
+        after=decode_cursor(cursor) if cursor else None
+    )
+    # One extra row tells whether another page exists without a COUNT
+    params["limit"] = limit + 1
+    async with db_connection() as conn:
+        rows = await conn.fetchall(f"""
+            SELECT {_SELECT_COLUMNS}
+            FROM transcriptions
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %(limit)s
+        """, params)
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _open_cursor(conn, query: str, params: dict, itersize: int):
+    # Named cursors live in a transaction; the pool hands out autocommit connections
+    conn.autocommit = False
+    try:
+        with conn.cursor() as setup:
+            # Scoped to this transaction, so the pooled connection keeps its defaults
+            setup.execute(
+                "SELECT set_config('statement_timeout', %s, true), "
+                "set_config('idle_in_transaction_session_timeout', %s, true)",
+                (
+                    str(int(settings.export_statement_timeout_s * 1000)),
+                    str(int(settings.export_idle_in_transaction_timeout_s * 1000)),
+                )
+            )
+        cur = conn.cursor(name=f"export_{uuid.uuid4().hex}")
+        cur.itersize = itersize
+        cur.execute(query, params)
+    except Exception:
+        conn.rollback()
+        conn.autocommit = True
+        raise
+    return cur
+
+
+def _fetch(conn, cur, size: int) -> List[dict]:
+    return cur.fetchmany(size)
+
+
+def _close_cursor(conn, cur):
+    try:
+        cur.close()
+    finally:
+        # Read-only transaction: end it and give the pool its autocommit connection back
+        conn.rollback()
+        conn.autocommit = True
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_rows(rows: List[dict], fmt: str) -> bytes:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in rows
+        ).encode("utf-8")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else ("" if value is None else value)
+            for value in (row[column] for column in TRANSCRIPTION_COLUMNS)
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_transcriptions(
+    fmt: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    batch_size: int = 2000
+) -> AsyncIterator[bytes]:
+    """Stream matching transcriptions as NDJSON or CSV chunks.
+
+    Rows come from a server-side cursor ``batch_size`` at a time, so memory
+    stays constant however many rows match. Rows are in ``created_at``
+    order. The connection is held until the stream ends or the client goes
+    away, then returned to the pool. At most ``export_max_concurrent``
+    exports hold a connection at once, and the export transaction carries
+    its own statement and idle-in-transaction timeouts, so a stalled client
+    cannot keep a transaction open indefinitely.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    where, params = _where(start_time, end_time, min_confidence, max_confidence)
+    query = f"SELECT {_SELECT_COLUMNS} FROM transcriptions {where} ORDER BY created_at, id"
+
+    async with _get_export_slots(), db_connection() as conn:
+        cur = await conn.run(_open_cursor, query, params, batch_size)
+        try:
+            if fmt == "csv":
+                yield (",".join(TRANSCRIPTION_COLUMNS) + "\r\n").encode("utf-8")
+            exported = 0
+            while True:
+                rows = await conn.run(_fetch, cur, batch_size)
+                if not rows:
+                    break
+                exported += len(rows)
+                yield _encode_rows(rows, fmt)
+            logger.info(f"Exported {exported} transcriptions as {fmt}")
+        finally:
+            await conn.run(_close_cursor, cur)
@@ -0,0 +1,233 @@
+import asyncio
+import time
+from typing import List, Optional, Tuple
+import logging
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.configs.connect_timescale_db import db_connection
+from kinyvoice_ai.src.database.models import TranscriptionRecord
+from kinyvoice_ai.src.utils.telemetry import STAGE_SECONDS, record_error
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+TRANSCRIPTION_COLUMNS = (
+    "id", "text", "confidence", "processing_time", "wer", "cer", "created_at", "job_id",
+    "audio_duration", "model_version", "decoder",
+    "decode_time", "resample_time", "forward_time", "decode_text_time", "db_time"
+)
+
+
+def _insert_rows(conn, records: List[TranscriptionRecord]):
+    """Insert records with a single multi-row INSERT"""
+    rows = [tuple(getattr(record, column) for column in TRANSCRIPTION_COLUMNS) for record in records]
+    with conn.cursor() as cur, STAGE_SECONDS.time(stage="db_insert"):
+        execute_values(
+            cur,
+            f"INSERT INTO transcriptions ({', '.join(TRANSCRIPTION_COLUMNS)}) VALUES %s",
+            rows,
+            page_size=len(rows),
+        )
+
+
+async def _insert_batch(records: List[TranscriptionRecord]):
+    async with db_connection() as conn:
+        await conn.run(_insert_rows, records)
+
+
+# Errors caused by the rows themselves; retrying the same rows cannot succeed
+_REJECTED_ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+# A queued record and, for callers that wait for durability, its flush future
+_Pending = Tuple[TranscriptionRecord, Optional[asyncio.Future]]
+
+
+def _resolve(future: Optional[asyncio.Future], error: Optional[Exception] = None):
+    # The waiter may have been cancelled in the meantime
+    if future is None or future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+
+class TranscriptionWriter:
+    """Write-behind buffer for transcription records.
+
+    Request handlers enqueue records and return immediately; a background
+    task flushes them in multi-row INSERTs once ``batch_size`` records are
+    waiting or ``flush_interval_ms`` has passed. The queue holds at most
+    ``max_pending`` records, beyond which ``write`` waits (backpressure)
+    rather than growing without bound. A batch that fails on a database
+    error is retried with capped backoff until it is stored, so an outage
+    fills the buffer and slows writers down instead of losing records;
+    rows the database rejects outright are dropped one by one. ``stop``
+    flushes everything still queued, giving up after ``max_retries``
+    attempts per batch. Rows become visible to readers after the next
+    flush; ``write(..., wait=True)`` returns only once the row is stored.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval_ms: float = 200.0,
+        max_pending: int = 10000,
+        max_retries: int = 3,
+        max_backoff_s: float = 5.0,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self.max_retries = max(1, max_retries)
+        self.max_backoff_s = max_backoff_s
+        self._stopping = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_records = 0
+        self.flushed_batches = 0
+        self.dropped_records = 0
+
+    async def start(self):
+        """Start the background flush loop"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush all queued records and stop the flush loop"""
+        if self._task is None:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._stopping = False
+        logger.info(f"Transcription writer stopped after {self.flushed_records} records")
+
+    async def write(self, record: TranscriptionRecord, wait: bool = False):
+        """Queue a record for insertion, waiting if the buffer is full.
+        
+        With ``wait``, also wait until the record's batch is stored; raises
+        if the database rejected it or it was given up on at shutdown.
+        """
+        if self._task is None:
+            # Not started (e.g. scripts without the app lifecycle): write through
+            await _insert_batch([record])
+            return
+        future = asyncio.get_running_loop().create_future() if wait else None
+        started = time.perf_counter()
+        await self._queue.put((record, future))
+        # Waiting for buffer space is the DB cost seen by the request. The
+        # flush task cannot pick the record up before this coroutine yields.
+        record.db_time = time.perf_counter() - started
+        if future is not None:
+            await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch: List[_Pending] = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+            await self._flush(batch)
+
+        # Drain whatever was queued behind the stop sentinel
+        remaining = []
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if pending is not None:
+                remaining.append(pending)
+        for i in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[i:i + self.batch_size])
+
+    async def _flush(self, batch: List[_Pending]):
+        records = [record for record, _ in batch]
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await _insert_batch(records)
+                break
+            except _REJECTED_ROW_ERRORS as e:
+                logger.error(f"Database rejected a batch of {len(batch)} transcriptions: {e}")
+                record_error("db_insert", e)
+                await self._flush_rows(batch)
+                return
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} transcriptions (attempt {attempt}): {e}")
+                record_error("db_insert", e)
+                if self._stopping and attempt >= self.max_retries:
+                    # Shutting down with the database still away: nothing left to wait for
+                    self.dropped_records += len(batch)
+                    for _, future in batch:
+                        _resolve(future, e)
+                    return
+                await asyncio.sleep(min(self.max_backoff_s, 0.5 * 2 ** (attempt - 1)))
+        self.flushed_records += len(batch)
+        self.flushed_batches += 1
+        for _, future in batch:
+            _resolve(future)
+
+    async def _flush_rows(self, batch: List[_Pending]):
+        """Insert a rejected batch row by row, dropping only the rows that fail"""
+        for record, future in batch:
+            try:
+                await _insert_batch([record])
+            except _REJECTED_ROW_ERRORS as e:
+                logger.error(f"Dropping transcription {record.id}: {e}")
+                self.dropped_records += 1
+                _resolve(future, e)
+                continue
+            except Exception as e:
+                # Lost the database meanwhile; retry this row like any batch
+                logger.error(f"Failed to insert transcription {record.id}: {e}")
+                await self._flush([(record, future)])
+                continue
+            self.flushed_records += 1
+            _resolve(future)
+
+    def stats(self) -> dict:
+        """Buffer occupancy and flush counters"""
+        return {
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.max_pending,
+            "flushed_records": self.flushed_records,
+            "flushed_batches": self.flushed_batches,
+            "dropped_records": self.dropped_records,
+        }
+
+
+# Process-wide writer shared by the routers and the job manager
+_writer: Optional[TranscriptionWriter] = None
+
+def get_transcription_writer() -> TranscriptionWriter:
+    """Return the shared transcription writer, creating it on first use"""
+    global _writer
+    if _writer is None:
+        _writer = TranscriptionWriter(
+            batch_size=settings.db_writer_batch_size,
+            flush_interval_ms=settings.db_writer_flush_interval_ms,
+            max_pending=settings.db_writer_max_pending,
+            max_retries=settings.db_writer_max_retries,
+        )
+    return _writer
@@ -0,0 +1,457 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+import logging
+
+from kinyvoice_ai.src.utils.metrics import (
+    ErrorCounts, normalize_text, word_error_counts, char_error_counts, hypothesis_hits
+)
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+DEFAULT_DOMAIN = "general"
+
+
+class Utterance(NamedTuple):
+    """One manifest entry to transcribe and score"""
+    id: str
+    audio_path: str
+    reference: str
+    domain: str
+
+
+def read_manifest(path: str, default_domain: str = DEFAULT_DOMAIN) -> List[Utterance]:
+    """Read a manifest of utterances.
+
+    ``.jsonl`` manifests hold one object per line with ``audio_path``,
+    ``text`` and optional ``id`` and ``domain``. Anything else is read as
+    ``audio_path<TAB>reference[<TAB>domain]`` lines, the format the parity
+    check uses. Ids default to the audio path.
+    """
+    utterances = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                entry = json.loads(line)
+                audio_path, reference = entry["audio_path"], entry["text"]
+                domain = entry.get("domain") or default_domain
+                utterance_id = str(entry.get("id") or audio_path)
+            else:
+                fields = line.split("\t")
+                audio_path, reference = fields[0], fields[1]
+                domain = fields[2] if len(fields) > 2 and fields[2] else default_domain
+                utterance_id = audio_path
+            # Relative audio paths are resolved against the manifest's directory
+            if not os.path.isabs(audio_path):
+                audio_path = os.path.join(os.path.dirname(os.path.abspath(path)), audio_path)
+            utterances.append(Utterance(utterance_id, audio_path, reference, domain))
+    return utterances
+
+
+def read_checkpoint(path: str) -> List[dict]:
+    """Per-utterance results written so far; a torn last line is ignored"""
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring incomplete line in checkpoint {path}")
+    return results
+
+
+def shards(utterances: List[Utterance], size: int) -> Iterator[List[Utterance]]:
+    for i in range(0, len(utterances), size):
+        yield utterances[i:i + size]
+
+
+def _take(iterator: Iterator, n: int) -> List:
+    items = []
+    for _ in range(n):
+        try:
+            items.append(next(iterator))
+        except StopIteration:
+            break
+    return items
+
+
+# Each worker process holds its own model; set by ``_init_worker``
+_worker_model = None
+_worker_options: dict = {}
+
+
+def _init_worker(options: dict):
+    """Load the model once per worker process"""
+    global _worker_model, _worker_options
+    import torch
+    from kinyvoice_ai.src.model.asr_model import ASRModel
+
+    if options["threads"]:
+        torch.set_num_threads(options["threads"])
+    model = ASRModel(precision=options["precision"], compile_mode=options["compile_mode"], batching=False)
+    if options["model_name"]:
+        model.model_name = options["model_name"]
+    # Each utterance is seen once; caching would only cost memory
+    model.cache = None
+    asyncio.run(model.load_model())
+    _worker_model = model
+    _worker_options = options
+
+
+def _score(utterance: Utterance, hypothesis: str, normalize: bool) -> dict:
+    reference = normalize_text(utterance.reference) if normalize else utterance.reference
+    if normalize:
+        hypothesis = normalize_text(hypothesis)
+    return {
+        "words": word_error_counts(reference, hypothesis).to_dict(),
+        "chars": char_error_counts(reference, hypothesis).to_dict(),
+    }
+
+
+def _evaluate_shard(shard: List[Utterance]) -> List[dict]:
+    """Transcribe a shard in length-sorted batches and score every utterance"""
+    from kinyvoice_ai.src.utils.audio_processing import decode_audio
+
+    model = _worker_model
+    options = _worker_options
+    results: Dict[str, dict] = {}
+    waveforms = {}
+    for utterance in shard:
+        try:
+            audio, sample_rate = decode_audio(utterance.audio_path)
+            waveforms[utterance.id] = model._prepare_waveform(audio, sample_rate)
+        except Exception as e:
+            results[utterance.id] = {"error": f"decode: {e}"}
+
+    started = time.perf_counter()
+    logits = {}
+    short = []
+    for utterance_id, waveform in waveforms.items():
+        if model._is_long_form(waveform, None):
+            try:
+                logits[utterance_id] = model._forward_long(waveform)
+            except Exception as e:
+                results[utterance_id] = {"error": f"forward: {e}"}
+        else:
+            short.append(utterance_id)
+    # Similar lengths share a batch, so little compute goes to padding
+    short.sort(key=lambda utterance_id: waveforms[utterance_id].shape[-1])
+    for i in range(0, len(short), options["batch_size"]):
+        batch = short[i:i + options["batch_size"]]
+        try:
+            logits.update(zip(batch, model._forward_logits([waveforms[u] for u in batch])))
+        except Exception:
+            # Rerun the batch one utterance at a time so only the bad input fails
+            for utterance_id in batch:
+                try:
+                    logits[utterance_id] = model._forward_logits([waveforms[utterance_id]])[0]
+                except Exception as e:
+                    results[utterance_id] = {"error": f"forward: {e}"}
+    # Batched forward time is attributed to utterances by audio length
+    forward_seconds = time.perf_counter() - started
+    total_samples = sum(int(w.shape[-1]) for w in waveforms.values()) or 1
+
+    scored = []
+    for utterance in shard:
+        result = {"id": utterance.id, "domain": utterance.domain}
+        if utterance.id in results:
+            result.update(results[utterance.id])
+            scored.append(result)
+            continue
+        samples = int(waveforms[utterance.id].shape[-1])
+        try:
+            # Word scores are kept for ``calibrate``, so words are always built here
+            text, confidence, words = model._postprocess(
+                logits[utterance.id], options["decoder"], utterance.domain, word_timestamps=True
+            )
+        except Exception as e:
+            result["error"] = f"postprocess: {e}"
+            scored.append(result)
+            continue
+        result.update({
+            "hypothesis": text,
+            "confidence": confidence,
+            # Raw word scores and the reference let ``calibrate`` refit the temperature
+            "reference": utterance.reference,
+            "word_log_probs": [word["log_prob"] for word in words],
+            "audio_seconds": samples / model.sample_rate,
+            "forward_seconds": forward_seconds * samples / total_samples,
+            **_score(utterance, text, options["normalize"]),
+        })
+        scored.append(result)
+    return scored
+
+
+def aggregate(results: List[dict]) -> dict:
+    """Corpus-level and per-domain WER/CER from summed alignment counts"""
+    totals = {"words": ErrorCounts(), "chars": ErrorCounts()}
+    domains: Dict[str, dict] = {}
+    utterances = failed = 0
+    audio_seconds = forward_seconds = 0.0
+    for result in results:
+        domain = domains.setdefault(result["domain"], {
+            "utterances": 0, "failed": 0, "words": ErrorCounts(), "chars": ErrorCounts()
+        })
+        if "error" in result:
+            failed += 1
+            domain["failed"] += 1
+            continue
+        utterances += 1
+        domain["utterances"] += 1
+        audio_seconds += result["audio_seconds"]
+        forward_seconds += result["forward_seconds"]
+        for unit in ("words", "chars"):
+            counts = ErrorCounts.from_dict(result[unit])
+            totals[unit] += counts
+            domain[unit] += counts
+
+    def summary(words: ErrorCounts, chars: ErrorCounts) -> dict:
+        return {
+            "wer": words.rate,
+            "cer": chars.rate,
+            "word_counts": words.to_dict(),
+            "char_counts": chars.to_dict(),
+        }
+
+    return {
+        "utterances": utterances,
+        "failed": failed,
+        "audio_seconds": audio_seconds,
+        # Model time per second of audio, summed over all workers
+        "rtf": forward_seconds / audio_seconds if audio_seconds > 0 else None,
+        **summary(totals["words"], totals["chars"]),
+        "domains": {
+            name: {
+                "utterances": domain["utterances"],
+                "failed": domain["failed"],
+                **summary(domain["words"], domain["chars"]),
+            }
+            for name, domain in sorted(domains.items())
+        },
+    }
+
+
+def evaluate(
+    manifest: str,
+    checkpoint: str,
+    workers: int = 1,
+    shard_size: int = 64,
+    batch_size: int = 8,
+    decoder: Optional[str] = None,
+    precision: str = "fp32",
+    compile_mode: str = "none",
+    model_name: Optional[str] = None,
+    threads: int = 0,
+    normalize: bool = True,
+    default_domain: str = DEFAULT_DOMAIN,
+) -> dict:
+    """Transcribe and score a manifest over a process pool, resuming from ``checkpoint``.
+
+    Every finished shard is appended to the checkpoint (JSON lines) before
+    the next is collected, so an interrupted run only repeats the shards
+    that were in flight. Utterances already scored in the checkpoint are
+    skipped; ones whose latest result is an error are run again.
+    """
+    utterances = read_manifest(manifest, default_domain)
+    latest = {result["id"]: result for result in read_checkpoint(checkpoint)}
+    done: Set[str] = {utterance_id for utterance_id, result in latest.items() if "error" not in result}
+    pending = [utterance for utterance in utterances if utterance.id not in done]
+    logger.info(f"{len(utterances)} utterances, {len(done)} already in {checkpoint}, {len(pending)} to run")
+
+    options = {
+        "batch_size": max(1, batch_size),
+        "decoder": decoder,
+        "precision": precision,
+        "compile_mode": compile_mode,
+        "model_name": model_name,
+        # Split the cores between workers unless told otherwise
+        "threads": threads or max(1, (os.cpu_count() or 1) // max(1, workers)),
+        "normalize": normalize,
+    }
+    started = time.perf_counter()
+    if pending:
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint)), exist_ok=True)
+        # Spawned workers don't inherit torch threads or CUDA state from this process
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=max(1, workers),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(options,),
+        ) as pool, open(checkpoint, "a", encoding="utf-8") as out:
+            queue = iter(shards(pending, max(1, shard_size)))
+            # Keep two shards per worker queued so workers never idle between shards
+            in_flight = {pool.submit(_evaluate_shard, shard): shard for shard in _take(queue, 2 * max(1, workers))}
+            completed = 0
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    shard = in_flight.pop(future)
+                    try:
+                        shard_results = future.result()
+                    except Exception as e:
+                        # Recorded as errors, so the next run retries the shard
+                        logger.error(f"Shard of {len(shard)} utterances failed: {e}")
+                        shard_results = [
+                            {"id": utterance.id, "domain": utterance.domain, "error": f"shard: {e}"}
+                            for utterance in shard
+                        ]
+                    for result in shard_results:
+                        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+                    os.fsync(out.fileno())
+                    completed += len(shard_results)
+                    logger.info(f"Evaluated {completed}/{len(pending)} utterances")
+                for shard in _take(queue, len(finished)):
+                    in_flight[pool.submit(_evaluate_shard, shard)] = shard
+
+    # An utterance re-run after an interruption counts once, with its latest result
+    ids = {utterance.id for utterance in utterances}
+    latest = {result["id"]: result for result in read_checkpoint(checkpoint) if result["id"] in ids}
+    results = list(latest.values())
+    return {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "manifest": os.path.abspath(manifest),
+        "model_name": model_name,
+        "precision": precision,
+        "compile_mode": compile_mode,
+        "decoder": decoder,
+        "normalized": normalize,
+        "workers": workers,
+        "wall_seconds": time.perf_counter() - started,
+        **aggregate(results),
+    }
+
+
+def calibration_data(results: List[dict]) -> Tuple[List[float], List[int]]:
+    """Per-word log-probabilities and whether each word matched the reference.
+
+    A word counts as correct when the alignment of the normalized
+    hypothesis to the normalized reference matches it. Utterances whose
+    aligned words do not line up one-to-one with the normalized hypothesis
+    (e.g. punctuation-only tokens) are skipped.
+    """
+    log_scores, labels = [], []
+    for result in results:
+        if "error" in result or "word_log_probs" not in result:
+            continue
+        hits = hypothesis_hits(
+            normalize_text(result["reference"]).split(), normalize_text(result["hypothesis"]).split()
+        )
+        if len(hits) != len(result["word_log_probs"]):
+            continue
+        log_scores.extend(result["word_log_probs"])
+        labels.extend(int(hit) for hit in hits)
+    return log_scores, labels
+
+
+def fit_calibration(results: List[dict], output: str) -> dict:
+    """Fit the confidence temperature on checkpointed word scores and save it"""
+    from kinyvoice_ai.src.utils.temperature_scaling import (
+        calibrate, fit_temperature, expected_calibration_error, save_temperature
+    )
+
+    log_scores, labels = calibration_data(results)
+    if not labels:
+        raise ValueError(
+            f"None of the {len(results)} results has word scores that line up with its "
+            "hypothesis; run the evaluation again to produce them"
+        )
+    temperature = fit_temperature(log_scores, labels)
+    stats = {
+        "words": len(labels),
+        "accuracy": sum(labels) / len(labels),
+        "ece_before": expected_calibration_error([calibrate(s) for s in log_scores], labels),
+        "ece_after": expected_calibration_error([calibrate(s, temperature) for s in log_scores], labels),
+    }
+    save_temperature(output, temperature, **stats)
+    logger.info(f"Fitted confidence temperature {temperature:.3f} on {len(labels)} words")
+    return {"temperature": temperature, **stats}
+
+
+def main(argv: Optional[List[str]] = None):
+    from kinyvoice_ai.configs.settings import Settings
+    from kinyvoice_ai.src.model.optimization import PRECISIONS, COMPILE_MODES
+    from kinyvoice_ai.src.model.decoding import DECODERS
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(description="Offline WER/CER evaluation over large manifests")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Transcribe and score a manifest, resuming a checkpoint")
+    run_parser.add_argument("--manifest", required=True, help="TSV or JSONL manifest of audio and references")
+    run_parser.add_argument("--checkpoint", required=True, help="JSONL file of per-utterance results")
+    run_parser.add_argument("--output", help="Where to write the JSON report")
+    run_parser.add_argument("--workers", type=int, default=1, help="Processes, each with its own model")
+    run_parser.add_argument("--shard-size", type=int, default=64, help="Utterances per unit of work")
+    run_parser.add_argument("--batch-size", type=int, default=settings.batch_max_size)
+    run_parser.add_argument("--decoder", choices=DECODERS, default=None)
+    run_parser.add_argument("--precision", choices=PRECISIONS, default=settings.model_precision)
+    run_parser.add_argument("--compile-mode", choices=COMPILE_MODES, default="none")
+    run_parser.add_argument("--model-name", default=None, help="Model id or local directory")
+    run_parser.add_argument("--threads", type=int, default=0, help="torch threads per worker")
+    run_parser.add_argument("--domain", default=DEFAULT_DOMAIN, help="Domain of entries that name none")
+    run_parser.add_argument("--no-normalize", action="store_true", help="Score raw text")
+
+    report_parser = subparsers.add_parser("report", help="Aggregate a checkpoint without running the model")
+    report_parser.add_argument("checkpoint")
+    report_parser.add_argument("--output")
+
+    calibrate_parser = subparsers.add_parser(
+        "calibrate", help="Fit the confidence temperature on a checkpoint's word scores"
+    )
+    calibrate_parser.add_argument("checkpoint")
+    calibrate_parser.add_argument("--calibration", default=settings.confidence_calibration_path,
+                                  help="Where to write the fitted temperature")
+    calibrate_parser.add_argument("--output")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "run":
+        report = evaluate(
+            args.manifest,
+            args.checkpoint,
+            workers=args.workers,
+            shard_size=args.shard_size,
+            batch_size=args.batch_size,
+            decoder=args.decoder,
+            precision=args.precision,
+            compile_mode=args.compile_mode,
+            model_name=args.model_name,
+            threads=args.threads,
+            normalize=not args.no_normalize,
+            default_domain=args.domain,
+        )
+    elif args.command == "calibrate":
+        latest = {result["id"]: result for result in read_checkpoint(args.checkpoint)}
+        try:
+            report = fit_calibration(list(latest.values()), args.calibration)
+        except ValueError as e:
+            parser.exit(1, f"calibrate: {e}\n")
+    else:
+        latest = {result["id"]: result for result in read_checkpoint(args.checkpoint)}
+        report = {"version": REPORT_VERSION, **aggregate(list(latest.values()))}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+import asyncio
+import contextlib
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from psycopg2.extras import execute_values
+
+from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.configs.connect_timescale_db import db_connection
+from kinyvoice_ai.src.model.registry import get_asr_model
+from kinyvoice_ai.src.model.admission import AdmissionRejected, get_admission_controller, BULK
+from kinyvoice_ai.src.database.models import TranscriptionRecord
+from kinyvoice_ai.src.database.writer import get_transcription_writer
+from kinyvoice_ai.src.utils.audio_processing import (
+    decode_audio, validate_audio, probe_audio, check_audio_info
+)
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Job and item lifecycle states
+PENDING = "pending"
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+COMPLETED_WITH_ERRORS = "completed_with_errors"  # finished, some items failed
+FAILED = "failed"  # finished, every item failed
+
+
+def _safe_filename(filename: Optional[str]) -> str:
+    """Strip directories and unusual characters from a client-supplied name"""
+    name = os.path.basename(filename or "audio")
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)[:100] or "audio"
+
+
+def _probe_duration(source) -> float:
+    """Duration from the container header, 0 if it cannot be read"""
+    try:
+        return probe_audio(source).duration
+    except Exception:
+        return 0.0
+
+
+def _save_upload(file: UploadFile, path: str):
+    """Stream an upload to disk without holding it in memory"""
+    file.file.seek(0)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file.file, out, length=1024 * 1024)
+
+
+def _insert_job(conn, job: tuple, items: List[tuple]):
+    """Insert a job and all of its items in one transaction"""
+    # The pool hands out autocommit connections; a partial job must never be visible
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO jobs (id, status, total_items, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s)
+            """, job)
+            if items:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO job_items (id, job_id, position, filename, path, status, updated_at)
+                    VALUES %s
+                    """,
+                    items,
+                    page_size=len(items),
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+def _record_item_result(
+    conn,
+    job_id: str,
+    item_id: str,
+    transcription_id: Optional[str],
+    error: Optional[str],
+    now: datetime
+) -> Optional[dict]:
+    """Settle an item and count it against its job in one transaction.
+
+    The job's final status is decided in the same UPDATE that bumps its
+    counters, so concurrent workers finishing the last items cannot both
+    miss (or both claim) the end of the job. Returns the job counters and
+    status, or None when the item was not running (already settled).
+    """
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE job_items SET status = %s, transcription_id = %s, error = %s, updated_at = %s
+                WHERE id = %s AND status = %s
+            """, (FAILED if error else COMPLETED, transcription_id, error, now, item_id, RUNNING))
+            if cur.rowcount == 0:
+                conn.rollback()
+                return None
+            failed = 1 if error else 0
+            cur.execute("""
+                UPDATE jobs SET
+                    completed_items = completed_items + %(completed)s,
+                    failed_items = failed_items + %(failed)s,
+                    status = CASE
+                        WHEN completed_items + failed_items + 1 < total_items THEN status
+                        WHEN failed_items + %(failed)s = 0 THEN %(completed_status)s
+                        WHEN completed_items + %(completed)s = 0 THEN %(failed_status)s
+                        ELSE %(partial_status)s
+                    END,
+                    updated_at = %(now)s
+                WHERE id = %(job_id)s
+                RETURNING total_items, completed_items, failed_items, status
+            """, {
+                "completed": 1 - failed,
+                "failed": failed,
+                "completed_status": COMPLETED,
+                "failed_status": FAILED,
+                "partial_status": COMPLETED_WITH_ERRORS,
+                "now": now,
+                "job_id": job_id,
+            })
+            job = cur.fetchone()
+        conn.commit()
+        return job
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+class JobManager:
+    """Durable batch transcription jobs processed by a pool of workers.
+
+    Uploads are written to ``upload_dir`` once and job/item state lives in
+    the ``jobs`` and ``job_items`` tables, so clients can poll progress and
+    fetch results by job id. ``num_workers`` coroutines pull items from a
+    queue and go through ``ASRModel.transcribe``, where concurrent items are
+    coalesced by the batch scheduler; results are stored through the shared
+    write-behind writer, and an item is only marked completed (and its
+    upload removed) once its row has been flushed. Unfinished items are re-queued on
+    startup, so a restart resumes interrupted jobs. A finished job is
+    ``completed``, ``completed_with_errors`` when some items failed, or
+    ``failed`` when every item did.
+
+    Items run as bulk work under ``admission``, behind interactive
+    requests. New jobs are refused with 429 once the queued audio would
+    exceed ``max_backlog_audio_s``.
+    """
+
+    def __init__(
+        self,
+        asr_model,
+        writer,
+        upload_dir: str,
+        num_workers: int = 2,
+        admission=None,
+        max_backlog_audio_s: Optional[float] = None
+    ):
+        self.asr_model = asr_model
+        self.writer = writer
+        self.upload_dir = upload_dir
+        self.num_workers = max(1, num_workers)
+        self.admission = admission
+        self.max_backlog_audio_s = max_backlog_audio_s
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Header duration of every queued item, for backlog limits
+        self._backlog: Dict[str, float] = {}
+
+    @property
+    def backlog_audio_s(self) -> float:
+        return sum(self._backlog.values())
+
+    async def _execute(self, query: str, params: tuple = (), fetch: Optional[str] = None):
+        async with db_connection() as conn:
+            if fetch == "one":
+                return await conn.fetchone(query, params)
+            if fetch == "all":
+                return await conn.fetchall(query, params)
+            return await conn.execute(query, params)
+
+    async def start(self):
+        """Start the workers and re-queue items left unfinished by a restart"""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._queue = asyncio.Queue()
+
+        await self._execute("""
+            UPDATE job_items SET status = %s, updated_at = %s WHERE status = %s
+        """, (PENDING, datetime.now(), RUNNING))
+        unfinished = await self._execute("""
+            SELECT id, path FROM job_items WHERE status = %s ORDER BY job_id, position
+        """, (PENDING,), fetch="all")
+        for item in unfinished:
+            self._backlog[str(item["id"])] = await run_in_threadpool(_probe_duration, item["path"])
+            self._queue.put_nowait(str(item["id"]))
+        if unfinished:
+            logger.info(f"Resuming {len(unfinished)} unfinished batch items")
+
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.num_workers)
+        ]
+
+    async def stop(self):
+        """Cancel the workers; in-progress items are resumed on next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, files: List[UploadFile]) -> str:
+        """Persist uploads and job state, then queue every item"""
+        job_id = str(uuid.uuid4())
+
+        # Durations come from the headers; undecodable files cost nothing and fail later
+        durations = [await run_in_threadpool(_probe_duration, file.file) for file in files]
+        if self.max_backlog_audio_s is not None:
+            excess = self.backlog_audio_s + sum(durations) - self.max_backlog_audio_s
+            if excess > 0:
+                rate = self.admission.drain_rate() if self.admission is not None else 1.0
+                raise AdmissionRejected(
+                    429,
+                    f"Batch queue is full ({self.backlog_audio_s / 3600:.1f}h of audio pending)",
+                    excess / rate
+                )
+
+        job_dir = os.path.join(self.upload_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        now = datetime.now()
+        items = []
+        try:
+            for position, file in enumerate(files):
+                item_id = str(uuid.uuid4())
+                filename = _safe_filename(file.filename)
+                path = os.path.join(job_dir, f"{position:05d}_{filename}")
+                await run_in_threadpool(_save_upload, file, path)
+                items.append((item_id, job_id, position, filename, path, PENDING, now))
+
+            job = (job_id, QUEUED if items else COMPLETED, len(items), now, now)
+            async with db_connection() as conn:
+                await conn.run(_insert_job, job, items)
+        except Exception:
+            # Nothing references the uploads unless the job was stored
+            await run_in_threadpool(shutil.rmtree, job_dir, True)
+            raise
+
+        for item, duration in zip(items, durations):
+            self._backlog[item[0]] = duration
+            await self._queue.put(item[0])
+        return job_id
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        """Job status with progress counters"""
+        job = await self._execute("""
+            SELECT id, status, total_items, completed_items, failed_items, created_at, updated_at
+            FROM jobs WHERE id = %s
+        """, (job_id,), fetch="one")
+        if not job:
+            return None
+        done = job["completed_items"] + job["failed_items"]
+        return {
+            **job,
+            "progress": done / job["total_items"] if job["total_items"] else 1.0
+        }
+
+    async def get_results(self, job_id: str) -> List[dict]:
+        """Per-item status and transcription results of a job"""
+        return await self._execute("""
+            SELECT i.id AS item_id, i.position, i.filename, i.status, i.error,
+                   t.id AS transcription_id, t.text, t.confidence, t.processing_time
+            FROM job_items i
+            LEFT JOIN transcriptions t ON t.id = i.transcription_id
+            WHERE i.job_id = %s
+            ORDER BY i.position
+        """, (job_id,), fetch="all")
+
+    async def _worker(self, index: int):
+        while True:
+            item_id = await self._queue.get()
+            try:
+                await self._process_item(item_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Batch worker {index} failed on item {item_id}: {e}")
+            finally:
+                self._backlog.pop(item_id, None)
+
+    async def _process_item(self, item_id: str):
+        item = await self._execute("""
+            UPDATE job_items SET status = %s, updated_at = %s
+            WHERE id = %s AND status = %s
+            RETURNING job_id, path
+        """, (RUNNING, datetime.now(), item_id, PENDING), fetch="one")
+        if not item:
+            # Already handled, e.g. queued twice around a restart
+            return
+        job_id = str(item["job_id"])
+        await self._execute("""
+            UPDATE jobs SET status = %s, updated_at = %s WHERE id = %s AND status = %s
+        """, (RUNNING, datetime.now(), job_id, QUEUED))
+
+        transcription_id = None
+        error = None
+        try:
+            info = await run_in_threadpool(probe_audio, item["path"])
+            reason = check_audio_info(
+                info,
+                max_duration_s=settings.max_audio_duration_s,
+                min_duration_s=settings.min_audio_duration_s,
+                formats=settings.allowed_audio_formats
+            )
+            if reason is not None:
+                raise ValueError(reason)
+            async with self._admit(info.duration):
+                decode_started = time.perf_counter()
+                audio, sample_rate = await run_in_threadpool(decode_audio, item["path"])
+                if not validate_audio(
+                    audio, sample_rate, settings.max_audio_duration_s, settings.min_audio_duration_s
+                ):
+                    raise ValueError("Invalid audio file format")
+                timings = {"decode_time": time.perf_counter() - decode_started}
+                start_time = datetime.now()
+                text, confidence = await self.asr_model.transcribe(audio, sample_rate, timings=timings)
+                processing_time = (datetime.now() - start_time).total_seconds()
+
+            transcription_id = str(uuid.uuid4())
+            # The item only counts as completed once its row is stored
+            await self.writer.write(TranscriptionRecord(
+                id=transcription_id,
+                text=text,
+                confidence=confidence,
+                processing_time=processing_time,
+                created_at=datetime.now(),
+                job_id=job_id,
+                audio_duration=len(audio) / sample_rate,
+                model_version=self.asr_model.model_version,
+                decoder=settings.decoder,
+                **timings
+            ), wait=True)
+        except Exception as e:
+            transcription_id = None
+            error = str(e)
+            logger.error(f"Error processing batch item {item_id}: {e}")
+
+        await self._finish_item(job_id, item_id, item["path"], transcription_id, error)
+
+    def _admit(self, audio_seconds: float):
+        # Bulk items wait behind interactive requests instead of being rejected
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission.admit(audio_seconds, priority=BULK)
+
+    async def _finish_item(
+        self,
+        job_id: str,
+        item_id: str,
+        path: str,
+        transcription_id: Optional[str],
+        error: Optional[str]
+    ):
+        async with db_connection() as conn:
+            job = await conn.run(
+                _record_item_result, job_id, item_id, transcription_id, error, datetime.now()
+            )
+        # The upload is no longer needed once its result is stored
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+        if job and job["completed_items"] + job["failed_items"] >= job["total_items"]:
+            logger.info(
+                f"Job {job_id} {job['status']}: {job['completed_items']} completed, "
+                f"{job['failed_items']} failed"
+            )
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+# Process-wide job manager shared by the app and the ASR router
+_job_manager: Optional[JobManager] = None
+
+def get_job_manager() -> JobManager:
+    """Return the shared job manager, creating it on first use"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager(
+            get_asr_model(),
+            get_transcription_writer(),
+            upload_dir=settings.job_upload_dir,
+            num_workers=settings.job_workers,
+            admission=get_admission_controller(),
+            max_backlog_audio_s=settings.job_max_backlog_audio_s,
+        )
+    return _job_manager
@@ -0,0 +1,264 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+import logging
+
+from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.src.utils.telemetry import (
+    ADMITTED_AUDIO_SECONDS, ADMISSION_REJECTIONS, QUEUE_WAIT_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Lower values are served first
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+
+class AdmissionRejected(Exception):
+    """A request shed by admission control; mapped to 429/503 with Retry-After"""
+
+    def __init__(self, status_code: int, detail: str, retry_after_s: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after_s = retry_after_s
+
+    @property
+    def retry_after(self) -> str:
+        return str(max(1, math.ceil(self.retry_after_s)))
+
+
+class _Waiter:
+    __slots__ = ("cost", "priority", "future", "enqueued_at")
+
+    def __init__(self, cost: float, priority: int, future: asyncio.Future):
+        self.cost = cost
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class AdmissionController:
+    """Bound the audio-seconds in flight and shed work that cannot finish in time.
+
+    Each request costs its audio duration. Requests are admitted while the
+    admitted total stays under ``capacity_audio_s``; bulk work may only use
+    ``bulk_share`` of it, so interactive requests always find headroom.
+    Requests that do not fit wait in priority order (interactive before
+    bulk, FIFO within a priority). The expected wait is the audio ahead of
+    a request divided by the measured drain rate; a request is rejected
+    straight away with 503 if that wait plus its own processing time would
+    miss its deadline, and with 429 if an interactive request would wait
+    longer than ``max_queue_wait_s``. Bulk requests without a deadline
+    simply wait. Deadlines and the drain rate are measured on ``clock``.
+    """
+
+    def __init__(
+        self,
+        capacity_audio_s: float,
+        bulk_share: float = 0.5,
+        max_queue_wait_s: float = 5.0,
+        nominal_rate: float = 10.0,
+        rate_window_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.capacity_audio_s = capacity_audio_s
+        self.bulk_limit_audio_s = capacity_audio_s * min(max(bulk_share, 0.0), 1.0)
+        self.max_queue_wait_s = max_queue_wait_s
+        self.nominal_rate = nominal_rate
+        self.rate_window_s = rate_window_s
+        self._clock = clock
+        self._admitted: Dict[int, float] = {INTERACTIVE: 0.0, BULK: 0.0}
+        self._waiters: List[tuple] = []
+        self._sequence = itertools.count()
+        self._completions = deque()
+        self.rejected = 0
+
+    @property
+    def admitted_audio_s(self) -> float:
+        return sum(self._admitted.values())
+
+    def drain_rate(self) -> float:
+        """Audio seconds finished per wall-clock second over the recent window"""
+        now = self._clock()
+        while self._completions and now - self._completions[0][0] > self.rate_window_s:
+            self._completions.popleft()
+        if len(self._completions) < 2:
+            return self.nominal_rate
+        span = max(now - self._completions[0][0], 1.0)
+        return max(sum(cost for _, cost in self._completions) / span, 1e-3)
+
+    def _fits(self, cost: float, priority: int) -> bool:
+        if self.admitted_audio_s + cost > self.capacity_audio_s:
+            # A request larger than the capacity may still run on an idle server
+            return self.admitted_audio_s == 0
+        if priority == BULK and self._admitted[BULK] + cost > self.bulk_limit_audio_s:
+            return self._admitted[BULK] == 0
+        return True
+
+    def _waiting_ahead(self, priority: int) -> bool:
+        return any(w.priority <= priority and not w.future.done() for _, _, w in self._waiters)
+
+    def _audio_ahead(self, priority: int) -> float:
+        """Audio that must drain before a new request at ``priority`` can start"""
+        queued = sum(
+            w.cost for _, _, w in self._waiters if w.priority <= priority and not w.future.done()
+        )
+        return self.admitted_audio_s + queued
+
+    def estimate_wait_s(self, cost: float, priority: int = INTERACTIVE) -> float:
+        """Expected queueing delay before a request of ``cost`` audio seconds starts"""
+        limit = self.capacity_audio_s if priority == INTERACTIVE else self.bulk_limit_audio_s
+        excess = self._audio_ahead(priority) + cost - limit
+        return max(0.0, excess) / self.drain_rate()
+
+    def _reject(self, status_code: int, reason: str, detail: str, priority: int, retry_after_s: float):
+        self.rejected += 1
+        ADMISSION_REJECTIONS.inc(priority=PRIORITY_NAMES[priority], reason=reason)
+        raise AdmissionRejected(status_code, detail, retry_after_s)
+
+    def _grant(self, cost: float, priority: int):
+        self._admitted[priority] += cost
+        ADMITTED_AUDIO_SECONDS.set(self._admitted[priority], priority=PRIORITY_NAMES[priority])
+
+    def _release(self, cost: float, priority: int):
+        self._admitted[priority] = max(0.0, self._admitted[priority] - cost)
+        ADMITTED_AUDIO_SECONDS.set(self._admitted[priority], priority=PRIORITY_NAMES[priority])
+        self._completions.append((self._clock(), cost))
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        # Strict priority order: the head blocks later waiters so big requests are not starved
+        while self._waiters:
+            _, _, waiter = self._waiters[0]
+            if waiter.future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._fits(waiter.cost, waiter.priority):
+                return
+            heapq.heappop(self._waiters)
+            self._grant(waiter.cost, waiter.priority)
+            waiter.future.set_result(None)
+
+    async def _acquire(
+        self,
+        cost: float,
+        priority: int,
+        deadline: Optional[float],
+        service_s: float
+    ):
+        if deadline is not None and service_s > deadline - self._clock():
+            self._reject(
+                503, "deadline",
+                f"Request needs about {service_s:.1f}s, more than its deadline allows",
+                priority, 0.0
+            )
+        if not self._waiting_ahead(priority) and self._fits(cost, priority):
+            self._grant(cost, priority)
+            return
+
+        wait_s = self.estimate_wait_s(cost, priority)
+        timeout = None
+        if deadline is not None:
+            remaining = deadline - self._clock()
+            if wait_s + service_s > remaining:
+                self._reject(
+                    503, "deadline",
+                    f"Request cannot finish within its deadline (about {wait_s + service_s:.1f}s needed)",
+                    priority, wait_s
+                )
+            timeout = remaining - service_s
+        if priority == INTERACTIVE:
+            if wait_s > self.max_queue_wait_s:
+                self._reject(
+                    429, "capacity",
+                    f"Server is at capacity (expected wait {wait_s:.1f}s)",
+                    priority, wait_s
+                )
+            timeout = self.max_queue_wait_s if timeout is None else min(timeout, self.max_queue_wait_s)
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(cost, priority, future)
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            # Unlike wait_for, wait never swallows a cancellation that lands after the grant
+            await asyncio.wait((future,), timeout=timeout)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(cost, priority)
+            else:
+                future.cancel()
+                self._wake_waiters()
+            raise
+        else:
+            # A grant in the same step as the timeout keeps the slot
+            if not future.done():
+                future.cancel()
+                self._wake_waiters()
+                self._reject(
+                    503, "queue_timeout", "Timed out waiting for capacity",
+                    priority, self.estimate_wait_s(cost, priority)
+                )
+        finally:
+            QUEUE_WAIT_SECONDS.observe(time.perf_counter() - waiter.enqueued_at, queue="admission")
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        audio_seconds: float,
+        priority: int = INTERACTIVE,
+        deadline_s: Optional[float] = None,
+        service_s: float = 0.0
+    ):
+        """Hold ``audio_seconds`` of capacity for the duration of the block.
+
+        ``deadline_s`` is the time budget from now; ``service_s`` the
+        expected processing time once admitted. Raises ``AdmissionRejected``
+        when the request is shed.
+        """
+        cost = min(max(audio_seconds, 0.0), self.capacity_audio_s)
+        deadline = self._clock() + deadline_s if deadline_s is not None else None
+        await self._acquire(cost, priority, deadline, service_s)
+        try:
+            yield
+        finally:
+            self._release(cost, priority)
+
+    def report(self) -> dict:
+        return {
+            "capacity_audio_s": self.capacity_audio_s,
+            "bulk_limit_audio_s": self.bulk_limit_audio_s,
+            "admitted_audio_s": {PRIORITY_NAMES[p]: s for p, s in self._admitted.items()},
+            "waiting": {
+                PRIORITY_NAMES[p]: sum(
+                    1 for _, _, w in self._waiters if w.priority == p and not w.future.done()
+                )
+                for p in PRIORITY_NAMES
+            },
+            "drain_rate_audio_s_per_s": self.drain_rate(),
+            "rejected": self.rejected,
+        }
+
+
+# Process-wide controller shared by the ASR router and the job workers
+_controller: Optional[AdmissionController] = None
+
+def get_admission_controller() -> AdmissionController:
+    """Return the shared admission controller, creating it on first use"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            capacity_audio_s=settings.admission_capacity_audio_s,
+            bulk_share=settings.admission_bulk_share,
+            max_queue_wait_s=settings.admission_max_queue_wait_s,
+            nominal_rate=settings.admission_nominal_rate,
+        )
+    return _controller
@@ -0,0 +1,236 @@
+from typing import List, NamedTuple, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import torch
+
+NEG_INF = -float("inf")
+
+
+class TokenSpan(NamedTuple):
+    """An emitted CTC token and the frames ``[start, end)`` it was aligned to"""
+    token_id: int
+    start: int
+    end: int
+    log_prob: float  # summed over the span's frames
+
+    @property
+    def frames(self) -> int:
+        return self.end - self.start
+
+
+def log_softmax_(logits: "torch.Tensor", chunk_frames: int = 512) -> "torch.Tensor":
+    """Turn ``[frames, vocab]`` logits into log-probabilities in place.
+
+    Normalizing in blocks of frames keeps the temporaries of ``logsumexp``
+    small; the only full-size tensor is the caller's logits.
+    """
+    import torch
+
+    with torch.no_grad():
+        for start in range(0, logits.shape[0], chunk_frames):
+            block = logits[start:start + chunk_frames]
+            block.sub_(torch.logsumexp(block, dim=-1, keepdim=True))
+    return logits
+
+
+def best_path_spans(best_ids: Sequence[int], best_log_probs: Sequence[float], blank_id: int) -> List[TokenSpan]:
+    """Collapse the per-frame argmax path into token spans, dropping blanks"""
+    spans = []
+    previous = None
+    for frame, (token_id, log_prob) in enumerate(zip(best_ids, best_log_probs)):
+        if token_id == previous and token_id != blank_id:
+            span = spans[-1]
+            spans[-1] = TokenSpan(token_id, span.start, frame + 1, span.log_prob + log_prob)
+        elif token_id != blank_id:
+            spans.append(TokenSpan(token_id, frame, frame + 1, log_prob))
+        previous = token_id
+    return spans
+
+
+def _alignment_states(targets: List[int], blank_id: int):
+    """CTC states for ``targets`` (blank, token, blank, ..., blank) and which may skip a blank"""
+    labels = np.full(2 * len(targets) + 1, blank_id, dtype=np.int64)
+    labels[1::2] = targets
+    # A token may be reached by skipping the blank before it unless it repeats the previous token
+    can_skip = np.zeros(labels.shape[0], dtype=bool)
+    can_skip[3::2] = labels[3::2] != labels[1:-2:2]
+    return labels, can_skip
+
+
+def _viterbi(emissions: np.ndarray, can_skip: np.ndarray, moves: Optional[np.ndarray] = None) -> np.ndarray:
+    """Best-path scores of every state after the last frame.
+
+    Only one column of scores is kept; the backpointers are written to
+    ``moves`` when it is given.
+    """
+    num_states = emissions.shape[1]
+    scores = np.full(num_states, NEG_INF)
+    scores[0] = emissions[0, 0]
+    scores[1] = emissions[0, 1]
+    for t in range(1, emissions.shape[0]):
+        step = np.full(num_states, NEG_INF)
+        step[1:] = scores[:-1]
+        skip = np.full(num_states, NEG_INF)
+        skip[2:] = np.where(can_skip[2:], scores[:-2], NEG_INF)
+        candidates = np.stack([scores, step, skip])
+        if moves is not None:
+            moves[t] = candidates.argmax(axis=0)
+        scores = candidates.max(axis=0) + emissions[t]
+    return scores
+
+
+def _fits(num_frames: int, targets: List[int]) -> bool:
+    # Repeated tokens need a blank frame between them
+    repeats = sum(1 for a, b in zip(targets, targets[1:]) if a == b)
+    return len(targets) + repeats <= num_frames
+
+
+def forced_align(log_probs: np.ndarray, targets: Sequence[int], blank_id: int) -> Optional[List[TokenSpan]]:
+    """Viterbi CTC alignment of a known token sequence, e.g. a beam search result.
+
+    Returns one span per target token, or None if the sequence cannot fit
+    in the available frames. The backpointers take ``frames * (2 * tokens + 1)``
+    bytes, so long inputs should be aligned in pieces (see ``split_at_pauses``).
+    """
+    num_frames = log_probs.shape[0]
+    targets = list(targets)
+    if not targets:
+        return []
+    if not _fits(num_frames, targets):
+        return None
+
+    labels, can_skip = _alignment_states(targets, blank_id)
+    num_states = labels.shape[0]
+    emissions = log_probs[:, labels]
+    moves = np.zeros((num_frames, num_states), dtype=np.int8)
+    scores = _viterbi(emissions, can_skip, moves)
+
+    state = num_states - 1 if scores[-1] >= scores[-2] else num_states - 2
+    if not np.isfinite(scores[state]):
+        return None
+    path = np.empty(num_frames, dtype=np.int64)
+    for t in range(num_frames - 1, -1, -1):
+        path[t] = state
+        state -= int(moves[t, state])
+
+    spans: List[Optional[TokenSpan]] = [None] * len(targets)
+    for t, state in enumerate(path):
+        if state % 2 == 0:
+            continue
+        index = state // 2
+        log_prob = float(emissions[t, state])
+        span = spans[index]
+        if span is None:
+            spans[index] = TokenSpan(targets[index], t, t + 1, log_prob)
+        else:
+            spans[index] = TokenSpan(span.token_id, span.start, t + 1, span.log_prob + log_prob)
+    return spans
+
+
+def viterbi_log_prob(log_probs: np.ndarray, targets: Sequence[int], blank_id: int) -> Optional[float]:
+    """Log-probability of the alignment ``forced_align`` would return, without building it.
+
+    Keeps no backpointers, so memory does not grow with the input length.
+    Returns None if the sequence cannot fit in the available frames.
+    """
+    targets = list(targets)
+    if not targets:
+        return float(log_probs[:, blank_id].sum())
+    if not _fits(log_probs.shape[0], targets):
+        return None
+    labels, can_skip = _alignment_states(targets, blank_id)
+    scores = _viterbi(log_probs[:, labels], can_skip)
+    best = float(max(scores[-1], scores[-2]))
+    return best if np.isfinite(best) else None
+
+
+def split_at_pauses(
+    best_ids: Sequence[int],
+    pause_ids: Sequence[int],
+    min_pause_frames: int,
+    max_frames: int
+) -> List[Tuple[int, int]]:
+    """Cut frames into ``[start, end)`` pieces of at most ``max_frames`` where possible.
+
+    Cuts go in the middle of runs of at least ``min_pause_frames`` frames
+    whose best token is in ``pause_ids`` (blank or word delimiter), so no
+    word is split. A piece with no pause to cut at may exceed the limit.
+    """
+    pause = set(pause_ids)
+    num_frames = len(best_ids)
+    cuts = []
+    run_start = None
+    for frame, token_id in enumerate(best_ids):
+        if token_id in pause:
+            if run_start is None:
+                run_start = frame
+        else:
+            if run_start is not None and run_start > 0 and frame - run_start >= min_pause_frames:
+                cuts.append((run_start + frame) // 2)
+            run_start = None
+
+    pieces = []
+    start = 0
+    index = 0
+    while num_frames - start > max_frames:
+        # Furthest cut that keeps the piece within the limit, else the nearest one past it
+        best = None
+        while index < len(cuts) and cuts[index] - start <= max_frames:
+            if cuts[index] > start:
+                best = cuts[index]
+            index += 1
+        if best is None:
+            if index == len(cuts):
+                break
+            best = cuts[index]
+            index += 1
+        pieces.append((start, best))
+        start = best
+    pieces.append((start, num_frames))
+    return pieces
+
+
+def path_log_prob(log_probs: np.ndarray, spans: List[TokenSpan], blank_id: int) -> float:
+    """Summed log-probability of an alignment, blank frames included"""
+    total = float(log_probs[:, blank_id].sum())
+    for span in spans:
+        total += span.log_prob - float(log_probs[span.start:span.end, blank_id].sum())
+    return total
+
+
+def group_words(
+    spans: List[TokenSpan],
+    vocab: Sequence[str],
+    word_delimiter_id: int,
+    skip_ids: Sequence[int] = ()
+) -> List[dict]:
+    """Merge token spans between word delimiters into words.
+
+    Each word carries its first and last frame, the summed log-probability
+    and frame count of its tokens, and the per-token spans.
+    """
+    skip = set(skip_ids)
+    words = []
+    current: List[TokenSpan] = []
+
+    def flush():
+        if current:
+            words.append({
+                "word": "".join(vocab[span.token_id] for span in current),
+                "start_frame": current[0].start,
+                "end_frame": current[-1].end,
+                "log_prob": sum(span.log_prob for span in current),
+                "frames": sum(span.frames for span in current),
+                "tokens": list(current),
+            })
+            current.clear()
+
+    for span in spans:
+        if span.token_id == word_delimiter_id:
+            flush()
+        elif span.token_id not in skip:
+            current.append(span)
+    flush()
+    return words
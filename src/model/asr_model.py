@@ -1,102 +1,708 @@
-import torch
-import torchaudio
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
 import numpy as np
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional, TYPE_CHECKING
+import asyncio
+import difflib
 import logging
+import os
+import time
+from functools import partial
+
+from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.src.model.batching import BatchScheduler
+from kinyvoice_ai.src.model.executor import InferenceExecutor
+from kinyvoice_ai.src.utils.audio_processing import detect_speech_segments
+from kinyvoice_ai.src.utils.resampling import resample
+from kinyvoice_ai.src.utils.telemetry import STAGE_SECONDS, MODEL_MEMORY_BYTES, record_error
+from kinyvoice_ai.src.utils.profiling import current_profile, profiled
+from kinyvoice_ai.src.model.streaming import StreamingSession
+from kinyvoice_ai.src.model.decoding import DecoderFactory
+from kinyvoice_ai.src.model.alignment import (
+    log_softmax_, best_path_spans, forced_align, path_log_prob, viterbi_log_prob, split_at_pauses,
+    group_words, TokenSpan
+)
+from kinyvoice_ai.src.utils.temperature_scaling import calibrate, load_temperature
+from kinyvoice_ai.src.model.cache import TranscriptionCache, DiskCacheStore, audio_fingerprint
+from kinyvoice_ai.src.model.longform import (
+    plan_windows, iter_window_batches, trim_window_logits, stitch_logits
+)
+
+if TYPE_CHECKING:
+    # torch is imported where tensors are made, so importing the API stays cheap
+    import torch
 
 logger = logging.getLogger(__name__)
+settings = Settings()
+
+def _map_word_ranges(piece_lengths: List[int], path_words: List[str], text_words: List[str]) -> List[Tuple[int, int]]:
+    """Split ``text_words`` into ranges matching consecutive pieces of ``path_words``.
+    
+    ``piece_lengths`` are the word counts of the pieces. Words are matched
+    with a diff, so words the text inserted or replaced stay next to their
+    neighbours in the best path.
+    """
+    opcodes = difflib.SequenceMatcher(None, path_words, text_words, autojunk=False).get_opcodes()
+    
+    def text_index(index: int) -> int:
+        for tag, i1, i2, j1, j2 in opcodes:
+            if index <= i2:
+                return j1 + (index - i1) if tag == "equal" else (j1 if index == i1 else j2)
+        return len(text_words)
+    
+    bounds = [0]
+    for length in piece_lengths[:-1]:
+        bounds.append(bounds[-1] + length)
+    starts = [0] + [text_index(bound) for bound in bounds[1:]]
+    return list(zip(starts, starts[1:] + [len(text_words)]))
+
+def _record_stage(timings: Optional[dict], stage: str, started: float):
+    """Add the seconds since ``started`` to ``timings[stage]``, if timings are collected"""
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
 
 class ASRModel:
     """Kinyarwanda ASR model using Wav2Vec2"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        precision: Optional[str] = None,
+        compile_mode: Optional[str] = None,
+        batching: Optional[bool] = None
+    ):
         self.model = None
         self.processor = None
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.forward_module = None
+        self.decoders: Optional[DecoderFactory] = None
+        self.model_name = settings.model_name
+        self.precision = precision or settings.model_precision
+        self.compile_mode = compile_mode or settings.model_compile
+        self.batching = settings.batching_enabled if batching is None else batching
+        # Picked when the weights are loaded, the first time torch is needed
+        self.device: Optional["torch.device"] = None
         self.sample_rate = 16000  # Wav2Vec2 expects 16kHz audio
+        # Seconds of audio per output frame, from the feature encoder's total stride
+        self.frame_seconds = 320 / self.sample_rate
+        self.temperature = settings.confidence_temperature
+        self.scheduler: Optional[BatchScheduler] = None
+        self.cache: Optional[TranscriptionCache] = None
+        if settings.cache_enabled:
+            self.cache = TranscriptionCache(
+                max_entries=settings.cache_max_entries,
+                ttl_s=settings.cache_ttl_s,
+                disk_store=(
+                    DiskCacheStore(
+                        settings.cache_disk_dir,
+                        settings.cache_disk_ttl_s,
+                        max_bytes=settings.cache_disk_max_bytes,
+                        max_entries=settings.cache_disk_max_entries,
+                        sweep_interval_s=settings.cache_disk_sweep_interval_s,
+                    )
+                    if settings.cache_disk_dir else None
+                ),
+            )
+        self.executor = InferenceExecutor(
+            max_workers=settings.inference_workers,
+            intra_op_threads=settings.torch_intra_op_threads,
+        )
     
     async def load_model(self):
         """Load the ASR model and processor"""
         try:
-            # Load model and processor
-            model_name = "facebook/wav2vec2-large-xlsr-53"  # Base model, to be fine-tuned
-            self.processor = Wav2Vec2Processor.from_pretrained(model_name)
-            self.model = Wav2Vec2ForCTC.from_pretrained(model_name)
+            # Reading weights and tracing block for seconds; keep the event loop serving
+            processor, model, forward_module = await asyncio.to_thread(self._load_components)
+            self.processor = processor
+            self.decoders = DecoderFactory(self.processor, settings)
+            self.model = model
+            self.forward_module = forward_module
+            config = getattr(model, "config", None)
+            self.frame_seconds = getattr(config, "inputs_to_logits_ratio", 320) / self.sample_rate
+            self.temperature = load_temperature(
+                settings.confidence_calibration_path, settings.confidence_temperature
+            )
+            tokenizer = processor.tokenizer
+            self._vocab = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+            self._word_delimiter_id = tokenizer.convert_tokens_to_ids(tokenizer.word_delimiter_token)
+            self._special_ids = set(tokenizer.all_special_ids) - {tokenizer.pad_token_id}
             
-            # Move model to appropriate device
-            self.model = self.model.to(self.device)
-            self.model.eval()
+            self.executor.start()
+            self._export_memory_gauges()
+            if self.batching:
+                self.scheduler = BatchScheduler(
+                    self._run_forward_logits,
+                    max_batch_size=settings.batch_max_size,
+                    max_wait_ms=settings.batch_max_wait_ms,
+                    max_length_ratio=settings.batch_max_length_ratio,
+                    max_concurrent_batches=settings.inference_workers,
+                )
+                await self.scheduler.start()
             
-            logger.info(f"ASR model loaded successfully on {self.device}")
+            logger.info(
+                f"ASR model loaded successfully on {self.device} "
+                f"(precision={self.precision}, compile={self.compile_mode})"
+            )
         except Exception as e:
             logger.error(f"Error loading ASR model: {e}")
+            record_error("model_load", e)
             raise
     
+    def _load_components(self):
+        """Processor, model on its device and the compiled forward, loaded off the event loop"""
+        # torch and transformers take seconds to import, so only pay for them here
+        import torch
+        from transformers import Wav2Vec2Processor
+        from kinyvoice_ai.src.model.optimization import compile_forward, snapshot_path, has_snapshot
+        
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if self.precision == "int8":
+            # Dynamically quantized kernels only exist for CPU
+            self.device = torch.device("cpu")
+        
+        snapshot = snapshot_path(settings.model_snapshot_dir, self.model_name)
+        if has_snapshot(snapshot):
+            processor = Wav2Vec2Processor.from_pretrained(snapshot, local_files_only=True)
+        else:
+            processor = Wav2Vec2Processor.from_pretrained(self.model_name)
+        
+        model = self._load_weights(processor).to(self.device)
+        model.eval()
+        forward_module = compile_forward(
+            model,
+            self.compile_mode,
+            use_attention_mask=processor.feature_extractor.return_attention_mask,
+        )
+        return processor, model, forward_module
+    
+    def _load_fp32(self, processor) -> "torch.nn.Module":
+        """fp32 weights from the local snapshot, downloading and snapshotting them once"""
+        from kinyvoice_ai.src.model.optimization import (
+            snapshot_path, has_snapshot, save_snapshot, load_snapshot
+        )
+        
+        path = snapshot_path(settings.model_snapshot_dir, self.model_name)
+        if has_snapshot(path):
+            logger.info(f"Loading model snapshot from {path}")
+            return load_snapshot(path)
+        
+        from transformers import Wav2Vec2ForCTC
+        
+        logger.info(f"No snapshot at {path}, loading {self.model_name} from the Hub")
+        model = Wav2Vec2ForCTC.from_pretrained(self.model_name)
+        if settings.model_save_snapshot:
+            save_snapshot(model, processor, path)
+        return model
+    
+    def _load_weights(self, processor) -> "torch.nn.Module":
+        """Load the model at the configured precision, preferring a saved artifact"""
+        from kinyvoice_ai.src.model.optimization import (
+            artifact_path, optimize_model, save_optimized, load_optimized
+        )
+        
+        if self.precision == "fp32":
+            return self._load_fp32(processor)
+        
+        path = artifact_path(settings.model_artifact_dir, self.model_name, self.precision)
+        if os.path.exists(path):
+            logger.info(f"Loading {self.precision} model artifact from {path}")
+            return load_optimized(path)
+        
+        logger.info(f"No {self.precision} artifact at {path}, converting from fp32")
+        model = optimize_model(self._load_fp32(processor).eval(), self.precision)
+        if settings.model_save_artifact:
+            save_optimized(model, path)
+        return model
+    
+    @property
+    def model_version(self) -> str:
+        """Identifies the weights and precision that produced a result"""
+        return f"{self.model_name}@{self.precision}"
+    
+    def _memory_bytes(self, kind: str) -> float:
+        """Bytes held by the model's parameters, or allocated on the GPU"""
+        if self.model is None:
+            return 0.0
+        if kind == "cuda_allocated":
+            import torch
+            return float(torch.cuda.memory_allocated()) if torch.cuda.is_available() else 0.0
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return float(sum(t.numel() * t.element_size() for t in tensors))
+    
+    def _export_memory_gauges(self):
+        # Evaluated at scrape time, so the gauges follow load and unload
+        for kind in ("parameters", "cuda_allocated"):
+            MODEL_MEMORY_BYTES.set_function(partial(self._memory_bytes, kind), kind=kind)
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
         return self.model is not None and self.processor is not None
     
+    async def warm_up(self, lengths_s: List[float]):
+        """Run forward passes and decoding for common input lengths on every worker.
+        
+        The first calls at a new shape pay for kernel selection, allocator
+        growth and compilation; doing them here keeps that off real requests.
+        Uses low-level noise rather than silence so normalization is exercised.
+        """
+        if not self.is_loaded():
+            raise RuntimeError("Model not loaded")
+        
+        import torch
+        generator = torch.Generator().manual_seed(0)
+        for seconds in lengths_s:
+            started = time.perf_counter()
+            waveform = torch.randn(int(seconds * self.sample_rate), generator=generator) * 0.01
+            outputs = await asyncio.gather(*(
+                self._run_forward_logits([waveform]) for _ in range(self.executor.max_workers)
+            ))
+            await asyncio.gather(*(
+                self.executor.run(self._postprocess, logits[0]) for logits in outputs
+            ))
+            logger.info(f"Warmed up {seconds:g}s inputs in {time.perf_counter() - started:.2f}s")
+    
     async def unload_model(self):
         """Unload the model to free memory"""
+        if self.scheduler is not None:
+            await self.scheduler.stop()
+            self.scheduler = None
+        self.executor.shutdown()
+        self.forward_module = None
+        self.decoders = None
         self.model = None
         self.processor = None
-        torch.cuda.empty_cache()
+        if self.device is not None and self.device.type == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+    
+    def _prepare_waveform(self, audio: np.ndarray, sample_rate: int) -> "torch.Tensor":
+        """Turn a decoded float32 buffer into a mono 16kHz 1-D tensor"""
+        if sample_rate == self.sample_rate:
+            # Mono 16kHz input is returned as a view of the decoded buffer
+            return resample(audio, sample_rate, self.sample_rate)
+        
+        # Downmix and resample in one pass with a cached polyphase kernel
+        with STAGE_SECONDS.time(stage="resample"), profiled("resample"):
+            return resample(audio, sample_rate, self.sample_rate)
+    
+    def _collate(self, waveforms: List["torch.Tensor"]) -> Tuple["torch.Tensor", "torch.Tensor"]:
+        """Normalize and pad waveforms straight into a single batch tensor"""
+        import torch
+        
+        feature_extractor = self.processor.feature_extractor
+        lengths = [int(waveform.shape[-1]) for waveform in waveforms]
+        input_values = torch.full(
+            (len(waveforms), max(lengths)), float(feature_extractor.padding_value), dtype=torch.float32
+        )
+        attention_mask = torch.zeros((len(waveforms), max(lengths)), dtype=torch.long)
+        
+        for i, (waveform, length) in enumerate(zip(waveforms, lengths)):
+            row = input_values[i, :length]
+            row.copy_(waveform)
+            if feature_extractor.do_normalize:
+                # Same zero-mean unit-variance normalization as Wav2Vec2FeatureExtractor
+                row.sub_(row.mean()).div_(torch.sqrt(row.var(unbiased=False) + 1e-7))
+            attention_mask[i, :length] = 1
+        
+        return input_values, attention_mask
     
-    async def transcribe(self, audio_file) -> Tuple[str, float]:
-        """Transcribe audio file to text"""
+    def _forward_logits(self, waveforms: List["torch.Tensor"]) -> List["torch.Tensor"]:
+        """Run a single padded forward pass, returning unpadded ``[frames, vocab]`` logits"""
+        import torch
+        
+        with profiled("feature_extraction"):
+            input_values, attention_mask = self._collate(waveforms)
+        
+        # Models trained without attention masks expect zero padding and no mask
+        model_args = (input_values.to(self.device, dtype=self.model.dtype),)
+        if self.processor.feature_extractor.return_attention_mask:
+            model_args += (attention_mask.to(self.device),)
+        
+        with torch.no_grad(), STAGE_SECONDS.time(stage="forward"), profiled("forward"):
+            # Post-processing always runs in fp32, whatever the model precision
+            logits = self.forward_module(*model_args).float()
+            
+            # Ignore frames that only cover padding
+            output_lengths = self.model._get_feat_extract_output_lengths(attention_mask.sum(dim=-1))
+        
+        return [
+            logits[i, :max(1, min(int(length), logits.shape[1]))]
+            for i, length in enumerate(output_lengths.tolist())
+        ]
+    
+    def _postprocess(
+        self,
+        logits: "torch.Tensor",
+        decoder: Optional[str] = None,
+        domain: Optional[str] = None,
+        word_timestamps: bool = False
+    ) -> Tuple[str, float, List[dict]]:
+        """Decode ``[frames, vocab]`` logits into text, a calibrated confidence and timed words.
+        
+        The logits are turned into log-probabilities in place, once; the
+        decoder, the CTC alignment and every confidence read that tensor.
+        Confidences are ``exp(mean log-probability / temperature)`` over
+        the frames of the utterance, word or token. Words are only built
+        with ``word_timestamps``; otherwise the list is empty.
+        """
+        import torch
+        
+        with torch.no_grad(), STAGE_SECONDS.time(stage="confidence"), profiled("confidence"):
+            log_probs = log_softmax_(logits)
+            best_log_probs, best_ids = log_probs.max(dim=-1)
+        
+        with STAGE_SECONDS.time(stage="decode_text"), profiled("decode_text"):
+            text = self.decoders.get(decoder, domain).decode(log_probs, best_ids)
+        
+        with STAGE_SECONDS.time(stage="confidence"), profiled("confidence"):
+            total_log_prob, pieces = self._align(
+                text, log_probs, best_ids, best_log_probs, decoder, word_timestamps
+            )
+            confidence = calibrate(total_log_prob / max(1, int(log_probs.shape[0])), self.temperature)
+            words = [word for spans in pieces for word in self._timed_words(spans)]
+        
+        return text, confidence, words
+    
+    def _align(
+        self,
+        text: str,
+        log_probs: "torch.Tensor",
+        best_ids: "torch.Tensor",
+        best_log_probs: "torch.Tensor",
+        decoder: Optional[str],
+        with_spans: bool
+    ) -> Tuple[float, List[List[TokenSpan]]]:
+        """Log-probability of the decoded text's best alignment and, ``with_spans``, its token spans.
+        
+        Greedy text is the collapse of the best path, which is therefore its
+        alignment. Beam search text is aligned to the frames in pieces cut at
+        pauses, so the Viterbi backpointers stay bounded; pieces whose words
+        match the best path reuse it, and without spans only scores are kept.
+        """
+        blank_id = self.processor.tokenizer.pad_token_id
+        ids, id_log_probs = best_ids.tolist(), best_log_probs.tolist()
+        if (decoder or settings.decoder) == "greedy":
+            spans = [best_path_spans(ids, id_log_probs, blank_id)] if with_spans else []
+            return float(best_log_probs.sum()), spans
+        
+        frames = None
+        pieces = split_at_pauses(
+            ids, (blank_id, self._word_delimiter_id),
+            settings.alignment_pause_frames, settings.alignment_max_frames
+        )
+        piece_paths = [best_path_spans(ids[start:end], id_log_probs[start:end], blank_id) for start, end in pieces]
+        piece_words = [
+            [word["word"] for word in group_words(path, self._vocab, self._word_delimiter_id, self._special_ids)]
+            for path in piece_paths
+        ]
+        beam_words = text.split()
+        path_words = [word for words in piece_words for word in words]
+        word_ranges = _map_word_ranges([len(words) for words in piece_words], path_words, beam_words)
+        
+        total_log_prob = 0.0
+        spans: List[List[TokenSpan]] = []
+        for (start, end), path, words, (first, last) in zip(pieces, piece_paths, piece_words, word_ranges):
+            piece_spans = path
+            piece_log_prob = sum(id_log_probs[start:end])
+            if beam_words[first:last] != words:
+                # Beam search may differ from the best path; align its text to the frames
+                if frames is None:
+                    frames = log_probs.cpu().numpy()
+                targets = self._piece_targets(beam_words[first:last], path)
+                if with_spans:
+                    aligned = forced_align(frames[start:end], targets, blank_id)
+                    if aligned is not None:
+                        piece_spans = aligned
+                        piece_log_prob = path_log_prob(frames[start:end], aligned, blank_id)
+                else:
+                    score = viterbi_log_prob(frames[start:end], targets, blank_id)
+                    if score is not None:
+                        piece_log_prob = score
+            total_log_prob += piece_log_prob
+            if with_spans:
+                spans.append([span._replace(start=span.start + start, end=span.end + start) for span in piece_spans])
+        return total_log_prob, spans
+    
+    def _piece_targets(self, words: List[str], path: List[TokenSpan]) -> List[int]:
+        """Token ids of a piece's words, with the delimiters its best path has at the edges"""
+        targets = self.processor.tokenizer(" ".join(words)).input_ids if words else []
+        delimiter = self._word_delimiter_id
+        # The whole-text alignment would place a delimiter in the pause either side of a cut
+        if path and path[0].token_id == delimiter:
+            targets = [delimiter] + targets
+        if len(path) > 1 and path[-1].token_id == delimiter:
+            targets = targets + [delimiter]
+        return targets
+    
+    def _timed_words(self, spans: List[TokenSpan]) -> List[dict]:
+        """Words with times in seconds and calibrated word and token confidences"""
+        words = []
+        for word in group_words(spans, self._vocab, self._word_delimiter_id, self._special_ids):
+            mean_log_prob = word["log_prob"] / word["frames"]
+            words.append({
+                "word": word["word"],
+                "start": word["start_frame"] * self.frame_seconds,
+                "end": word["end_frame"] * self.frame_seconds,
+                "confidence": calibrate(mean_log_prob, self.temperature),
+                # Uncalibrated, so stored results can refit the temperature
+                "log_prob": mean_log_prob,
+                "token_confidences": [
+                    calibrate(token.log_prob / token.frames, self.temperature) for token in word["tokens"]
+                ],
+            })
+        return words
+    
+    def _detect_speech(self, waveform: "torch.Tensor") -> List[Tuple[int, int]]:
+        """Speech regions of a prepared waveform as sample index spans"""
+        with STAGE_SECONDS.time(stage="vad"), profiled("vad"):
+            return detect_speech_segments(
+                waveform.numpy(),
+                self.sample_rate,
+                threshold_db=settings.vad_threshold_db,
+                noise_ceiling_db=settings.vad_noise_ceiling_db,
+                min_speech_ms=settings.vad_min_speech_ms,
+                min_silence_ms=settings.vad_min_silence_ms,
+                padding_ms=settings.vad_padding_ms,
+            )
+    
+    def _forward_long(self, waveform: "torch.Tensor") -> "torch.Tensor":
+        """Transcribe a long waveform as batches of overlapping windows"""
+        windows = plan_windows(
+            int(waveform.shape[-1]),
+            chunk_samples=int(settings.long_form_chunk_s * self.sample_rate),
+            stride_samples=int(settings.long_form_stride_s * self.sample_rate),
+        )
+        
+        # Only long_form_batch_size windows are in the model at once
+        pieces = []
+        for batch in iter_window_batches(windows, settings.long_form_batch_size):
+            window_logits = self._forward_logits([waveform[w.start:w.end] for w in batch])
+            pieces.extend(
+                trim_window_logits(logits, window)
+                for logits, window in zip(window_logits, batch)
+            )
+        
+        # Stitched logits are decoded once so CTC collapsing spans window edges
+        return stitch_logits(pieces)
+    
+    def _is_long_form(self, waveform: "torch.Tensor", long_form: Optional[bool]) -> bool:
+        if long_form is not None:
+            return long_form
+        return waveform.shape[-1] > settings.long_form_threshold_s * self.sample_rate
+    
+    async def _run_forward_logits(self, waveforms: List["torch.Tensor"]) -> List["torch.Tensor"]:
+        """Run a padded forward pass on the inference executor"""
+        return await self.executor.run(self._forward_logits, waveforms)
+    
+    async def _transcribe_waveform(
+        self,
+        waveform: "torch.Tensor",
+        long_form: Optional[bool] = None,
+        decoder: Optional[str] = None,
+        domain: Optional[str] = None,
+        timings: Optional[dict] = None,
+        word_timestamps: bool = False
+    ) -> Tuple[str, float, List[dict]]:
+        """Transcribe a prepared mono 16kHz waveform into text, confidence and timed words"""
+        started = time.perf_counter()
+        if self._is_long_form(waveform, long_form):
+            logits = await self.executor.run(self._forward_long, waveform)
+        elif self.scheduler is not None and current_profile() is None:
+            # Coalesce with concurrent requests when the scheduler is running;
+            # profiled requests run alone so their operators are their own
+            logits = await self.scheduler.submit(waveform)
+        else:
+            logits = (await self._run_forward_logits([waveform]))[0]
+        _record_stage(timings, "forward_time", started)
+        
+        # Decoding is per request, so each caller may pick its own decoder
+        started = time.perf_counter()
+        result = await self.executor.run(self._postprocess, logits, decoder, domain, word_timestamps)
+        _record_stage(timings, "decode_text_time", started)
+        return result
+    
+    async def _cache_key(self, audio: np.ndarray, sample_rate: int, **options) -> str:
+        """Fingerprint the PCM and result-affecting options on a worker thread"""
+        options.setdefault("decoder", None)
+        options["decoder"] = options["decoder"] or settings.decoder
+        return await self.executor.run(
+            audio_fingerprint, audio, sample_rate, model=self.model_version,
+            temperature=self.temperature, **options
+        )
+    
+    async def transcribe(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        long_form: Optional[bool] = None,
+        decoder: Optional[str] = None,
+        domain: Optional[str] = None,
+        timings: Optional[dict] = None,
+        words: Optional[list] = None
+    ) -> Tuple[str, float]:
+        """Transcribe a decoded float32 audio buffer to text.
+        
+        Recordings longer than ``long_form_threshold_s`` (or any recording when
+        ``long_form`` is True) are transcribed in overlapping windows. ``decoder``
+        picks greedy or beam search decoding and ``domain`` selects the hotword
+        list used by beam search. If a ``timings`` dict is passed, the seconds
+        spent resampling, in the forward pass and decoding text are added to it
+        under ``resample_time``, ``forward_time`` and ``decode_text_time``.
+        If a ``words`` list is passed, it is extended with the CTC-aligned
+        words, their start/end seconds and calibrated confidences.
+        """
         if not self.is_loaded():
             raise RuntimeError("Model not loaded")
         
         try:
-            # Load and preprocess audio
-            waveform, sample_rate = torchaudio.load(audio_file)
-            
-            # Resample if necessary
-            if sample_rate != self.sample_rate:
-                resampler = torchaudio.transforms.Resample(sample_rate, self.sample_rate)
-                waveform = resampler(waveform)
-            
-            # Convert to mono if stereo
-            if waveform.shape[0] > 1:
-                waveform = torch.mean(waveform, dim=0, keepdim=True)
-            
-            # Prepare input
-            input_values = self.processor(
-                waveform.squeeze().numpy(),
-                sampling_rate=self.sample_rate,
-                return_tensors="pt"
-            ).input_values.to(self.device)
+            key = None
+            if self.cache is not None:
+                key = await self._cache_key(
+                    audio, sample_rate, mode="full", long_form=long_form, decoder=decoder, domain=domain
+                )
+                cached = await self.cache.get(key)
+                # Entries cached without word timings lack them
+                if cached is not None and (words is None or len(cached) > 2):
+                    if words is not None:
+                        words.extend(cached[2])
+                    return cached[0], cached[1]
             
-            # Perform inference
-            with torch.no_grad():
-                logits = self.model(input_values).logits
-                predicted_ids = torch.argmax(logits, dim=-1)
-                transcription = self.processor.batch_decode(predicted_ids)
-                
-                # Calculate confidence score
-                probs = torch.nn.functional.softmax(logits, dim=-1)
-                confidence = torch.mean(probs.max(dim=-1)[0]).item()
+            # Resampling blocks, so keep it off the event loop too
+            started = time.perf_counter()
+            waveform = await self.executor.run(self._prepare_waveform, audio, sample_rate)
+            _record_stage(timings, "resample_time", started)
+            text, confidence, aligned = await self._transcribe_waveform(
+                waveform, long_form, decoder, domain, timings, word_timestamps=words is not None
+            )
+            if words is not None:
+                words.extend(aligned)
             
-            return transcription[0], confidence
+            if key is not None:
+                # Words are only kept when they were computed
+                await self.cache.set(key, [text, confidence] if words is None else [text, confidence, aligned])
+            return text, confidence
             
         except Exception as e:
             logger.error(f"Error during transcription: {e}")
+            record_error("transcribe", e)
             raise
     
-    async def batch_transcribe(self, audio_files) -> list:
-        """Transcribe multiple audio files"""
+    async def transcribe_segments(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        decoder: Optional[str] = None,
+        domain: Optional[str] = None,
+        timings: Optional[dict] = None,
+        word_timestamps: bool = False
+    ) -> dict:
+        """Transcribe only the speech regions of a decoded audio buffer.
+        
+        Silence is detected with an energy VAD, the speech segments are
+        submitted together so the scheduler can batch them, and the segment
+        transcripts are joined in order. Returns the transcript, a duration
+        weighted confidence, per-segment timestamps, the seconds of audio
+        that were skipped and, with ``word_timestamps``, timed words. Stage
+        timings are collected as in ``transcribe``, summed over segments.
+        """
+        if not self.is_loaded():
+            raise RuntimeError("Model not loaded")
+        
+        key = None
+        if self.cache is not None:
+            key = await self._cache_key(audio, sample_rate, mode="vad", decoder=decoder, domain=domain)
+            cached = await self.cache.get(key)
+            if cached is not None and (not word_timestamps or "words" in cached):
+                return cached
+        
+        try:
+            started = time.perf_counter()
+            waveform = await self.executor.run(self._prepare_waveform, audio, sample_rate)
+            _record_stage(timings, "resample_time", started)
+            spans = await self.executor.run(self._detect_speech, waveform)
+            
+            outcomes = await asyncio.gather(
+                *(
+                    self._transcribe_waveform(
+                        waveform[start:end], decoder=decoder, domain=domain, timings=timings,
+                        word_timestamps=word_timestamps
+                    )
+                    for start, end in spans
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error during segmented transcription: {e}")
+            record_error("transcribe", e)
+            raise
+        
+        segments = []
+        words = []
+        for (start, end), (text, confidence, segment_words) in zip(spans, outcomes):
+            # Word times are relative to their segment
+            offset_s = start / self.sample_rate
+            words.extend(
+                {**word, "start": word["start"] + offset_s, "end": word["end"] + offset_s}
+                for word in segment_words
+            )
+            segments.append({
+                "start": start / self.sample_rate,
+                "end": end / self.sample_rate,
+                "text": text,
+                "confidence": confidence
+            })
+        
+        total_seconds = waveform.shape[-1] / self.sample_rate
+        speech_seconds = sum(segment["end"] - segment["start"] for segment in segments)
+        confidence = (
+            sum(s["confidence"] * (s["end"] - s["start"]) for s in segments) / speech_seconds
+            if speech_seconds > 0 else 0.0
+        )
+        
+        result = {
+            "text": " ".join(s["text"] for s in segments if s["text"]),
+            "confidence": confidence,
+            "segments": segments,
+            "audio_seconds": total_seconds,
+            "speech_seconds": speech_seconds,
+            "compute_saved_seconds": total_seconds - speech_seconds
+        }
+        if word_timestamps:
+            result["words"] = words
+        if key is not None:
+            await self.cache.set(key, result)
+        return result
+    
+    def create_stream(self, sample_rate: int, admission=None) -> StreamingSession:
+        """Start an incremental transcription session for live audio.
+        
+        With an ``AdmissionController``, each model pass of the session is
+        admitted as interactive work for the audio in its window.
+        """
+        if not self.is_loaded():
+            raise RuntimeError("Model not loaded")
+        return StreamingSession(
+            self,
+            sample_rate,
+            chunk_s=settings.stream_chunk_s,
+            left_context_s=settings.stream_left_context_s,
+            right_context_s=settings.stream_right_context_s,
+            admission=admission,
+        )
+    
+    async def batch_transcribe(self, buffers: List[Tuple[np.ndarray, int]]) -> list:
+        """Transcribe multiple decoded (audio, sample_rate) buffers"""
+        # Submit concurrently so the scheduler can pack files into shared batches
+        outcomes = await asyncio.gather(
+            *(self.transcribe(audio, sample_rate) for audio, sample_rate in buffers),
+            return_exceptions=True
+        )
         results = []
-        for audio_file in audio_files:
-            try:
-                text, confidence = await self.transcribe(audio_file)
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error processing buffer {index}: {outcome}")
                 results.append({
-                    "text": text,
-                    "confidence": confidence
+                    "error": str(outcome)
                 })
-            except Exception as e:
-                logger.error(f"Error processing file {audio_file}: {e}")
+            else:
+                text, confidence = outcome
                 results.append({
-                    "error": str(e)
+                    "text": text,
+                    "confidence": confidence
                 })
-        return results 
\ No newline at end of file
+        return results
@@ -0,0 +1,228 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, List, Optional, Set
+import logging
+
+import numpy as np
+
+from kinyvoice_ai.src.utils.telemetry import (
+    BATCH_SIZE, LAST_BATCH_SIZE, QUEUE_WAIT_SECONDS, record_error
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """A waveform waiting to be batched, with the future its caller awaits"""
+
+    __slots__ = ("waveform", "future", "enqueued_at")
+
+    def __init__(self, waveform, future: asyncio.Future):
+        self.waveform = waveform
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+    @property
+    def length(self) -> int:
+        return int(self.waveform.shape[-1])
+
+
+class BatchScheduler:
+    """Coalesce concurrent transcription requests into padded batches.
+
+    Requests are queued and collected until either ``max_batch_size`` items
+    are waiting or ``max_wait_ms`` has elapsed since the first one arrived.
+    The collected items are sorted by length and split into groups whose
+    longest/shortest ratio stays under ``max_length_ratio``, so padding
+    overhead stays small. Each group runs through ``forward_fn`` in a single
+    forward pass and results are fanned back to the waiting coroutines. Up to
+    ``max_concurrent_batches`` groups may be in flight at once.
+    """
+
+    def __init__(
+        self,
+        forward_fn: Callable[[List], Awaitable[List[Any]]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_length_ratio: float = 1.5,
+        max_concurrent_batches: int = 1,
+        stats_window: int = 1024,
+    ):
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_length_ratio = max_length_ratio
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        # Rolling statistics for the throughput/latency report
+        self._latencies = deque(maxlen=stats_window)
+        self._queue_waits = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._total_requests = 0
+        self._total_batches = 0
+        self._busy_time = 0.0
+        self._started_at: Optional[float] = None
+
+    def is_running(self) -> bool:
+        """Check if the scheduler loop is running"""
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the background batching loop"""
+        if self.is_running():
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Batch scheduler started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f})"
+        )
+
+    async def stop(self):
+        """Stop the loop after draining requests that are already queued"""
+        if not self.is_running():
+            return
+        await self._queue.put(None)
+        await self._task
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        self._task = None
+
+    async def submit(self, waveform) -> Any:
+        """Queue a mono 16kHz waveform and wait for its forward pass output"""
+        if not self.is_running():
+            raise RuntimeError("Batch scheduler is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingRequest(waveform, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            pending = [first]
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                pending.append(item)
+
+            # Callers that gave up while the batch was collecting are not run
+            pending = [item for item in pending if not item.future.done()]
+            for group in self._group_by_length(pending):
+                # Wait for a free slot so at most max_concurrent_batches run at once
+                await self._slots.acquire()
+                task = asyncio.create_task(self._execute(group))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+        # Fail anything that raced in behind the stop sentinel
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None and not item.future.done():
+                item.future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+    def _group_by_length(self, pending: List[_PendingRequest]) -> List[List[_PendingRequest]]:
+        """Split requests into groups of similar length to limit padding"""
+        pending = sorted(pending, key=lambda p: p.length)
+        groups = []
+        current = []
+        for item in pending:
+            if current and (
+                len(current) >= self.max_batch_size
+                or item.length > current[0].length * self.max_length_ratio
+            ):
+                groups.append(current)
+                current = []
+            current.append(item)
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _execute(self, group: List[_PendingRequest]):
+        """Run one padded forward pass and resolve the group's futures"""
+        started = time.perf_counter()
+        try:
+            results = await self.forward_fn([item.waveform for item in group])
+            if len(results) != len(group):
+                raise RuntimeError(f"Forward pass returned {len(results)} results for {len(group)} requests")
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(group)} requests: {e}")
+            record_error("batch_forward", e)
+            for item in group:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        finished = time.perf_counter()
+
+        self._record(group, started, finished)
+        for item, result in zip(group, results):
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def _record(self, group: List[_PendingRequest], started: float, finished: float):
+        self._total_batches += 1
+        self._total_requests += len(group)
+        self._busy_time += finished - started
+        self._batch_sizes.append(len(group))
+        BATCH_SIZE.observe(len(group))
+        LAST_BATCH_SIZE.set(len(group))
+        for item in group:
+            self._queue_waits.append(started - item.enqueued_at)
+            QUEUE_WAIT_SECONDS.observe(started - item.enqueued_at, queue="batch_scheduler")
+            self._latencies.append(finished - item.enqueued_at)
+
+    def report(self) -> dict:
+        """Summarize throughput against latency for the recent window"""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        latencies = np.asarray(self._latencies, dtype=np.float64) * 1000.0
+        queue_waits = np.asarray(self._queue_waits, dtype=np.float64) * 1000.0
+
+        def _percentiles(values: np.ndarray) -> dict:
+            if values.size == 0:
+                return {"mean": None, "p50": None, "p95": None, "p99": None}
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            return {
+                "mean": float(values.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+            }
+
+        return {
+            "config": {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_length_ratio": self.max_length_ratio,
+                "max_concurrent_batches": self.max_concurrent_batches,
+            },
+            "total_requests": self._total_requests,
+            "total_batches": self._total_batches,
+            "avg_batch_size": float(np.mean(self._batch_sizes)) if self._batch_sizes else None,
+            "throughput_rps": self._total_requests / elapsed if elapsed > 0 else 0.0,
+            "utilization": (
+                self._busy_time / (elapsed * self.max_concurrent_batches) if elapsed > 0 else 0.0
+            ),
+            "latency_ms": _percentiles(latencies),
+            "queue_wait_ms": _percentiles(queue_waits),
+        }
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A full disk tier is swept down to this fraction of its limits, so the
+# next few writes do not each trigger another directory scan
+SWEEP_TARGET = 0.9
+
+
+def audio_fingerprint(audio: np.ndarray, sample_rate: int, **config) -> str:
+    """Content hash of decoded PCM plus everything that changes the result.
+
+    ``config`` should carry the model version and decoding options so a
+    cached transcript is never served for a different model or decoder.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(json.dumps(
+        {"shape": audio.shape, "sample_rate": sample_rate, **config},
+        sort_keys=True,
+        default=str,
+    ).encode("utf-8"))
+    # hashlib releases the GIL on large buffers, so this can run on a worker thread
+    digest.update(memoryview(np.ascontiguousarray(audio)).cast("B"))
+    return digest.hexdigest()
+
+
+class DiskCacheStore:
+    """Persistent cache tier: one JSON file per key, sharded by key prefix.
+
+    The directory is bounded by ``max_bytes`` and ``max_entries``. A sweep
+    deletes expired files, then the oldest entries until usage is back
+    under ``SWEEP_TARGET`` of both limits.
+    It runs from ``set`` every ``sweep_interval_s``, and sooner when the
+    writes since the last sweep may have crossed a limit. Several processes
+    can share the directory, so the sweep works from the files on disk
+    rather than an in-memory index.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl_s: float,
+        max_bytes: int = 1024 ** 3,
+        max_entries: int = 100_000,
+        sweep_interval_s: float = 600.0,
+    ):
+        self.directory = directory
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sweep_interval_s = sweep_interval_s
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        # Usage found by the last sweep plus what was written since
+        self._bytes = 0
+        self._entries = 0
+        self._last_sweep: Optional[float] = None
+        self.expired = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["stored_at"] > self.ttl_s:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": time.time(), "value": value}, f)
+            size = f.tell()
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._bytes += size
+            self._entries += 1
+            due = (
+                self._last_sweep is None
+                or time.monotonic() - self._last_sweep >= self.sweep_interval_s
+                or self._bytes > self.max_bytes
+                or self._entries > self.max_entries
+            )
+        if due:
+            self.sweep()
+
+    def _scan(self):
+        """Yield ``(mtime, size, path)`` of every entry, removing expired and orphaned files"""
+        now = time.time()
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                age = now - stat.st_mtime
+                # Temporary files older than a sweep interval belong to writers that died
+                stale = age > self.ttl_s if entry.name.endswith(".json") else age > self.sweep_interval_s
+                if stale:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        continue
+                    if entry.name.endswith(".json"):
+                        self.expired += 1
+                elif entry.name.endswith(".json"):
+                    yield stat.st_mtime, stat.st_size, entry.path
+
+    def sweep(self):
+        """Delete expired entries, then the oldest ones until the directory is back under its limits"""
+        # One sweep at a time; writers that find it busy carry on
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            files = sorted(self._scan())
+            total_bytes = sum(size for _, size, _ in files)
+            count = len(files)
+            for _, size, path in files:
+                if (
+                    total_bytes <= self.max_bytes * SWEEP_TARGET
+                    and count <= self.max_entries * SWEEP_TARGET
+                ):
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total_bytes -= size
+                count -= 1
+                self.evictions += 1
+            with self._lock:
+                self._bytes, self._entries = total_bytes, count
+                self._last_sweep = time.monotonic()
+        except OSError as e:
+            logger.warning(f"Failed to sweep cache directory {self.directory}: {e}")
+        finally:
+            self._sweep_lock.release()
+
+    def stats(self) -> dict:
+        return {
+            "bytes": self._bytes,
+            "entries": self._entries,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+class TranscriptionCache:
+    """Two-tier transcription result cache keyed by ``audio_fingerprint``.
+
+    The in-process tier is an LRU bounded by ``max_entries`` whose entries
+    expire after ``ttl_s``. The optional disk tier survives restarts and is
+    shared by every worker process pointing at the same directory; disk hits
+    are promoted into memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: float = 3600.0,
+        disk_store: Optional[DiskCacheStore] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.disk_store = disk_store
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if time.monotonic() - stored_at <= self.ttl_s:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self._entries[key]
+
+        if self.disk_store is not None:
+            value = await asyncio.to_thread(self.disk_store.get, key)
+            if value is not None:
+                self.disk_hits += 1
+                self._put_memory(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        self._put_memory(key, value)
+        if self.disk_store is not None:
+            try:
+                await asyncio.to_thread(self.disk_store.set, key, value)
+            except OSError as e:
+                logger.warning(f"Failed to persist cache entry {key}: {e}")
+
+    def _put_memory(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop the in-process tier"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for the metrics endpoint"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "persistent": self.disk_store is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "disk": self.disk_store.stats() if self.disk_store is not None else None,
+        }
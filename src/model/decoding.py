@@ -0,0 +1,321 @@
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+import logging
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger(__name__)
+
+DECODERS = ("greedy", "beam")
+
+# ARPA files store log10 probabilities; beam scores are natural logs
+LOG10_TO_LN = math.log(10.0)
+NEG_INF = -float("inf")
+
+
+def _logaddexp(a: float, b: float) -> float:
+    """Scalar ``log(exp(a) + exp(b))``; much cheaper than ``np.logaddexp`` on Python floats"""
+    if a < b:
+        a, b = b, a
+    if b == NEG_INF:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+class GreedyDecoder:
+    """Best-path CTC decoding: argmax per frame, then collapse and drop blanks"""
+
+    def __init__(self, processor):
+        self.processor = processor
+
+    def decode(self, log_probs: "torch.Tensor", best_ids: Optional["torch.Tensor"] = None) -> str:
+        """Decode ``[frames, vocab]`` log-probabilities, reusing a precomputed argmax"""
+        if best_ids is None:
+            import torch
+            best_ids = torch.argmax(log_probs, dim=-1)
+        return self.processor.decode(best_ids)
+
+
+class NGramLanguageModel:
+    """Word-level back-off n-gram model read from an ARPA file"""
+
+    def __init__(self, probs: Dict[Tuple[str, ...], float], backoffs: Dict[Tuple[str, ...], float], order: int):
+        self.probs = probs
+        self.backoffs = backoffs
+        self.order = order
+
+    @classmethod
+    def from_arpa(cls, path: str) -> "NGramLanguageModel":
+        """Parse an ARPA file into probability and back-off tables"""
+        probs = {}
+        backoffs = {}
+        order = 0
+        current = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("ngram ") or line == "\\data\\":
+                    continue
+                if line.startswith("\\") and line.endswith("-grams:"):
+                    current = int(line[1:line.index("-")])
+                    order = max(order, current)
+                    continue
+                if line == "\\end\\":
+                    break
+                if current == 0:
+                    continue
+                parts = line.split()
+                ngram = tuple(parts[1:1 + current])
+                probs[ngram] = float(parts[0]) * LOG10_TO_LN
+                if len(parts) > current + 1:
+                    backoffs[ngram] = float(parts[current + 1]) * LOG10_TO_LN
+        logger.info(f"Loaded {order}-gram language model with {len(probs)} entries from {path}")
+        return cls(probs, backoffs, order)
+
+    def score(self, context: Tuple[str, ...], word: str) -> float:
+        """Natural-log probability of ``word`` after ``context``, with back-off"""
+        context = context[-(self.order - 1):] if self.order > 1 else ()
+        penalty = 0.0
+        while True:
+            ngram = context + (word,)
+            if ngram in self.probs:
+                return penalty + self.probs[ngram]
+            if not context:
+                return penalty + self.probs.get(("<unk>",), -10.0 * LOG10_TO_LN)
+            penalty += self.backoffs.get(context, 0.0)
+            context = context[1:]
+
+
+class _Beam:
+    """Log-space CTC prefix state plus the word-level context needed for scoring"""
+
+    __slots__ = ("p_blank", "p_non_blank", "lm_score", "words", "partial")
+
+    def __init__(self, lm_score: float = 0.0, words: Tuple[str, ...] = (), partial: str = ""):
+        self.p_blank = NEG_INF
+        self.p_non_blank = NEG_INF
+        self.lm_score = lm_score
+        self.words = words
+        self.partial = partial
+
+    @property
+    def acoustic(self) -> float:
+        return _logaddexp(self.p_blank, self.p_non_blank)
+
+
+class BeamSearchDecoder:
+    """CTC prefix beam search with optional n-gram LM and hotword boosting.
+
+    Per frame, only the ``token_top_k`` most likely tokens (and those within
+    ``token_prune_logp`` of the best) are expanded, and frames where blank
+    takes more than ``blank_skip_prob`` of the mass are skipped outright, so
+    the cost is bounded by ``frames * beam_width * token_top_k`` and in
+    practice much smaller on speech with pauses. The scores of all
+    beam/token extensions of a frame are computed as one array; only merging
+    them into prefixes is done per candidate. ``lm_beta`` is a per-word bonus
+    that balances the LM's per-word penalty, so it only applies with an LM.
+    """
+
+    def __init__(
+        self,
+        processor,
+        beam_width: int = 16,
+        token_top_k: int = 8,
+        token_prune_logp: float = -10.0,
+        blank_skip_prob: float = 0.999,
+        lm: Optional[NGramLanguageModel] = None,
+        lm_alpha: float = 0.5,
+        lm_beta: float = 1.0,
+        hotwords: Iterable[str] = (),
+        hotword_weight: float = 5.0,
+    ):
+        tokenizer = processor.tokenizer
+        self.vocab = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+        self.blank_id = tokenizer.pad_token_id
+        self.word_delimiter = tokenizer.word_delimiter_token
+        self.special_ids = set(tokenizer.all_special_ids) - {self.blank_id}
+        # Tokens that can extend a prefix
+        self._expandable = np.ones(len(self.vocab), dtype=bool)
+        self._expandable[list(self.special_ids | {self.blank_id})] = False
+        self.beam_width = beam_width
+        self.token_top_k = token_top_k
+        self.token_prune_logp = token_prune_logp
+        self.log_blank_skip = math.log(blank_skip_prob)
+        self.lm = lm
+        self.lm_alpha = lm_alpha
+        self.lm_beta = lm_beta
+        self.hotword_weight = hotword_weight
+
+        # Fraction of a hotword matched by each of its prefixes, for partial-word boosts
+        self.hotwords = {word.lower() for word in hotwords if word}
+        self._hotword_prefixes: Dict[str, float] = {}
+        for word in self.hotwords:
+            for i in range(1, len(word) + 1):
+                prefix = word[:i]
+                self._hotword_prefixes[prefix] = max(self._hotword_prefixes.get(prefix, 0.0), i / len(word))
+
+    def _word_score(self, words: Tuple[str, ...], word: str) -> float:
+        """Score added to a beam when ``word`` is completed"""
+        score = 0.0
+        if self.lm is not None:
+            score += self.lm_alpha * self.lm.score(words, word) + self.lm_beta
+        if word.lower() in self.hotwords:
+            score += self.hotword_weight
+        return score
+
+    def _total(self, beam: _Beam) -> float:
+        # Reward beams that are part-way through a hotword so they survive pruning
+        boost = self.hotword_weight * self._hotword_prefixes.get(beam.partial.lower(), 0.0)
+        return beam.acoustic + beam.lm_score + boost
+
+    def _extend(self, beam: _Beam, token_id: int) -> _Beam:
+        """Create the word-level state of a prefix extended by ``token_id``"""
+        token = self.vocab[token_id]
+        if token == self.word_delimiter:
+            if not beam.partial:
+                return _Beam(beam.lm_score, beam.words, "")
+            return _Beam(
+                beam.lm_score + self._word_score(beam.words, beam.partial),
+                beam.words + (beam.partial,),
+                "",
+            )
+        return _Beam(beam.lm_score, beam.words, beam.partial + token)
+
+    def decode(self, log_probs: "torch.Tensor", best_ids: Optional["torch.Tensor"] = None) -> str:
+        """Decode ``[frames, vocab]`` log-probabilities (already normalized)"""
+        log_probs = log_probs.cpu().numpy()
+
+        # Token pruning for all frames at once
+        top_k = min(self.token_top_k, log_probs.shape[1])
+        candidates = np.argpartition(-log_probs, top_k - 1, axis=1)[:, :top_k]
+        best = log_probs.max(axis=1, keepdims=True)
+        keep = np.take_along_axis(log_probs, candidates, axis=1) >= best + self.token_prune_logp
+
+        beams: Dict[Tuple[int, ...], _Beam] = {(): _Beam()}
+        beams[()].p_blank = 0.0
+
+        for t in range(log_probs.shape[0]):
+            frame = log_probs[t]
+            if frame[self.blank_id] >= self.log_blank_skip:
+                # Near-certain blank: every prefix just absorbs another blank frame
+                for beam in beams.values():
+                    beam.p_blank = beam.acoustic + float(frame[self.blank_id])
+                    beam.p_non_blank = NEG_INF
+                continue
+
+            next_beams: Dict[Tuple[int, ...], _Beam] = {}
+
+            def get(prefix: Tuple[int, ...], parent: _Beam, token_id: Optional[int]) -> _Beam:
+                beam = next_beams.get(prefix)
+                if beam is None:
+                    if token_id is None:
+                        beam = _Beam(parent.lm_score, parent.words, parent.partial)
+                    else:
+                        beam = self._extend(parent, token_id)
+                    next_beams[prefix] = beam
+                return beam
+
+            tokens = candidates[t][keep[t]]
+            tokens = tokens[self._expandable[tokens]]
+            token_logp = frame[tokens]
+
+            # Extension scores of every beam by every token in one shot: a
+            # repeated token only extends from the blank-ending paths
+            items = list(beams.items())
+            totals = np.array([beam.acoustic for _, beam in items])
+            p_blanks = np.array([beam.p_blank for _, beam in items])
+            lasts = np.array([prefix[-1] if prefix else -1 for prefix, _ in items])
+            repeats = tokens[None, :] == lasts[:, None]
+            scores = np.where(repeats, p_blanks[:, None], totals[:, None]) + token_logp[None, :]
+            stay_blank = (totals + frame[self.blank_id]).tolist()
+            token_list = tokens.tolist()
+
+            for i, ((prefix, beam), row) in enumerate(zip(items, scores.tolist())):
+                stay = get(prefix, beam, None)
+                stay.p_blank = _logaddexp(stay.p_blank, stay_blank[i])
+                if prefix and prefix[-1] in token_list:
+                    # Repeat without a blank in between collapses into the same prefix
+                    stay.p_non_blank = _logaddexp(
+                        stay.p_non_blank, beam.p_non_blank + float(frame[prefix[-1]])
+                    )
+                for token_id, score in zip(token_list, row):
+                    extended = get(prefix + (token_id,), beam, token_id)
+                    extended.p_non_blank = _logaddexp(extended.p_non_blank, score)
+
+            ranked = sorted(next_beams.items(), key=lambda item: self._total(item[1]), reverse=True)
+            beams = dict(ranked[:self.beam_width])
+
+        # Score the trailing word of each beam before picking the winner
+        def final_score(beam: _Beam) -> float:
+            score = beam.acoustic + beam.lm_score
+            if beam.partial:
+                score += self._word_score(beam.words, beam.partial)
+            return score
+
+        best_beam = max(beams.values(), key=final_score)
+        words = best_beam.words + ((best_beam.partial,) if best_beam.partial else ())
+        return " ".join(words)
+
+
+def load_hotwords(hotwords_dir: Optional[str], domain: Optional[str]) -> List[str]:
+    """Read ``<hotwords_dir>/<domain>.txt``, one hotword per line"""
+    if not hotwords_dir or not domain:
+        return []
+    path = os.path.join(hotwords_dir, f"{domain}.txt")
+    if not os.path.exists(path):
+        logger.warning(f"No hotword list for domain '{domain}' at {path}")
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class DecoderFactory:
+    """Build decoders on demand and reuse them across requests.
+
+    The language model is loaded once and shared by every beam decoder;
+    beam decoders are cached per domain so hotword tables are built once.
+    """
+
+    def __init__(self, processor, settings):
+        self.processor = processor
+        self.settings = settings
+        self.greedy = GreedyDecoder(processor)
+        self._lm: Optional[NGramLanguageModel] = None
+        self._lm_loaded = False
+        self._beam_decoders: Dict[Optional[str], BeamSearchDecoder] = {}
+
+    def _language_model(self) -> Optional[NGramLanguageModel]:
+        if not self._lm_loaded:
+            if self.settings.lm_path and os.path.exists(self.settings.lm_path):
+                self._lm = NGramLanguageModel.from_arpa(self.settings.lm_path)
+            self._lm_loaded = True
+        return self._lm
+
+    def get(self, name: Optional[str] = None, domain: Optional[str] = None):
+        """Return the decoder called ``name`` (default from settings) for ``domain``"""
+        name = name or self.settings.decoder
+        if name not in DECODERS:
+            raise ValueError(f"Unsupported decoder: {name}")
+        if name == "greedy":
+            return self.greedy
+
+        decoder = self._beam_decoders.get(domain)
+        if decoder is None:
+            decoder = BeamSearchDecoder(
+                self.processor,
+                beam_width=self.settings.beam_width,
+                token_top_k=self.settings.beam_token_top_k,
+                token_prune_logp=self.settings.beam_token_prune_logp,
+                blank_skip_prob=self.settings.beam_blank_skip_prob,
+                lm=self._language_model(),
+                lm_alpha=self.settings.lm_alpha,
+                lm_beta=self.settings.lm_beta,
+                hotwords=load_hotwords(self.settings.hotwords_dir, domain),
+                hotword_weight=self.settings.hotword_weight,
+            )
+            self._beam_decoders[domain] = decoder
+        return decoder
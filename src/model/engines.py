@@ -0,0 +1,284 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.src.model.model import ASRBackend
+from kinyvoice_ai.src.model.asr_model import ASRModel
+from kinyvoice_ai.src.model.registry import get_asr_model
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+
+class Wav2Vec2Backend(ASRBackend):
+    """The shared CTC ``ASRModel``: fast, batched, best on short commands"""
+
+    name = "wav2vec2"
+    nominal_rtf = 0.05
+    supports_long_form = True
+    estimated_memory_bytes = 1300 * 1024 ** 2
+
+    def __init__(self, asr_model: ASRModel):
+        super().__init__()
+        self.asr_model = asr_model
+
+    @property
+    def version(self) -> str:
+        return self.asr_model.model_version
+
+    def is_loaded(self) -> bool:
+        return self.asr_model.is_loaded()
+
+    async def load(self):
+        if not self.asr_model.is_loaded():
+            await self.asr_model.load_model()
+
+    async def unload(self):
+        await self.asr_model.unload_model()
+
+    def memory_bytes(self) -> int:
+        return int(self.asr_model._memory_bytes("parameters"))
+
+    def decoder_label(self, decoder: Optional[str] = None) -> Optional[str]:
+        return decoder or settings.decoder
+
+    async def _transcribe(self, audio: np.ndarray, sample_rate: int, **options) -> Tuple[str, float]:
+        return await self.asr_model.transcribe(audio, sample_rate, **options)
+
+    async def transcribe_segments(self, audio: np.ndarray, sample_rate: int, **options) -> dict:
+        """VAD-segmented transcription, only offered by the CTC model"""
+        started = time.perf_counter()
+        result = await self.asr_model.transcribe_segments(audio, sample_rate, **options)
+        self.stats.record(time.perf_counter() - started, len(audio) / sample_rate)
+        return result
+
+
+class _Engine:
+    """Registry slot: the lazily created backend plus its usage bookkeeping"""
+
+    __slots__ = ("name", "factory", "pinned", "backend", "lock", "in_flight", "last_used")
+
+    def __init__(self, name: str, factory: Callable[[], ASRBackend], pinned: bool):
+        self.name = name
+        self.factory = factory
+        self.pinned = pinned
+        self.backend: Optional[ASRBackend] = None
+        self.lock = asyncio.Lock()
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+    def get_backend(self) -> ASRBackend:
+        # Creating a backend is cheap; weights are only loaded on first use
+        if self.backend is None:
+            self.backend = self.factory()
+        return self.backend
+
+    @property
+    def loaded(self) -> bool:
+        return self.backend is not None and self.backend.is_loaded()
+
+
+class EngineRegistry:
+    """Serve several ASR backends by name, loading them on first use.
+
+    Before an engine is loaded, idle engines (no requests in flight) are
+    unloaded in least-recently-used order until the estimated total fits
+    in ``memory_budget_bytes``. Engines idle for longer than ``idle_ttl_s``
+    are unloaded in the background. Pinned engines are never evicted.
+    ``route`` picks an engine from the domain, audio duration and latency
+    budget of a request.
+    """
+
+    def __init__(self, memory_budget_bytes: int, idle_ttl_s: float):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_ttl_s = idle_ttl_s
+        self._engines: Dict[str, _Engine] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.evictions = 0
+
+    def register(self, name: str, factory: Callable[[], ASRBackend], pinned: bool = False):
+        """Make an engine available under ``name``"""
+        self._engines[name] = _Engine(name, factory, pinned)
+
+    def names(self) -> List[str]:
+        return list(self._engines)
+
+    def _engine(self, name: str) -> _Engine:
+        engine = self._engines.get(name)
+        if engine is None:
+            raise ValueError(f"Unknown engine: {name}")
+        return engine
+
+    async def start(self):
+        """Start the idle eviction loop"""
+        if self._task is None and self.idle_ttl_s > 0:
+            self._task = asyncio.create_task(self._evict_idle_loop())
+
+    async def stop(self):
+        """Stop the eviction loop and unload every engine that is not pinned"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for engine in self._engines.values():
+            if not engine.pinned and engine.loaded:
+                await self._unload(engine)
+
+    @asynccontextmanager
+    async def use(self, name: str):
+        """Yield the loaded backend for ``name``; it cannot be evicted meanwhile"""
+        engine = self._engine(name)
+        engine.in_flight += 1
+        try:
+            if not engine.loaded:
+                await self._load(engine)
+            yield engine.backend
+        finally:
+            engine.in_flight -= 1
+            engine.last_used = time.monotonic()
+
+    async def _load(self, engine: _Engine):
+        async with engine.lock:
+            backend = engine.get_backend()
+            if backend.is_loaded():
+                return
+            await self._make_room(engine, backend.estimated_memory_bytes)
+            logger.info(f"Loading ASR engine '{engine.name}'")
+            await backend.load()
+            # Later eviction plans use the real footprint
+            backend.estimated_memory_bytes = backend.memory_bytes() or backend.estimated_memory_bytes
+
+    async def _unload(self, engine: _Engine):
+        async with engine.lock:
+            if engine.loaded and engine.in_flight == 0:
+                logger.info(f"Unloading ASR engine '{engine.name}'")
+                await engine.backend.unload()
+                self.evictions += 1
+
+    async def _make_room(self, incoming: _Engine, needed: int):
+        """Unload idle engines, least recently used first, until ``needed`` bytes fit"""
+        loaded = [e for e in self._engines.values() if e is not incoming and e.loaded]
+        used = sum(e.backend.memory_bytes() for e in loaded)
+        candidates = sorted(
+            (e for e in loaded if not e.pinned and e.in_flight == 0),
+            key=lambda e: e.last_used
+        )
+        while used + needed > self.memory_budget_bytes and candidates:
+            victim = candidates.pop(0)
+            freed = victim.backend.memory_bytes()
+            await self._unload(victim)
+            if not victim.loaded:
+                used -= freed
+        if used + needed > self.memory_budget_bytes:
+            logger.warning(
+                f"Loading engine '{incoming.name}' exceeds the memory budget "
+                f"({(used + needed) / 1024 ** 2:.0f}MB of {self.memory_budget_bytes / 1024 ** 2:.0f}MB)"
+            )
+
+    async def _evict_idle_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl_s / 4))
+            now = time.monotonic()
+            for engine in list(self._engines.values()):
+                if (
+                    not engine.pinned and engine.loaded and engine.in_flight == 0
+                    and now - engine.last_used > self.idle_ttl_s
+                ):
+                    await self._unload(engine)
+
+    def route(
+        self,
+        domain: Optional[str] = None,
+        duration_s: Optional[float] = None,
+        latency_budget_ms: Optional[float] = None,
+        engine: Optional[str] = None
+    ) -> str:
+        """Pick the engine for a request.
+
+        An explicit ``engine`` wins. Otherwise the domain's configured engine
+        is preferred, then the long-form engine for recordings past
+        ``engine_long_form_threshold_s``, then the default. With a latency
+        budget, the preferred engine is kept only if its estimated latency
+        for ``duration_s`` fits; else the first engine that fits, or the
+        fastest one if none does.
+        """
+        if engine is not None:
+            self._engine(engine)
+            return engine
+
+        preferred = settings.engine_domain_routes.get(domain) if domain else None
+        if preferred is None and duration_s is not None and settings.engine_long_form is not None:
+            if duration_s >= settings.engine_long_form_threshold_s:
+                preferred = settings.engine_long_form
+        preferred = preferred or settings.engine_default
+        self._engine(preferred)
+        if latency_budget_ms is None or duration_s is None:
+            return preferred
+
+        estimates = {}
+        for name, slot in self._engines.items():
+            backend = slot.get_backend()
+            if backend.max_duration_s is not None and duration_s > backend.max_duration_s:
+                continue
+            estimates[name] = backend.estimate_latency_s(duration_s)
+        if not estimates:
+            return preferred
+
+        budget_s = latency_budget_ms / 1000.0
+        if estimates.get(preferred, float("inf")) <= budget_s:
+            return preferred
+        fitting = [name for name in sorted(estimates, key=estimates.get) if estimates[name] <= budget_s]
+        return fitting[0] if fitting else min(estimates, key=estimates.get)
+
+    def estimate_latency_s(self, name: str, duration_s: float) -> float:
+        """Expected processing time of ``duration_s`` audio on an engine"""
+        return self._engine(name).get_backend().estimate_latency_s(duration_s)
+
+    def report(self) -> dict:
+        """Load state, memory and measured performance of every engine"""
+        now = time.monotonic()
+        engines = {}
+        for name, engine in self._engines.items():
+            backend = engine.get_backend()
+            engines[name] = {
+                **backend.profile(),
+                "pinned": engine.pinned,
+                "in_flight": engine.in_flight,
+                "idle_seconds": now - engine.last_used,
+            }
+        return {
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "memory_used_bytes": sum(
+                e.backend.memory_bytes() for e in self._engines.values() if e.loaded
+            ),
+            "evictions": self.evictions,
+            "engines": engines,
+        }
+
+
+def _whisper_backend() -> ASRBackend:
+    # Imported lazily so the CTC-only deployment never imports Whisper code
+    from kinyvoice_ai.transcriber.whisper_transcribe import WhisperBackend
+    return WhisperBackend()
+
+
+# Process-wide registry shared by the app and the routers
+_registry: Optional[EngineRegistry] = None
+
+def get_engine_registry() -> EngineRegistry:
+    """Return the shared engine registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        _registry = EngineRegistry(
+            memory_budget_bytes=int(settings.engine_memory_budget_mb * 1024 ** 2),
+            idle_ttl_s=settings.engine_idle_ttl_s,
+        )
+        # The CTC model is shared with batch jobs and streaming, so it stays loaded
+        _registry.register("wav2vec2", lambda: Wav2Vec2Backend(get_asr_model()), pinned=True)
+        _registry.register("whisper", _whisper_backend)
+    return _registry
@@ -0,0 +1,78 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+import logging
+
+from kinyvoice_ai.src.utils.telemetry import QUEUE_WAIT_SECONDS
+from kinyvoice_ai.src.utils.profiling import current_profile
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(fn: Callable, submitted: float):
+    """Record how long ``fn`` waited for a free worker, then run it"""
+    QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted, queue="inference_executor")
+    return fn()
+
+
+def _init_worker(intra_op_threads: int):
+    """Pin the torch intra-op thread count of an inference worker thread"""
+    if intra_op_threads > 0:
+        import torch
+        torch.set_num_threads(intra_op_threads)
+
+
+class InferenceExecutor:
+    """Bounded worker pool that runs blocking model work off the event loop.
+
+    torch releases the GIL inside its kernels, so a thread pool lets several
+    forward passes run in parallel across cores while uvicorn keeps serving
+    other requests. Each worker is limited to ``intra_op_threads`` torch
+    threads so that ``max_workers * intra_op_threads`` roughly matches the
+    number of cores on the host.
+    """
+
+    def __init__(self, max_workers: int = 2, intra_op_threads: int = 0):
+        self.max_workers = max(1, max_workers)
+        self.intra_op_threads = intra_op_threads
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def is_running(self) -> bool:
+        """Check if the worker pool is running"""
+        return self._pool is not None
+
+    def start(self):
+        """Create the worker pool"""
+        if self._pool is not None:
+            return
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="asr-inference",
+            initializer=_init_worker,
+            initargs=(self.intra_op_threads,),
+        )
+        logger.info(
+            f"Inference executor started with {self.max_workers} workers "
+            f"({self.intra_op_threads or 'default'} torch threads each)"
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Shut the worker pool down, waiting for running work by default"""
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=wait)
+        self._pool = None
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run ``fn`` on a worker thread and await its result"""
+        if self._pool is None:
+            raise RuntimeError("Inference executor is not running")
+        loop = asyncio.get_running_loop()
+        call = partial(fn, *args, **kwargs)
+        if current_profile() is not None:
+            # Carry the request's profile onto the worker thread
+            call = partial(contextvars.copy_context().run, call)
+        return await loop.run_in_executor(self._pool, _timed_call, call, time.perf_counter())
@@ -0,0 +1,63 @@
+from typing import Iterator, List, NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import torch
+
+
+class Window(NamedTuple):
+    """A slice of a long recording with the overlap to drop on each side"""
+    start: int
+    end: int
+    left_stride: int
+    right_stride: int
+
+
+def plan_windows(num_samples: int, chunk_samples: int, stride_samples: int) -> List[Window]:
+    """Split ``num_samples`` into fixed windows overlapping by ``stride_samples``.
+
+    Consecutive windows share ``2 * stride_samples`` of audio. Each side of
+    the overlap is kept by the window in which it is furthest from the edge,
+    so every output frame comes from audio with context on both sides.
+    """
+    if stride_samples * 2 >= chunk_samples:
+        raise ValueError("Stride must be smaller than half the chunk length")
+    if num_samples <= chunk_samples:
+        return [Window(0, num_samples, 0, 0)]
+
+    step = chunk_samples - 2 * stride_samples
+    windows = []
+    start = 0
+    while True:
+        end = min(start + chunk_samples, num_samples)
+        is_last = end >= num_samples
+        windows.append(Window(
+            start=start,
+            end=end,
+            left_stride=0 if start == 0 else stride_samples,
+            right_stride=0 if is_last else stride_samples,
+        ))
+        if is_last:
+            return windows
+        start += step
+
+
+def iter_window_batches(windows: List[Window], batch_size: int) -> Iterator[List[Window]]:
+    """Yield windows in groups of ``batch_size`` to bound peak memory"""
+    for i in range(0, len(windows), max(1, batch_size)):
+        yield windows[i:i + batch_size]
+
+
+def trim_window_logits(logits: "torch.Tensor", window: Window) -> "torch.Tensor":
+    """Drop the frames of a window's ``[frames, vocab]`` logits that fall in its strides"""
+    num_frames = logits.shape[0]
+    samples_per_frame = (window.end - window.start) / max(1, num_frames)
+    left = int(round(window.left_stride / samples_per_frame))
+    right = int(round(window.right_stride / samples_per_frame))
+    return logits[left:num_frames - right]
+
+
+def stitch_logits(pieces: List["torch.Tensor"]) -> "torch.Tensor":
+    """Concatenate trimmed window logits into one ``[frames, vocab]`` tensor"""
+    import torch
+
+    return torch.cat(pieces, dim=0)
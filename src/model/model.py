@@ -0,0 +1,130 @@
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class BackendStats:
+    """Rolling latency and real-time-factor statistics of one backend"""
+
+    def __init__(self, window: int = 512):
+        self._latencies = deque(maxlen=window)
+        self._audio_seconds = deque(maxlen=window)
+        self.total_requests = 0
+        self.total_errors = 0
+
+    def record(self, latency_s: float, audio_seconds: float):
+        self._latencies.append(latency_s)
+        self._audio_seconds.append(audio_seconds)
+        self.total_requests += 1
+
+    def rtf_percentile(self, q: float) -> Optional[float]:
+        """Processing seconds per second of audio at percentile ``q``"""
+        latencies = np.asarray(self._latencies, dtype=np.float64)
+        audio = np.asarray(self._audio_seconds, dtype=np.float64)
+        valid = audio > 0
+        if not valid.any():
+            return None
+        return float(np.percentile(latencies[valid] / audio[valid], q))
+
+    def report(self) -> dict:
+        latencies = np.asarray(self._latencies, dtype=np.float64)
+        audio = np.asarray(self._audio_seconds, dtype=np.float64)
+        if latencies.size == 0:
+            return {
+                "requests": self.total_requests,
+                "errors": self.total_errors,
+                "latency_ms": None,
+                "rtf": None,
+                "audio_seconds_per_second": None,
+            }
+        p50, p95 = np.percentile(latencies * 1000.0, [50, 95])
+        return {
+            "requests": self.total_requests,
+            "errors": self.total_errors,
+            "latency_ms": {"p50": float(p50), "p95": float(p95)},
+            "rtf": {"p50": self.rtf_percentile(50), "p95": self.rtf_percentile(95)},
+            # Audio seconds transcribed per second of busy time
+            "audio_seconds_per_second": float(audio.sum() / latencies.sum()) if latencies.sum() > 0 else None,
+        }
+
+
+class ASRBackend(ABC):
+    """Interface every transcription engine served by the API implements.
+
+    Subclasses load their weights in ``load``, release them in ``unload``
+    and transcribe decoded ``(frames, channels)`` float32 buffers. The
+    class attributes describe the engine to the router: ``nominal_rtf`` is
+    the expected processing time per second of audio before any requests
+    have been measured, and ``max_duration_s`` caps what it accepts.
+    """
+
+    name = "base"
+    nominal_rtf = 0.1
+    supports_long_form = True
+    max_duration_s: Optional[float] = None
+    # Used to plan evictions before the engine has been loaded once
+    estimated_memory_bytes = 1024 ** 3
+
+    def __init__(self):
+        self.stats = BackendStats()
+
+    @property
+    def version(self) -> str:
+        """Identifies the weights that produced a result"""
+        return self.name
+
+    @abstractmethod
+    def is_loaded(self) -> bool:
+        """Whether the weights are in memory"""
+
+    @abstractmethod
+    async def load(self):
+        """Load the weights; called by the registry before first use"""
+
+    @abstractmethod
+    async def unload(self):
+        """Release the weights and any device memory they hold"""
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the loaded weights"""
+        return 0
+
+    def decoder_label(self, decoder: Optional[str] = None) -> Optional[str]:
+        """Decoding method recorded with results for a requested ``decoder``"""
+        return decoder
+
+    @abstractmethod
+    async def _transcribe(self, audio: np.ndarray, sample_rate: int, **options) -> Tuple[str, float]:
+        """Engine-specific transcription returning text and confidence"""
+
+    async def transcribe(self, audio: np.ndarray, sample_rate: int, **options) -> Tuple[str, float]:
+        """Transcribe a decoded buffer, recording latency against audio length"""
+        started = time.perf_counter()
+        try:
+            result = await self._transcribe(audio, sample_rate, **options)
+        except Exception:
+            self.stats.total_errors += 1
+            raise
+        self.stats.record(time.perf_counter() - started, len(audio) / sample_rate)
+        return result
+
+    def estimate_latency_s(self, audio_seconds: float) -> float:
+        """Expected processing time, from measured p95 RTF once available"""
+        rtf = self.stats.rtf_percentile(95)
+        return (rtf if rtf is not None else self.nominal_rtf) * audio_seconds
+
+    def profile(self) -> dict:
+        """Declared characteristics plus measured throughput and latency"""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "loaded": self.is_loaded(),
+            "nominal_rtf": self.nominal_rtf,
+            "supports_long_form": self.supports_long_form,
+            "max_duration_s": self.max_duration_s,
+            "memory_bytes": self.memory_bytes() if self.is_loaded() else 0,
+            **self.stats.report(),
+        }
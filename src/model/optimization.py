@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+import logging
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "int8", "bf16")
+COMPILE_MODES = ("none", "torchscript", "compile")
+
+
+class CTCLogits(torch.nn.Module):
+    """Forward wrapper that returns only the logits tensor.
+
+    ``Wav2Vec2ForCTC`` returns a ``ModelOutput``; tracing and compiling are
+    simpler and cheaper on a module with plain tensor inputs and outputs.
+    """
+
+    def __init__(self, model: "torch.nn.Module"):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_values: "torch.Tensor", attention_mask: Optional["torch.Tensor"] = None):
+        return self.model(input_values, attention_mask=attention_mask).logits
+
+
+def artifact_path(artifact_dir: str, model_name: str, precision: str) -> str:
+    """Location of the serialized model for a given precision"""
+    slug = model_name.replace("/", "--")
+    return os.path.join(artifact_dir, f"{slug}-{precision}.pt")
+
+
+def optimize_model(model: "torch.nn.Module", precision: str) -> "torch.nn.Module":
+    """Convert a loaded fp32 model to the requested precision"""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision: {precision}")
+    if precision == "int8":
+        # Dynamic quantization: int8 weights, activations quantized on the fly
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if precision == "bf16":
+        return model.to(torch.bfloat16)
+    return model
+
+
+def save_optimized(model: "torch.nn.Module", path: str):
+    """Serialize a converted model so later startups can skip the conversion"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.save(model, path)
+    logger.info(f"Saved optimized model to {path}")
+
+
+def load_optimized(path: str) -> "torch.nn.Module":
+    """Load a model previously written by ``save_optimized``"""
+    # The artifact is a pickled module we wrote ourselves, not just weights.
+    # Memory-mapping lets worker processes share the pages of one file.
+    return torch.load(path, map_location="cpu", weights_only=False, mmap=True)
+
+
+def snapshot_path(snapshot_dir: str, model_name: str) -> str:
+    """Location of the local safetensors snapshot of a Hub model"""
+    return os.path.join(snapshot_dir, model_name.replace("/", "--"))
+
+
+def has_snapshot(path: str) -> bool:
+    return os.path.exists(os.path.join(path, "model.safetensors")) and os.path.exists(
+        os.path.join(path, "preprocessor_config.json")
+    )
+
+
+def save_snapshot(model: "torch.nn.Module", processor, path: str):
+    """Write fp32 weights as safetensors plus the processor files"""
+    os.makedirs(path, exist_ok=True)
+    model.save_pretrained(path, safe_serialization=True)
+    processor.save_pretrained(path)
+    logger.info(f"Saved model snapshot to {path}")
+
+
+def load_snapshot(path: str) -> "torch.nn.Module":
+    """Load a snapshot with parameters backed by the memory-mapped safetensors file.
+    
+    The model is built on the meta device and the mapped tensors are
+    assigned to it directly, so no copy of the weights is made and worker
+    processes on the same host share the file's page cache.
+    """
+    from safetensors import safe_open
+    from transformers import Wav2Vec2Config, Wav2Vec2ForCTC
+
+    config = Wav2Vec2Config.from_pretrained(path, local_files_only=True)
+    with torch.device("meta"):
+        model = Wav2Vec2ForCTC(config)
+    with safe_open(os.path.join(path, "model.safetensors"), framework="pt", device="cpu") as f:
+        state_dict = {key: f.get_tensor(key) for key in f.keys()}
+
+    try:
+        model.load_state_dict(state_dict, strict=True, assign=True)
+        leftover = [name for name, t in (*model.named_parameters(), *model.named_buffers()) if t.is_meta]
+        if leftover:
+            raise RuntimeError(f"tensors not in the snapshot: {leftover[:3]}")
+    except RuntimeError as e:
+        # Key layouts differ between transformers versions; fall back to a copying load
+        logger.warning(f"Memory-mapped load of {path} failed ({e}), loading normally")
+        return Wav2Vec2ForCTC.from_pretrained(path, local_files_only=True)
+    return model
+
+
+def compile_forward(
+    model: "torch.nn.Module",
+    compile_mode: str,
+    use_attention_mask: bool,
+    example_length: int = 16000,
+) -> "torch.nn.Module":
+    """Wrap the model's forward pass, optionally traced or compiled"""
+    if compile_mode not in COMPILE_MODES:
+        raise ValueError(f"Unsupported compile mode: {compile_mode}")
+    forward = CTCLogits(model).eval()
+    if compile_mode == "torchscript":
+        dtype = next(model.parameters()).dtype
+        example = (torch.zeros(1, example_length, dtype=dtype),)
+        if use_attention_mask:
+            example += (torch.ones(1, example_length, dtype=torch.long),)
+        with torch.no_grad():
+            return torch.jit.trace(forward, example, check_trace=False, strict=False)
+    if compile_mode == "compile":
+        return torch.compile(forward, dynamic=True)
+    return forward
+
+
+def _load_manifest(path: str) -> List[Tuple[str, str]]:
+    """Read a tab-separated manifest of ``audio_path<TAB>reference`` lines"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            audio_path, reference = line.split("\t", 1)
+            entries.append((audio_path, reference))
+    return entries
+
+
+async def _run_reference_set(asr_model, buffers) -> Tuple[List[str], float]:
+    started = time.perf_counter()
+    texts = []
+    for audio, sample_rate in buffers:
+        text, _ = await asr_model.transcribe(audio, sample_rate)
+        texts.append(text)
+    return texts, time.perf_counter() - started
+
+
+async def parity_check(manifest: str, precision: str, compile_mode: str = "none") -> dict:
+    """Compare WER and wall time of an optimized variant against fp32"""
+    from kinyvoice_ai.src.model.asr_model import ASRModel
+    from kinyvoice_ai.src.utils.audio_processing import decode_audio
+    from jiwer import wer
+
+    entries = _load_manifest(manifest)
+    buffers = [decode_audio(audio_path) for audio_path, _ in entries]
+    references = [reference for _, reference in entries]
+
+    report = {"num_utterances": len(entries)}
+    for label, model_precision, model_compile in (
+        ("fp32", "fp32", "none"),
+        ("candidate", precision, compile_mode),
+    ):
+        asr_model = ASRModel(precision=model_precision, compile_mode=model_compile, batching=False)
+        # Cached results would turn the timed passes into lookups
+        asr_model.cache = None
+        await asr_model.load_model()
+        try:
+            # One untimed pass so lazy initialization doesn't skew the timing
+            await asr_model.transcribe(*buffers[0])
+            texts, elapsed = await _run_reference_set(asr_model, buffers)
+        finally:
+            await asr_model.unload_model()
+        report[label] = {
+            "precision": model_precision,
+            "compile_mode": model_compile,
+            "wer": wer(references, texts),
+            "seconds": elapsed,
+        }
+
+    report["wer_delta"] = report["candidate"]["wer"] - report["fp32"]["wer"]
+    report["speedup"] = (
+        report["fp32"]["seconds"] / report["candidate"]["seconds"]
+        if report["candidate"]["seconds"] > 0 else None
+    )
+    return report
+
+
+def snapshot(model_name: str, snapshot_dir: str) -> str:
+    """Download a Hub model once and store it as a local safetensors snapshot"""
+    from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+
+    path = snapshot_path(snapshot_dir, model_name)
+    save_snapshot(
+        Wav2Vec2ForCTC.from_pretrained(model_name),
+        Wav2Vec2Processor.from_pretrained(model_name),
+        path,
+    )
+    return path
+
+
+def export(model_name: str, precision: str, artifact_dir: str) -> str:
+    """Convert a pretrained model and write it as an on-disk artifact"""
+    from transformers import Wav2Vec2ForCTC
+
+    model = Wav2Vec2ForCTC.from_pretrained(model_name).eval()
+    path = artifact_path(artifact_dir, model_name, precision)
+    save_optimized(optimize_model(model, precision), path)
+    return path
+
+
+def main(argv: Optional[List[str]] = None):
+    from kinyvoice_ai.configs.settings import Settings
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(description="Snapshot and export optimized ASR models and check their parity")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write a pre-converted model artifact")
+    export_parser.add_argument("--precision", choices=PRECISIONS[1:], required=True)
+    export_parser.add_argument("--model-name", default=settings.model_name)
+    export_parser.add_argument("--artifact-dir", default=settings.model_artifact_dir)
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="Store a local safetensors snapshot")
+    snapshot_parser.add_argument("--model-name", default=settings.model_name)
+    snapshot_parser.add_argument("--snapshot-dir", default=settings.model_snapshot_dir)
+
+    parity_parser = subparsers.add_parser("parity", help="Report WER delta and speedup against fp32")
+    parity_parser.add_argument("--manifest", required=True, help="TSV of audio_path and reference text")
+    parity_parser.add_argument("--precision", choices=PRECISIONS, required=True)
+    parity_parser.add_argument("--compile-mode", choices=COMPILE_MODES, default="none")
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        print(export(args.model_name, args.precision, args.artifact_dir))
+    elif args.command == "snapshot":
+        print(snapshot(args.model_name, args.snapshot_dir))
+    else:
+        report = asyncio.run(parity_check(args.manifest, args.precision, args.compile_mode))
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from typing import Optional
+
+from kinyvoice_ai.src.model.asr_model import ASRModel
+
+# Process-wide model instance shared by the app and every router
+_asr_model: Optional[ASRModel] = None
+
+def get_asr_model() -> ASRModel:
+    """Return the shared ASR model, creating it on first use.
+
+    Used both directly at startup/shutdown and as a FastAPI dependency, so
+    every router serves requests from the one loaded copy of the weights.
+    """
+    global _asr_model
+    if _asr_model is None:
+        _asr_model = ASRModel()
+    return _asr_model
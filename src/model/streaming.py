@@ -0,0 +1,136 @@
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from kinyvoice_ai.src.model.admission import INTERACTIVE
+from kinyvoice_ai.src.model.alignment import log_softmax_
+from kinyvoice_ai.src.utils.resampling import StreamResampler
+from kinyvoice_ai.src.utils.temperature_scaling import calibrate
+
+logger = logging.getLogger(__name__)
+
+# Shortest input the Wav2Vec2 feature encoder accepts (one 25ms receptive field at 16kHz)
+MIN_WINDOW_SAMPLES = 400
+
+
+class StreamingSession:
+    """Incremental transcription of a live audio stream.
+
+    Audio is appended to a rolling buffer. Once ``chunk_s`` of new audio
+    (plus ``right_context_s`` of lookahead) is available, the model runs over
+    a window that starts ``left_context_s`` before the committed position.
+    Only the frames for the new audio are committed, so each update costs a
+    constant window regardless of how long the stream has been running, and
+    audio that can no longer be used as left context is dropped. The frames
+    in the lookahead region are decoded provisionally for the partial
+    hypothesis and recomputed on the next update. With ``admission``, each
+    model pass holds admission capacity for the seconds of audio it covers.
+    """
+
+    def __init__(
+        self,
+        asr_model,
+        sample_rate: int,
+        chunk_s: float = 1.0,
+        left_context_s: float = 2.0,
+        right_context_s: float = 0.5,
+        admission=None,
+    ):
+        self.asr_model = asr_model
+        self.admission = admission
+        self.input_sample_rate = sample_rate
+        rate = asr_model.sample_rate
+        self.chunk = int(chunk_s * rate)
+        self.left_context = int(left_context_s * rate)
+        self.right_context = int(right_context_s * rate)
+
+        import torch
+
+        # Keeps filter history between frames so the stream is resampled contiguously
+        self._resampler = StreamResampler(sample_rate, rate)
+        self._buffer = torch.zeros(0, dtype=torch.float32)
+        self._buffer_offset = 0  # absolute sample index of _buffer[0]
+        self._committed = 0  # absolute sample index up to which frames are final
+        self._ids: List[int] = []
+        self._log_probs: List[float] = []
+        self._last_partial = ""
+
+    @property
+    def total_samples(self) -> int:
+        return self._buffer_offset + int(self._buffer.shape[-1])
+
+    async def feed(self, audio: np.ndarray) -> Optional[str]:
+        """Append decoded PCM and return a new partial hypothesis, if any"""
+        waveform = await self.asr_model.executor.run(self._resampler.process, audio)
+        self._append(waveform)
+
+        if self.total_samples - self._committed < self.chunk + self.right_context:
+            return None
+
+        async with self._admit():
+            partial = await self.asr_model.executor.run(self._process, False)
+        if partial == self._last_partial:
+            return None
+        self._last_partial = partial
+        return partial
+
+    async def finish(self) -> Tuple[str, float]:
+        """Commit the remaining audio and return the final text and confidence"""
+        self._append(self._resampler.flush())
+        if self.total_samples > self._committed:
+            async with self._admit():
+                await self.asr_model.executor.run(self._process, True)
+        text = self.asr_model.processor.decode(self._ids) if self._ids else ""
+        confidence = (
+            calibrate(float(np.mean(self._log_probs)), self.asr_model.temperature)
+            if self._log_probs else 0.0
+        )
+        return text, confidence
+
+    def _append(self, waveform):
+        """Extend the rolling buffer with resampled audio"""
+        import torch
+
+        self._buffer = torch.cat([self._buffer, waveform])
+
+    def _admit(self):
+        """Admission for one model pass over the current window"""
+        if self.admission is None:
+            return nullcontext()
+        window_start = max(self._buffer_offset, self._committed - self.left_context)
+        window_s = (self.total_samples - window_start) / self.asr_model.sample_rate
+        return self.admission.admit(window_s, priority=INTERACTIVE)
+
+    def _process(self, final: bool) -> str:
+        """Run the model over the current window and commit its new frames"""
+        window_start = max(self._buffer_offset, self._committed - self.left_context)
+        window = self._buffer[window_start - self._buffer_offset:]
+        commit_end = self.total_samples if final else self.total_samples - self.right_context
+
+        if window.shape[-1] < MIN_WINDOW_SAMPLES:
+            self._committed = commit_end
+            return self.asr_model.processor.decode(self._ids)
+
+        import torch
+
+        logits = self.asr_model._forward_logits([window])[0]
+        with torch.no_grad():
+            best_log_probs, predicted_ids = log_softmax_(logits).max(dim=-1)
+
+        samples_per_frame = window.shape[-1] / logits.shape[0]
+        first = int(round((self._committed - window_start) / samples_per_frame))
+        last = int(round((commit_end - window_start) / samples_per_frame))
+        self._ids.extend(predicted_ids[first:last].tolist())
+        self._log_probs.extend(best_log_probs[first:last].tolist())
+        provisional = predicted_ids[last:].tolist()
+        self._committed = commit_end
+
+        # Drop audio that can no longer be part of a left context
+        drop = self._committed - self.left_context - self._buffer_offset
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._buffer_offset += drop
+
+        return self.asr_model.processor.decode(self._ids + provisional)
@@ -1,38 +1,116 @@
 import soundfile as sf
 import numpy as np
-from typing import Tuple
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 import logging
 
+from kinyvoice_ai.src.utils.telemetry import STAGE_SECONDS
+from kinyvoice_ai.src.utils.resampling import resample
+
 logger = logging.getLogger(__name__)
 
-def validate_audio_file(file) -> bool:
-    """Validate audio file format and properties"""
+MAX_DURATION_S = 10 * 60  # 10 minutes
+MIN_DURATION_S = 0.1
+SUPPORTED_FORMATS = ("WAV", "FLAC", "OGG", "MP3")
+# Frames decoded per read, ~256KB per channel of float32
+DECODE_BLOCK_FRAMES = 64 * 1024
+
+class AudioInfo(NamedTuple):
+    """Container metadata read from the header, without decoding samples"""
+    frames: int
+    sample_rate: int
+    channels: int
+    format: str
+    subtype: str
+    
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+def probe_audio(file) -> AudioInfo:
+    """Read the header of a path or file object, leaving its position unchanged"""
+    position = file.tell() if hasattr(file, "tell") else None
     try:
-        # Read audio file
-        data, sample_rate = sf.read(file)
-        
-        # Check if audio is not empty
-        if len(data) == 0:
-            logger.error("Empty audio file")
-            return False
-        
-        # Check if audio is not too long (e.g., max 10 minutes)
-        max_duration = 10 * 60  # 10 minutes in seconds
-        if len(data) / sample_rate > max_duration:
-            logger.error("Audio file too long")
-            return False
-        
-        # Check if audio is not too short (e.g., min 0.1 seconds)
-        min_duration = 0.1  # 0.1 seconds
-        if len(data) / sample_rate < min_duration:
-            logger.error("Audio file too short")
-            return False
-        
-        return True
+        with sf.SoundFile(file) as f:
+            return AudioInfo(f.frames, f.samplerate, f.channels, f.format, f.subtype)
+    finally:
+        if position is not None:
+            file.seek(position)
+
+def check_audio_info(
+    info: AudioInfo,
+    max_duration_s: float = MAX_DURATION_S,
+    min_duration_s: float = MIN_DURATION_S,
+    formats: Sequence[str] = SUPPORTED_FORMATS
+) -> Optional[str]:
+    """Return why audio with this header would be rejected, or None if it is acceptable"""
+    if info.format not in formats:
+        return f"Unsupported audio format: {info.format}"
+    if info.frames <= 0 or info.sample_rate <= 0:
+        return "Empty audio file"
+    if info.duration > max_duration_s:
+        return f"Audio file too long: {info.duration:.1f}s exceeds the {max_duration_s:.0f}s limit"
+    if info.duration < min_duration_s:
+        return f"Audio file too short: {info.duration:.2f}s is below the {min_duration_s:.2f}s minimum"
+    return None
+
+def decode_audio(file, block_frames: int = DECODE_BLOCK_FRAMES) -> Tuple[np.ndarray, int]:
+    """Decode an audio file once into a float32 (frames, channels) buffer.
+    
+    The buffer is allocated once from the frame count in the header and
+    filled block by block, so no intermediate copies of the whole signal
+    are made.
+    """
+    with STAGE_SECONDS.time(stage="audio_decode"), sf.SoundFile(file) as f:
+        if f.frames <= 0 or not f.seekable():
+            # Length unknown up front; let soundfile grow the buffer
+            return f.read(dtype="float32", always_2d=True), f.samplerate
         
+        data = np.empty((f.frames, f.channels), dtype=np.float32)
+        filled = 0
+        while filled < len(data):
+            block = f.read(dtype="float32", always_2d=True, out=data[filled:filled + block_frames])
+            if len(block) == 0:
+                break
+            filled += len(block)
+        # Some headers overstate the length (e.g. estimated MP3 frame counts)
+        return data[:filled], f.samplerate
+
+def validate_audio(
+    data: np.ndarray,
+    sample_rate: int,
+    max_duration_s: float = MAX_DURATION_S,
+    min_duration_s: float = MIN_DURATION_S
+) -> bool:
+    """Validate properties of an already decoded audio buffer"""
+    # Check if audio is not empty
+    if len(data) == 0:
+        logger.error("Empty audio file")
+        return False
+    
+    # Check if audio is not too long
+    if len(data) / sample_rate > max_duration_s:
+        logger.error("Audio file too long")
+        return False
+    
+    # Check if audio is not too short
+    if len(data) / sample_rate < min_duration_s:
+        logger.error("Audio file too short")
+        return False
+    
+    return True
+
+def validate_audio_file(file) -> bool:
+    """Validate audio file format and duration from its header alone"""
+    try:
+        reason = check_audio_info(probe_audio(file))
     except Exception as e:
         logger.error(f"Error validating audio file: {e}")
         return False
+    
+    if reason is not None:
+        logger.error(reason)
+        return False
+    return True
 
 def normalize_audio(audio: np.ndarray) -> np.ndarray:
     """Normalize audio to have zero mean and unit variance"""
@@ -46,19 +124,73 @@ def trim_silence(audio: np.ndarray, threshold: float = 0.01) -> np.ndarray:
     end = len(audio) - np.argmax(mask[::-1])
     return audio[start:end]
 
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return start and end indices of the True runs in a boolean mask"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def detect_speech_segments(
+    audio: np.ndarray,
+    sample_rate: int,
+    frame_ms: float = 30.0,
+    threshold_db: float = 12.0,
+    floor_db: float = -50.0,
+    noise_ceiling_db: float = -40.0,
+    min_speech_ms: float = 250.0,
+    min_silence_ms: float = 300.0,
+    padding_ms: float = 150.0
+) -> List[Tuple[int, int]]:
+    """Split mono audio into speech regions using frame energy.
+    
+    A frame counts as speech when its RMS level is ``threshold_db`` above the
+    estimated noise floor and above ``floor_db``. The noise floor is the
+    10th percentile of frame levels capped at ``noise_ceiling_db``, since in
+    a clip that is speech throughout the percentile lands on quiet speech.
+    Gaps shorter than ``min_silence_ms`` are bridged, regions
+    shorter than ``min_speech_ms`` are dropped and each region is padded by
+    ``padding_ms``. Returns ``(start, end)`` sample indices.
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    num_frames = int(np.ceil(len(audio) / frame_len))
+    if num_frames == 0:
+        return []
+    
+    # Frame energies in one pass over a zero-padded (frames, frame_len) view
+    padded = np.zeros(num_frames * frame_len, dtype=np.float32)
+    padded[:len(audio)] = audio
+    frames = padded.reshape(num_frames, frame_len)
+    rms_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    
+    noise_floor = min(np.percentile(rms_db, 10), noise_ceiling_db)
+    speech = rms_db > max(noise_floor + threshold_db, floor_db)
+    
+    # Bridge short pauses inside speech
+    starts, ends = _runs(~speech)
+    min_silence = int(np.ceil(min_silence_ms / frame_ms))
+    inner = (starts > 0) & (ends < num_frames) & (ends - starts < min_silence)
+    for start, end in zip(starts[inner], ends[inner]):
+        speech[start:end] = True
+    
+    # Drop blips that are too short to be speech
+    starts, ends = _runs(speech)
+    keep = (ends - starts) >= int(np.ceil(min_speech_ms / frame_ms))
+    
+    padding = int(sample_rate * padding_ms / 1000)
+    segments = []
+    for start, end in zip(starts[keep] * frame_len, ends[keep] * frame_len):
+        start = max(0, int(start) - padding)
+        end = min(len(audio), int(end) + padding)
+        # Padding may make neighbouring regions touch; merge them
+        if segments and start <= segments[-1][1]:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+    return segments
+
 def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
     """Resample audio to target sample rate"""
     if orig_sr == target_sr:
         return audio
     
-    # Calculate number of samples in resampled audio
-    n_samples = int(len(audio) * target_sr / orig_sr)
-    
-    # Resample using linear interpolation
-    resampled = np.interp(
-        np.linspace(0, len(audio), n_samples),
-        np.arange(len(audio)),
-        audio
-    )
-    
-    return resampled 
\ No newline at end of file
+    # Band-limited polyphase resampling, shared with the model's input path
+    return resample(audio, orig_sr, target_sr, mono=False).numpy()
@@ -1,5 +1,6 @@
+import re
 from jiwer import wer as jiwer_wer, cer as jiwer_cer
-from typing import Optional
+from typing import List, Optional, Sequence
 
 def calculate_wer(reference: Optional[str], hypothesis: str) -> Optional[float]:
     """Calculate Word Error Rate (WER) between reference and hypothesis."""
@@ -11,4 +12,129 @@ def calculate_cer(reference: Optional[str], hypothesis: str) -> Optional[float]:
     """Calculate Character Error Rate (CER) between reference and hypothesis."""
     if reference is None:
         return None
-    return jiwer_cer(reference, hypothesis) 
\ No newline at end of file
+    return jiwer_cer(reference, hypothesis) 
+# Letters (any script), digits and the apostrophe of Kinyarwanda contractions survive normalization
+_NORMALIZE_PATTERN = re.compile(r"[^\w']+|_")
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace before scoring"""
+    return " ".join(_NORMALIZE_PATTERN.sub(" ", text.lower()).split())
+
+class ErrorCounts:
+    """Edit operations of an alignment, summable across utterances.
+    
+    Corpus rates are total errors over total reference tokens, so long
+    utterances weigh in proportion to their length instead of each
+    utterance's rate counting equally.
+    """
+    
+    __slots__ = ("substitutions", "deletions", "insertions", "reference_length")
+    
+    def __init__(self, substitutions: int = 0, deletions: int = 0, insertions: int = 0, reference_length: int = 0):
+        self.substitutions = substitutions
+        self.deletions = deletions
+        self.insertions = insertions
+        self.reference_length = reference_length
+    
+    def __iadd__(self, other: "ErrorCounts") -> "ErrorCounts":
+        self.substitutions += other.substitutions
+        self.deletions += other.deletions
+        self.insertions += other.insertions
+        self.reference_length += other.reference_length
+        return self
+    
+    @property
+    def errors(self) -> int:
+        return self.substitutions + self.deletions + self.insertions
+    
+    @property
+    def rate(self) -> Optional[float]:
+        if self.reference_length == 0:
+            return None
+        return self.errors / self.reference_length
+    
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "ErrorCounts":
+        return cls(**{name: int(data.get(name, 0)) for name in cls.__slots__})
+
+def align_counts(reference: Sequence, hypothesis: Sequence) -> ErrorCounts:
+    """Substitutions, deletions and insertions of a minimum edit distance alignment"""
+    reference, hypothesis = list(reference), list(hypothesis)
+    reference_length = len(reference)
+    
+    # Shared prefixes and suffixes are hits in some optimal alignment
+    start = 0
+    while start < min(len(reference), len(hypothesis)) and reference[start] == hypothesis[start]:
+        start += 1
+    end = 0
+    while (
+        end < min(len(reference), len(hypothesis)) - start
+        and reference[-1 - end] == hypothesis[-1 - end]
+    ):
+        end += 1
+    reference = reference[start:len(reference) - end]
+    hypothesis = hypothesis[start:len(hypothesis) - end]
+    
+    if not reference:
+        return ErrorCounts(0, 0, len(hypothesis), reference_length)
+    if not hypothesis:
+        return ErrorCounts(0, len(reference), 0, reference_length)
+    
+    # One row of (cost, substitutions, deletions, insertions) per reference prefix
+    previous = [(j, 0, 0, j) for j in range(len(hypothesis) + 1)]
+    for i, ref_token in enumerate(reference, 1):
+        current = [(i, 0, i, 0)]
+        for j, hyp_token in enumerate(hypothesis, 1):
+            cost, s, d, ins = previous[j - 1]
+            best = (cost, s, d, ins) if ref_token == hyp_token else (cost + 1, s + 1, d, ins)
+            cost, s, d, ins = previous[j]
+            if cost + 1 < best[0]:
+                best = (cost + 1, s, d + 1, ins)
+            cost, s, d, ins = current[j - 1]
+            if cost + 1 < best[0]:
+                best = (cost + 1, s, d, ins + 1)
+            current.append(best)
+        previous = current
+    
+    _, substitutions, deletions, insertions = previous[-1]
+    return ErrorCounts(substitutions, deletions, insertions, reference_length)
+
+def word_error_counts(reference: str, hypothesis: str) -> ErrorCounts:
+    """Word-level alignment counts of two already normalized strings"""
+    return align_counts(reference.split(), hypothesis.split())
+
+def char_error_counts(reference: str, hypothesis: str) -> ErrorCounts:
+    """Character-level alignment counts, spaces included as jiwer does"""
+    return align_counts(reference, hypothesis)
+
+def hypothesis_hits(reference: Sequence, hypothesis: Sequence) -> List[bool]:
+    """For each hypothesis token, whether a minimum edit distance alignment matches it"""
+    reference, hypothesis = list(reference), list(hypothesis)
+    rows, cols = len(reference) + 1, len(hypothesis) + 1
+    cost = [[0] * cols for _ in range(rows)]
+    for i in range(rows):
+        cost[i][0] = i
+    for j in range(cols):
+        cost[0][j] = j
+    for i in range(1, rows):
+        for j in range(1, cols):
+            cost[i][j] = min(
+                cost[i - 1][j - 1] + (reference[i - 1] != hypothesis[j - 1]),
+                cost[i - 1][j] + 1,
+                cost[i][j - 1] + 1,
+            )
+    
+    hits = [False] * len(hypothesis)
+    i, j = rows - 1, cols - 1
+    while i > 0 and j > 0:
+        if cost[i][j] == cost[i - 1][j - 1] + (reference[i - 1] != hypothesis[j - 1]):
+            hits[j - 1] = reference[i - 1] == hypothesis[j - 1]
+            i, j = i - 1, j - 1
+        elif cost[i][j] == cost[i][j - 1] + 1:
+            j -= 1
+        else:
+            i -= 1
+    return hits
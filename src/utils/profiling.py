@@ -0,0 +1,290 @@
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set
+import logging
+
+from kinyvoice_ai.configs.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Request header that asks for a profile of that one request
+PROFILE_HEADER = "x-profile"
+# Response header naming the stored trace
+PROFILE_ID_HEADER = "x-profile-id"
+
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+# Innermost frames in these files are threads parked on a queue or lock
+_IDLE_FILES = {"threading.py", "queue.py", "selectors.py"}
+
+# Profile of the request being served, if it is profiled. Requests that are
+# not profiled pay for one lookup of it per section and nothing else.
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+# torch.profiler cannot be nested or run on two threads at once; sections that
+# find it busy record their wall time only
+_operator_lock = threading.Lock()
+
+
+def current_profile() -> Optional["RequestProfile"]:
+    """Profile of the request being served, or None when it is not profiled"""
+    return _current.get()
+
+
+class StackSampler:
+    """Samples Python thread stacks from a background thread.
+
+    Only the threads returned by ``threads`` at each sample are recorded,
+    or every thread when it is None. Stacks are kept as collapsed
+    ``thread;outer;...;inner`` strings with sample counts, the input format
+    of flamegraph tools. Threads idling in a queue or lock wait are left out.
+    """
+
+    def __init__(
+        self,
+        interval_s: float = 0.01,
+        max_depth: int = 64,
+        threads: Optional[Callable[[], Set[int]]] = None
+    ):
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.threads = threads
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        """Stop sampling and return the collapsed stack counts"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return dict(self.counts)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            wanted = self.threads() if self.threads is not None else None
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (wanted is not None and ident not in wanted):
+                    continue
+                if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class RequestProfile:
+    """Operator timings, section wall times and stack samples of one request"""
+
+    def __init__(self, trace_id: str, method: str, path: str, top_operators: int = 50):
+        self.trace_id = trace_id
+        self.method = method
+        self.path = path
+        self.top_operators = top_operators
+        self.created_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.sections: Dict[str, dict] = {}
+        self.operators: Dict[str, dict] = {}
+        # Open sections per thread ident
+        self._running: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def active_threads(self) -> Set[int]:
+        """Idents of the threads currently inside one of this request's sections"""
+        with self._lock:
+            return set(self._running)
+
+    @contextmanager
+    def section(self, name: str, operators: bool = True):
+        """Time a block; with ``operators``, record the torch ops run on this thread"""
+        profiler = None
+        if operators and _operator_lock.acquire(blocking=False):
+            try:
+                # torch is only imported once something is actually profiled
+                from torch.profiler import profile, ProfilerActivity
+                profiler = profile(activities=[ProfilerActivity.CPU])
+                profiler.__enter__()
+            except Exception:
+                _operator_lock.release()
+                profiler = None
+                logger.warning("torch profiler unavailable; recording wall time only", exc_info=True)
+        ident = threading.get_ident()
+        with self._lock:
+            self._running[ident] = self._running.get(ident, 0) + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                if self._running[ident] == 1:
+                    del self._running[ident]
+                else:
+                    self._running[ident] -= 1
+            events = None
+            if profiler is not None:
+                try:
+                    profiler.__exit__(None, None, None)
+                    events = profiler.key_averages()
+                finally:
+                    _operator_lock.release()
+            self._record(name, elapsed, events)
+
+    def _record(self, name: str, elapsed: float, events):
+        with self._lock:
+            section = self.sections.setdefault(name, {"calls": 0, "seconds": 0.0})
+            section["calls"] += 1
+            section["seconds"] += elapsed
+            for event in events or ():
+                stats = self.operators.setdefault(
+                    event.key, {"calls": 0, "cpu_time_us": 0.0, "self_cpu_time_us": 0.0}
+                )
+                stats["calls"] += event.count
+                stats["cpu_time_us"] += event.cpu_time_total
+                stats["self_cpu_time_us"] += event.self_cpu_time_total
+
+    def to_dict(self, status: Optional[int], stacks: Dict[str, int], samples: int) -> dict:
+        operators = sorted(
+            ({"name": name, **stats} for name, stats in self.operators.items()),
+            key=lambda stats: stats["self_cpu_time_us"],
+            reverse=True,
+        )
+        return {
+            "id": self.trace_id,
+            "created_at": self.created_at.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration_s": time.perf_counter() - self.started,
+            "sections": self.sections,
+            "operators": operators[:self.top_operators],
+            "stack_samples": samples,
+            "stacks": stacks,
+        }
+
+
+@contextmanager
+def activate(profile: RequestProfile):
+    """Make ``profile`` the current one for the code run inside the block"""
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def profiled(name: str, operators: bool = True):
+    """Record a section of the current request's profile; a no-op when it is not profiled"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    with profile.section(name, operators):
+        yield
+
+
+class TraceStore:
+    """Bounded on-disk ring buffer of profile traces.
+
+    Each trace is one JSON file named by its creation time and id; once
+    there are more than ``max_traces``, the oldest are deleted.
+    """
+
+    def __init__(self, directory: str, max_traces: int = 100):
+        self.directory = directory
+        self.max_traces = max(1, max_traces)
+        self._lock = threading.Lock()
+
+    def _files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def save(self, trace: dict):
+        """Write a trace and drop the oldest ones beyond the limit (blocking)"""
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{int(time.time() * 1000):013d}-{trace['id']}.json"
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            files = self._files()
+            for stale in files[:max(0, len(files) - self.max_traces)]:
+                try:
+                    os.remove(os.path.join(self.directory, stale))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[dict]:
+        """Stored traces, newest first"""
+        traces = []
+        for name in reversed(self._files()):
+            created_ms, trace_id = name[:-len(".json")].split("-", 1)
+            traces.append({
+                "id": trace_id,
+                "created_at": datetime.fromtimestamp(int(created_ms) / 1000, timezone.utc).isoformat(),
+                "size_bytes": os.path.getsize(os.path.join(self.directory, name)),
+            })
+        return traces
+
+    def path(self, trace_id: str) -> Optional[str]:
+        """File of a stored trace, or None if it is unknown or already rotated out"""
+        if not _TRACE_ID.match(trace_id):
+            return None
+        suffix = f"-{trace_id}.json"
+        for name in self._files():
+            if name.endswith(suffix):
+                return os.path.join(self.directory, name)
+        return None
+
+    def load(self, trace_id: str) -> Optional[dict]:
+        """A stored trace, or None if it is unknown or already rotated out"""
+        path = self.path(trace_id)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            # Rotated out between finding and opening it
+            return None
+
+
+def collapsed_stacks(trace: dict) -> str:
+    """A trace's stack samples in the collapsed format flamegraph tools read"""
+    return "".join(f"{stack} {count}\n" for stack, count in trace["stacks"].items())
+
+
+# Process-wide trace store shared by the middleware and the admin router
+_store: Optional[TraceStore] = None
+
+def get_trace_store() -> TraceStore:
+    """Return the shared trace store, creating it on first use"""
+    global _store
+    if _store is None:
+        _store = TraceStore(settings.profiling_trace_dir, settings.profiling_max_traces)
+    return _store
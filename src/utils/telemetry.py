@@ -0,0 +1,300 @@
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond stages to long-form audio
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    """Base for metrics with optional labels; children are kept per label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            # Unlabelled metrics are exported from the start, even at zero
+            self._children[()] = self._new_child()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _child(self, labels: Dict[str, str]):
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """State of one label combination"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    @abstractmethod
+    def _render_child(self, key, child) -> List[str]:
+        """Exposition lines of one label combination"""
+
+
+class _Value:
+    __slots__ = ("value", "lock", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+        self.function: Optional[Callable[[], float]] = None
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. errors by type"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0, **labels):
+        child = self._child(labels)
+        with child.lock:
+            child.value += amount
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is computed at scrape time by ``set_function``"""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float, **labels):
+        child = self._child(labels)
+        with child.lock:
+            child.value = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        child = self._child(labels)
+        with child.lock:
+            child.value += amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        self._child(labels).function = function
+
+    def track_inprogress(self, **labels) -> "_InProgress":
+        """Context manager that counts the code blocks currently inside it"""
+        return _InProgress(self, labels)
+
+    def _render_child(self, key, child) -> List[str]:
+        value = child.value
+        if child.function is not None:
+            try:
+                value = child.function()
+            except Exception:
+                value = float("nan")
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum", "lock")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, e.g. seconds spent per pipeline stage"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry=None,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        # One slot per bucket plus the implicit +Inf bucket
+        return _HistogramValue(len(self.buckets) + 1)
+
+    def observe(self, value: float, **labels):
+        child = self._child(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with child.lock:
+            child.counts[index] += 1
+            child.sum += value
+
+    def time(self, **labels) -> "Timer":
+        """Context manager observing the seconds spent inside it"""
+        return Timer(self, labels)
+
+    def _render_child(self, key, child) -> List[str]:
+        with child.lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Timer:
+    """Low-overhead ``with`` timer: two ``perf_counter`` calls and one observe.
+
+    Usable from worker threads as well as coroutines. The elapsed seconds
+    are kept on ``elapsed`` so callers can reuse the measurement.
+    """
+
+    __slots__ = ("histogram", "labels", "started", "elapsed")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.started
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class _InProgress:
+    __slots__ = ("gauge", "labels")
+
+    def __init__(self, gauge: Gauge, labels: Dict[str, str]):
+        self.gauge = gauge
+        self.labels = labels
+
+    def __enter__(self):
+        self.gauge.inc(**self.labels)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.gauge.dec(**self.labels)
+        return False
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Shared instruments for the serving pipeline. Stages: audio_decode, resample,
+# vad, forward, decode_text, confidence, db_insert.
+STAGE_SECONDS = Histogram(
+    "kinyvoice_stage_seconds", "Seconds spent in each pipeline stage", ["stage"]
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "kinyvoice_queue_wait_seconds", "Seconds work waited before it started", ["queue"]
+)
+REQUEST_SECONDS = Histogram(
+    "kinyvoice_request_seconds", "End-to-end HTTP request latency", ["route"]
+)
+IN_FLIGHT_REQUESTS = Gauge(
+    "kinyvoice_in_flight_requests", "HTTP requests currently being served"
+)
+BATCH_SIZE = Histogram(
+    "kinyvoice_batch_size", "Requests per batched forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+LAST_BATCH_SIZE = Gauge(
+    "kinyvoice_last_batch_size", "Requests in the most recent batched forward pass"
+)
+MODEL_MEMORY_BYTES = Gauge(
+    "kinyvoice_model_memory_bytes", "Memory held by the loaded model", ["kind"]
+)
+ADMITTED_AUDIO_SECONDS = Gauge(
+    "kinyvoice_admitted_audio_seconds", "Audio seconds admitted and not yet finished", ["priority"]
+)
+ADMISSION_REJECTIONS = Counter(
+    "kinyvoice_admission_rejections_total", "Requests shed by admission control", ["priority", "reason"]
+)
+ERRORS = Counter(
+    "kinyvoice_errors_total", "Errors by pipeline stage and exception type", ["stage", "type"]
+)
+
+
+def record_error(stage: str, error: BaseException):
+    """Count ``error`` against ``stage``, labelled by its exception class"""
+    ERRORS.inc(stage=stage, type=type(error).__name__)
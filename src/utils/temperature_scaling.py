@@ -0,0 +1,95 @@
+import json
+import math
+import os
+from typing import Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keeps log() finite for confidences of exactly 0 or 1
+_EPS = 1e-6
+
+
+def calibrate(mean_log_prob: float, temperature: float = 1.0) -> float:
+    """Calibrated confidence of a span from its mean per-frame log-probability.
+
+    The temperature divides the log-confidence, ``exp(mean_log_prob / T)``:
+    T > 1 raises over-cautious scores, T < 1 tempers over-confident ones.
+    Unlike a temperature on the logits, it only needs the mean log-probability
+    of each span, so it can be refit from stored results without the logits.
+    """
+    return math.exp(mean_log_prob / temperature)
+
+
+def _nll(log_scores: np.ndarray, labels: np.ndarray, temperature: float) -> float:
+    confidences = np.clip(np.exp(log_scores / temperature), _EPS, 1.0 - _EPS)
+    return float(-np.mean(labels * np.log(confidences) + (1 - labels) * np.log(1.0 - confidences)))
+
+
+def fit_temperature(
+    log_scores: Sequence[float],
+    labels: Sequence[int],
+    bounds: Tuple[float, float] = (0.05, 20.0),
+    iterations: int = 60
+) -> float:
+    """Temperature minimizing the negative log-likelihood of correctness labels.
+
+    ``log_scores`` are uncalibrated mean log-probabilities (T = 1) and
+    ``labels`` 1 where the word was right. The NLL is unimodal in log T for
+    these scores, so a golden-section search over ``bounds`` suffices.
+    """
+    scores = np.asarray(log_scores, dtype=np.float64)
+    targets = np.asarray(labels, dtype=np.float64)
+    if scores.size == 0:
+        raise ValueError("No scored words to fit a temperature on")
+
+    low, high = math.log(bounds[0]), math.log(bounds[1])
+    ratio = (math.sqrt(5.0) - 1.0) / 2.0
+    a = high - ratio * (high - low)
+    b = low + ratio * (high - low)
+    loss_a = _nll(scores, targets, math.exp(a))
+    loss_b = _nll(scores, targets, math.exp(b))
+    for _ in range(iterations):
+        if loss_a < loss_b:
+            high, b, loss_b = b, a, loss_a
+            a = high - ratio * (high - low)
+            loss_a = _nll(scores, targets, math.exp(a))
+        else:
+            low, a, loss_a = a, b, loss_b
+            b = low + ratio * (high - low)
+            loss_b = _nll(scores, targets, math.exp(b))
+    return math.exp((low + high) / 2.0)
+
+
+def expected_calibration_error(confidences: Sequence[float], labels: Sequence[int], bins: int = 10) -> float:
+    """Gap between confidence and accuracy, averaged over equal-width bins by their size"""
+    confidences = np.asarray(confidences, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+    if confidences.size == 0:
+        return 0.0
+    indices = np.minimum((confidences * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in range(bins):
+        in_bin = indices == b
+        if in_bin.any():
+            error += in_bin.mean() * abs(confidences[in_bin].mean() - labels[in_bin].mean())
+    return float(error)
+
+
+def load_temperature(path: Optional[str], default: float = 1.0) -> float:
+    """Temperature saved by ``save_temperature``, or ``default`` if there is none"""
+    if not path or not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        temperature = float(json.load(f)["temperature"])
+    logger.info(f"Using confidence temperature {temperature:.3f} from {path}")
+    return temperature
+
+
+def save_temperature(path: str, temperature: float, **stats):
+    """Write a fitted temperature, with fit statistics for reference"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"temperature": temperature, **stats}, f, indent=2)
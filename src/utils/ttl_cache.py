@@ -0,0 +1,64 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """Short-lived async response cache with single-flight refreshes.
+    
+    Values expire ``ttl_s`` seconds after they were computed. Concurrent
+    misses for the same key share one in-flight computation, so a burst of
+    dashboard polls triggers at most one database query per key and TTL.
+    """
+    
+    def __init__(self, ttl_s: float, max_entries: int = 256):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_s:
+            self.hits += 1
+            return entry[1]
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.hits += 1
+            return await asyncio.shield(in_flight)
+        
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Avoid "exception was never retrieved" when nobody else waited
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._store(key, value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+    
+    def _store(self, key: Hashable, value: Any):
+        if len(self._entries) >= self.max_entries:
+            # Drop expired entries first, then the oldest ones
+            now = time.monotonic()
+            for stale in [k for k, (at, _) in self._entries.items() if now - at >= self.ttl_s]:
+                del self._entries[stale]
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic(), value)
+    
+    def clear(self):
+        self._entries.clear()
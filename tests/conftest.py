@@ -0,0 +1,15 @@
+import importlib.util
+import os
+import sys
+
+# The repository root is the ``kinyvoice_ai`` package; register it under that
+# name when the checkout lives in a directory called something else
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if importlib.util.find_spec("kinyvoice_ai") is None:
+    spec = importlib.util.spec_from_file_location(
+        "kinyvoice_ai", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["kinyvoice_ai"] = package
+    spec.loader.exec_module(package)
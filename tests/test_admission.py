@@ -0,0 +1,225 @@
+import asyncio
+
+import pytest
+
+from kinyvoice_ai.src.model.admission import (
+    BULK, INTERACTIVE, AdmissionController, AdmissionRejected
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def controller(**kwargs):
+    kwargs.setdefault("capacity_audio_s", 100.0)
+    kwargs.setdefault("nominal_rate", 10.0)
+    kwargs.setdefault("max_queue_wait_s", 60.0)
+    kwargs.setdefault("clock", FakeClock())
+    return AdmissionController(**kwargs)
+
+
+async def hold(admission, audio_seconds, priority=INTERACTIVE):
+    """Enter an admission block and return it so the test decides when it ends"""
+    block = admission.admit(audio_seconds, priority=priority)
+    await block.__aenter__()
+    return block
+
+
+async def release(block):
+    await block.__aexit__(None, None, None)
+
+
+async def settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_deadline_and_capacity_rejections_are_split():
+    async def scenario():
+        admission = controller(max_queue_wait_s=5.0)
+        holder = await hold(admission, 100.0)
+
+        # 80s of excess audio at 10 audio-s/s is an 8s wait, over the 5s queue limit
+        with pytest.raises(AdmissionRejected) as capacity:
+            async with admission.admit(80.0):
+                pass
+        # A 3s wait fits the queue limit but not a 2s deadline
+        with pytest.raises(AdmissionRejected) as deadline:
+            async with admission.admit(30.0, deadline_s=2.0):
+                pass
+        await release(holder)
+
+        # Processing alone overruns the deadline, even on an idle server
+        with pytest.raises(AdmissionRejected) as too_slow:
+            async with admission.admit(10.0, deadline_s=1.0, service_s=1.5):
+                pass
+        return admission, capacity.value, deadline.value, too_slow.value
+
+    admission, capacity, deadline, too_slow = asyncio.run(scenario())
+    assert (capacity.status_code, capacity.retry_after) == (429, "8")
+    assert (deadline.status_code, deadline.retry_after) == (503, "3")
+    assert too_slow.status_code == 503
+    assert admission.rejected == 3
+    assert admission.admitted_audio_s == 0
+
+
+def test_drain_rate_follows_the_injected_clock():
+    async def scenario():
+        clock = FakeClock()
+        admission = controller(clock=clock)
+        for _ in range(3):
+            async with admission.admit(20.0):
+                clock.now += 2.0
+        return admission
+
+    admission = asyncio.run(scenario())
+    # 60 audio seconds finished between t=1002 and t=1006, measured at t=1006
+    assert admission.drain_rate() == pytest.approx(60.0 / 4.0)
+    assert admission.estimate_wait_s(130.0) == pytest.approx(30.0 / 15.0)
+
+
+def test_bulk_work_is_held_to_its_share():
+    async def scenario():
+        admission = controller(bulk_share=0.5)
+        first = await hold(admission, 40.0, BULK)
+        second = asyncio.create_task(hold(admission, 20.0, BULK))
+        await settle()
+        assert not second.done()
+
+        # Interactive requests still find the headroom bulk work may not use
+        interactive = await hold(admission, 50.0)
+        assert admission.report()["admitted_audio_s"] == {"interactive": 50.0, "bulk": 40.0}
+
+        await release(first)
+        await release(await second)
+        await release(interactive)
+
+        # A bulk request larger than the share runs when no other bulk work does
+        oversized = await hold(admission, 80.0, BULK)
+        await release(oversized)
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.admitted_audio_s == 0
+
+
+def test_head_of_line_waiter_is_served_first():
+    async def scenario():
+        admission = controller()
+        holder = await hold(admission, 90.0)
+        order = []
+
+        async def request(name, cost, priority):
+            async with admission.admit(cost, priority=priority):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        bulk = asyncio.create_task(request("bulk", 30.0, BULK))
+        await settle()
+        large = asyncio.create_task(request("large", 80.0, INTERACTIVE))
+        await settle()
+        # Would fit next to the holder, but may not overtake the waiter ahead of it
+        small = asyncio.create_task(request("small", 10.0, INTERACTIVE))
+        await settle()
+        assert order == []
+        assert admission.report()["waiting"] == {"interactive": 2, "bulk": 1}
+
+        await release(holder)
+        await asyncio.gather(bulk, large, small)
+        return admission, order
+
+    admission, order = asyncio.run(scenario())
+    # Both interactive requests fit once the holder leaves; bulk waits for them
+    assert sorted(order[:2]) == ["large", "small"]
+    assert order[2] == "bulk"
+    assert admission.admitted_audio_s == 0
+
+
+def test_grant_racing_the_queue_timeout_keeps_the_slot(monkeypatch):
+    async def scenario():
+        admission = controller()
+        holder = await hold(admission, 100.0)
+
+        async def grant_then_time_out(futures, timeout):
+            # Capacity frees up and the waiter is granted in the same step the timeout fires
+            await release(holder)
+            return set(), set(futures)
+
+        with monkeypatch.context() as patch:
+            patch.setattr("kinyvoice_ai.src.model.admission.asyncio.wait", grant_then_time_out)
+            block = await hold(admission, 30.0)
+        admitted = admission.admitted_audio_s
+        await release(block)
+        return admission, admitted
+
+    admission, admitted = asyncio.run(scenario())
+    assert admitted == 30.0
+    assert admission.rejected == 0
+    assert admission.admitted_audio_s == 0
+
+
+def test_queue_timeout_is_a_503():
+    async def scenario():
+        # A fast drain rate keeps the estimate under the limit, so the request queues
+        admission = controller(nominal_rate=1000.0, max_queue_wait_s=0.05)
+        holder = await hold(admission, 100.0)
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await hold(admission, 10.0)
+        waiting = admission.report()["waiting"]["interactive"]
+        await release(holder)
+        return admission, timed_out.value, waiting
+
+    admission, timed_out, waiting = asyncio.run(scenario())
+    assert timed_out.status_code == 503
+    assert waiting == 0
+    assert admission.admitted_audio_s == 0
+
+
+def test_cancellation_after_grant_returns_the_capacity():
+    async def scenario():
+        admission = controller()
+        holder = await hold(admission, 100.0)
+        waiter = asyncio.create_task(hold(admission, 60.0))
+        await settle()
+
+        # The release grants the waiter, which is cancelled before it resumes
+        await release(holder)
+        assert admission.admitted_audio_s == 60.0
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        leaked = admission.admitted_audio_s
+
+        # The full capacity is available again straight away
+        block = await asyncio.wait_for(hold(admission, 100.0), 1.0)
+        await release(block)
+        return leaked
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_cancelled_waiter_unblocks_the_queue():
+    async def scenario():
+        admission = controller()
+        holder = await hold(admission, 60.0)
+        large = asyncio.create_task(hold(admission, 80.0))
+        await settle()
+        small = asyncio.create_task(hold(admission, 10.0))
+        await settle()
+        assert not small.done()
+
+        large.cancel()
+        await settle()
+        assert small.done()
+        await release(await small)
+        await release(holder)
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.admitted_audio_s == 0
+    assert admission.report()["waiting"] == {"interactive": 0, "bulk": 0}
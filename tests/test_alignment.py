@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from kinyvoice_ai.src.model.alignment import (
+    best_path_spans, forced_align, group_words, path_log_prob, split_at_pauses, viterbi_log_prob
+)
+
+BLANK, DELIMITER = 0, 5
+VOCAB = ["<pad>", "a", "b", "c", "d", "|"]
+
+
+def log_probs_for(path, vocab_size=len(VOCAB), seed=0):
+    """Random log-probabilities whose per-frame argmax follows ``path``"""
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(size=(len(path), vocab_size))
+    logits[np.arange(len(path)), path] += 6.0
+    return logits - np.log(np.exp(logits).sum(axis=1, keepdims=True))
+
+
+def test_forced_align_of_the_best_path_text_is_the_best_path():
+    path = [0, 1, 1, 0, 2, 5, 0, 3, 3, 4, 0]
+    log_probs = log_probs_for(path)
+    spans = forced_align(log_probs, [1, 2, 5, 3, 4], BLANK)
+    assert [(span.token_id, span.start, span.end) for span in spans] == [
+        (1, 1, 3), (2, 4, 5), (5, 5, 6), (3, 7, 9), (4, 9, 10)
+    ]
+    assert path_log_prob(log_probs, spans, BLANK) == pytest.approx(float(log_probs.max(axis=1).sum()))
+
+
+def test_forced_align_needs_room_for_repeats():
+    log_probs = log_probs_for([1, 0, 1])
+    assert forced_align(log_probs, [1, 1], BLANK) is not None
+    assert forced_align(log_probs[:2], [1, 1], BLANK) is None
+    assert viterbi_log_prob(log_probs[:2], [1, 1], BLANK) is None
+
+
+def test_forced_align_of_long_texts():
+    # More than 63 tokens once overflowed the int8 backpointers
+    path = [1, 0, 2, 0] * 50
+    spans = forced_align(log_probs_for(path), [1, 2] * 50, BLANK)
+    assert [span.start for span in spans] == list(range(0, 200, 2))
+
+
+def test_viterbi_log_prob_matches_the_alignment():
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        frames = int(rng.integers(1, 30))
+        log_probs = log_probs_for(rng.integers(0, len(VOCAB), size=frames).tolist(), seed=int(rng.integers(1000)))
+        targets = rng.integers(1, len(VOCAB), size=int(rng.integers(0, 8))).tolist()
+        spans = forced_align(log_probs, targets, BLANK)
+        score = viterbi_log_prob(log_probs, targets, BLANK)
+        if spans is None:
+            assert score is None
+        else:
+            assert score == pytest.approx(path_log_prob(log_probs, spans, BLANK))
+
+
+def test_group_words():
+    path = [0, 1, 1, 2, 5, 0, 3, 0, 5, 4]
+    spans = best_path_spans(path, [-0.5] * len(path), BLANK)
+    words = group_words(spans, VOCAB, DELIMITER)
+    assert [(w["word"], w["start_frame"], w["end_frame"], w["frames"]) for w in words] == [
+        ("ab", 1, 4, 3), ("c", 6, 7, 1), ("d", 9, 10, 1)
+    ]
+    assert words[0]["log_prob"] == pytest.approx(-1.5)
+
+
+def test_split_at_pauses():
+    best_ids = [1] * 10 + [0] * 6 + [2] * 10 + [5, 0, 0, 0, 0, 0] + [3] * 10
+    pauses = (BLANK, DELIMITER)
+    assert split_at_pauses(best_ids, pauses, 5, 100) == [(0, len(best_ids))]
+    assert split_at_pauses(best_ids, pauses, 5, 30) == [(0, 29), (29, 42)]
+    assert split_at_pauses(best_ids, pauses, 5, 10) == [(0, 13), (13, 29), (29, 42)]
+    # Pauses shorter than the minimum are never cut
+    assert split_at_pauses(best_ids, pauses, 7, 10) == [(0, len(best_ids))]
+    # Leading silence is not a pause between words
+    assert split_at_pauses([0] * 20 + [1] * 5, pauses, 5, 10) == [(0, 25)]
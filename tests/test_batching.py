@@ -0,0 +1,146 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from kinyvoice_ai.src.model.batching import BatchScheduler, _PendingRequest
+
+
+class FakeForward:
+    """Stands in for the model: records each batch and returns waveform lengths"""
+
+    def __init__(self, fail_length=None, delay_s=0.0):
+        self.batches = []
+        self.fail_length = fail_length
+        self.delay_s = delay_s
+
+    async def __call__(self, waveforms):
+        lengths = [int(w.shape[-1]) for w in waveforms]
+        self.batches.append(lengths)
+        await asyncio.sleep(self.delay_s)
+        if self.fail_length in lengths:
+            raise ValueError("bad input")
+        return lengths
+
+
+def waveform(length):
+    return np.zeros(length, dtype=np.float32)
+
+
+def test_requests_are_grouped_by_length():
+    scheduler = BatchScheduler(FakeForward(), max_batch_size=3, max_length_ratio=1.5)
+    pending = [_PendingRequest(waveform(n), None) for n in (1000, 100, 140, 150, 149, 400, 160)]
+    groups = [[item.length for item in group] for group in scheduler._group_by_length(pending)]
+    # Sorted, split at the size limit and where the ratio to the shortest exceeds 1.5
+    assert groups == [[100, 140, 149], [150, 160], [400], [1000]]
+
+
+def test_full_batch_runs_without_waiting_for_the_timer():
+    forward = FakeForward()
+
+    async def scenario():
+        scheduler = BatchScheduler(forward, max_batch_size=4, max_wait_ms=10_000)
+        await scheduler.start()
+        results = await asyncio.wait_for(
+            asyncio.gather(*(scheduler.submit(waveform(n)) for n in (100, 110, 120, 130))), 1.0
+        )
+        await scheduler.stop()
+        return results
+
+    assert asyncio.run(scenario()) == [100, 110, 120, 130]
+    assert forward.batches == [[100, 110, 120, 130]]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    forward = FakeForward()
+
+    async def scenario():
+        scheduler = BatchScheduler(forward, max_batch_size=8, max_wait_ms=20)
+        await scheduler.start()
+        first = asyncio.create_task(scheduler.submit(waveform(100)))
+        second = asyncio.create_task(scheduler.submit(waveform(120)))
+        await asyncio.sleep(0.005)
+        assert not first.done()
+        results = await asyncio.wait_for(asyncio.gather(first, second), 1.0)
+        report = scheduler.report()
+        await scheduler.stop()
+        return results, report
+
+    results, report = asyncio.run(scenario())
+    assert results == [100, 120]
+    assert forward.batches == [[100, 120]]
+    assert (report["total_requests"], report["total_batches"]) == (2, 1)
+
+
+def test_forward_error_reaches_only_its_group():
+    forward = FakeForward(fail_length=999)
+
+    async def scenario():
+        scheduler = BatchScheduler(forward, max_batch_size=8, max_wait_ms=20)
+        await scheduler.start()
+        results = await asyncio.gather(
+            *(scheduler.submit(waveform(n)) for n in (999, 1000, 100)), return_exceptions=True
+        )
+        await scheduler.stop()
+        return results
+
+    failed_short, failed_long, ok = asyncio.run(scenario())
+    assert sorted(forward.batches) == [[100], [999, 1000]]
+    assert isinstance(failed_short, ValueError) and failed_long is failed_short
+    assert ok == 100
+
+
+def test_short_result_list_fails_the_group_instead_of_hanging():
+    async def forward(waveforms):
+        return [0]
+
+    async def scenario():
+        scheduler = BatchScheduler(forward, max_batch_size=2, max_wait_ms=20)
+        await scheduler.start()
+        results = await asyncio.wait_for(asyncio.gather(
+            scheduler.submit(waveform(100)), scheduler.submit(waveform(110)), return_exceptions=True
+        ), 1.0)
+        await scheduler.stop()
+        return results
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+
+def test_cancelled_waiters_are_dropped_from_the_batch():
+    forward = FakeForward()
+
+    async def scenario():
+        scheduler = BatchScheduler(forward, max_batch_size=8, max_wait_ms=30)
+        await scheduler.start()
+        kept = asyncio.create_task(scheduler.submit(waveform(100)))
+        abandoned = asyncio.create_task(scheduler.submit(waveform(110)))
+        await asyncio.sleep(0.005)
+        abandoned.cancel()
+        result = await asyncio.wait_for(kept, 1.0)
+        with pytest.raises(asyncio.CancelledError):
+            await abandoned
+        await scheduler.stop()
+        return result
+
+    assert asyncio.run(scenario()) == 100
+    assert forward.batches == [[100]]
+
+
+def test_cancelling_during_the_forward_pass_leaves_the_rest_resolved():
+    forward = FakeForward(delay_s=0.02)
+
+    async def scenario():
+        scheduler = BatchScheduler(forward, max_batch_size=2, max_wait_ms=10_000)
+        await scheduler.start()
+        kept = asyncio.create_task(scheduler.submit(waveform(100)))
+        abandoned = asyncio.create_task(scheduler.submit(waveform(110)))
+        await asyncio.sleep(0.005)
+        abandoned.cancel()
+        result = await asyncio.wait_for(kept, 1.0)
+        await scheduler.stop()
+        return result, scheduler.report()
+
+    result, report = asyncio.run(scenario())
+    assert result == 100
+    assert forward.batches == [[100, 110]]
+    assert report["total_requests"] == 2
@@ -0,0 +1,75 @@
+import os
+import time
+
+from kinyvoice_ai.src.model.cache import DiskCacheStore
+
+
+def age(store, key, seconds):
+    """Backdate an entry's file, which is what the sweep orders and expires by"""
+    path = store._path(key)
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def keys(n):
+    return [f"{i:02x}{'0' * 38}" for i in range(n)]
+
+
+def test_entry_limit_evicts_oldest_first(tmp_path):
+    store = DiskCacheStore(str(tmp_path), ttl_s=3600, max_entries=10, sweep_interval_s=3600)
+    written = keys(11)
+    for i, key in enumerate(written):
+        store.set(key, {"text": key})
+        age(store, key, 100 - i)
+
+    # The eleventh write crosses the limit; the sweep trims to 90% of it
+    remaining = [key for key in written if store.get(key) is not None]
+    assert remaining == written[2:]
+    assert store.stats()["entries"] == 9
+    assert store.evictions == 2
+
+
+def test_byte_limit_evicts_oldest_first(tmp_path):
+    store = DiskCacheStore(str(tmp_path), ttl_s=3600, max_bytes=10_000, sweep_interval_s=3600)
+    written = keys(8)
+    for i, key in enumerate(written):
+        store.set(key, "x" * 2000)
+        age(store, key, 100 - i)
+
+    stats = store.stats()
+    assert stats["bytes"] <= 9_000
+    assert store.get(written[-1]) is not None
+    assert store.get(written[0]) is None
+
+
+def test_periodic_sweep_removes_expired_files(tmp_path):
+    store = DiskCacheStore(str(tmp_path), ttl_s=60, sweep_interval_s=3600)
+    stale, fresh = keys(2)
+    store.set(stale, "old")
+    age(store, stale, 120)
+    # Leftover from a writer that died between mkstemp and rename
+    orphan = os.path.join(os.path.dirname(store._path(stale)), "partial.tmp")
+    open(orphan, "w").close()
+    os.utime(orphan, (time.time() - 7200, time.time() - 7200))
+
+    # Not due yet: the first write already swept
+    store.set(fresh, "new")
+    assert os.path.exists(store._path(stale))
+
+    store._last_sweep -= 3600
+    store.set(fresh, "newer")
+    assert not os.path.exists(store._path(stale))
+    assert not os.path.exists(orphan)
+    assert store.get(fresh) == "newer"
+    assert store.stats()["expired"] == 1
+
+
+def test_sweep_counts_entries_left_by_other_processes(tmp_path):
+    writer = DiskCacheStore(str(tmp_path), ttl_s=3600)
+    for key in keys(5):
+        writer.set(key, 1)
+
+    store = DiskCacheStore(str(tmp_path), ttl_s=3600, max_entries=3)
+    store.sweep()
+    assert store.stats()["entries"] <= 3
+    assert sum(store.get(key) is not None for key in keys(5)) == store.stats()["entries"]
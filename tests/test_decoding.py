@@ -0,0 +1,135 @@
+import math
+
+import numpy as np
+import pytest
+
+from kinyvoice_ai.src.model.decoding import LOG10_TO_LN, BeamSearchDecoder, NGramLanguageModel
+
+ARPA = """\\data\\
+ngram 1=4
+ngram 2=1
+
+\\1-grams:
+-1.0\t<unk>
+-0.5\ta\t-0.3
+-0.7\tb\t-0.2
+-2.0\tc
+
+\\2-grams:
+-0.1\ta b
+
+\\end\\
+"""
+
+
+class FakeTokenizer:
+    pad_token_id = 0
+    word_delimiter_token = "|"
+    all_special_ids = [0]
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def convert_ids_to_tokens(self, ids):
+        return [self.vocab[i] for i in ids]
+
+
+class FakeProcessor:
+    def __init__(self, vocab):
+        self.tokenizer = FakeTokenizer(vocab)
+
+
+def log_probs(frames):
+    """Per-frame probabilities to the log-probability tensor the decoder takes"""
+    torch = pytest.importorskip("torch")
+    return torch.log(torch.tensor(frames, dtype=torch.float64).clamp_min(1e-12))
+
+
+@pytest.fixture
+def language_model(tmp_path):
+    path = tmp_path / "lm.arpa"
+    path.write_text(ARPA, encoding="utf-8")
+    return NGramLanguageModel.from_arpa(str(path))
+
+
+def test_arpa_probabilities_and_back_off(language_model):
+    assert language_model.order == 2
+    # Seen bigram
+    assert language_model.score(("a",), "b") == pytest.approx(-0.1 * LOG10_TO_LN)
+    # Unseen bigram backs off through the context's weight to the unigram
+    assert language_model.score(("b",), "a") == pytest.approx((-0.2 - 0.5) * LOG10_TO_LN)
+    # A unigram listed without a back-off weight contributes nothing
+    assert language_model.score(("c",), "a") == pytest.approx(-0.5 * LOG10_TO_LN)
+    # Unknown words score as <unk>, after the back-off of their context
+    assert language_model.score(("a",), "zzz") == pytest.approx((-0.3 - 1.0) * LOG10_TO_LN)
+    # Context beyond the model order is ignored
+    assert language_model.score(("c", "a"), "b") == pytest.approx(-0.1 * LOG10_TO_LN)
+
+
+def test_prefix_merging_beats_greedy():
+    # Vocabulary: blank, "a", "b". Two frames of P(blank)=0.6, P(a)=0.4:
+    # greedy picks blank twice and outputs "". The prefix "a" collects
+    # a-a (0.16) + a-blank (0.24) + blank-a (0.24) = 0.64 > P("") = 0.36
+    frames = [[0.6, 0.4, 0.0], [0.6, 0.4, 0.0]]
+    decoder = BeamSearchDecoder(FakeProcessor(["<pad>", "a", "b"]), beam_width=4)
+    greedy = np.argmax(np.asarray(frames), axis=1)
+    assert greedy.tolist() == [0, 0]
+    assert decoder.decode(log_probs(frames)) == "a"
+
+
+def test_repeats_collapse_unless_separated_by_blank():
+    decoder = BeamSearchDecoder(FakeProcessor(["<pad>", "a", "b"]), beam_width=4)
+    assert decoder.decode(log_probs([[0.0, 1.0, 0.0], [0.0, 1.0, 0.0]])) == "a"
+    assert decoder.decode(log_probs([[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])) == "aa"
+
+
+def test_language_model_outweighs_a_small_acoustic_margin(language_model):
+    vocab = ["<pad>", "a", "b", "c", "|"]
+    # One word, acoustically "c" by 0.55 to 0.45
+    frames = [[0.0, 0.45, 0.0, 0.55, 0.0], [1.0, 0.0, 0.0, 0.0, 0.0]]
+
+    plain = BeamSearchDecoder(FakeProcessor(vocab), beam_width=4)
+    assert plain.decode(log_probs(frames)) == "c"
+
+    # ln 0.45 - 0.5 ln 10 = -1.95 beats ln 0.55 - 2.0 ln 10 = -5.20
+    with_lm = BeamSearchDecoder(
+        FakeProcessor(vocab), beam_width=4, lm=language_model, lm_alpha=1.0, lm_beta=0.0
+    )
+    assert with_lm.decode(log_probs(frames)) == "a"
+
+
+def test_language_model_scores_words_in_context(language_model):
+    vocab = ["<pad>", "a", "b", "c", "|"]
+    # "a" then a word that is acoustically "c" by 0.6 to 0.4; the bigram
+    # "a b" (-0.1) makes "b" the better second word under the LM
+    frames = [
+        [0.0, 1.0, 0.0, 0.0, 0.0],
+        [0.0, 0.0, 0.0, 0.0, 1.0],
+        [0.0, 0.0, 0.4, 0.6, 0.0],
+    ]
+    decoder = BeamSearchDecoder(
+        FakeProcessor(vocab), beam_width=4, lm=language_model, lm_alpha=1.0, lm_beta=0.0
+    )
+    assert decoder.decode(log_probs(frames)) == "a b"
+    expected_b = math.log(0.4) - 0.1 * LOG10_TO_LN
+    expected_c = math.log(0.6) + (-0.3 - 2.0) * LOG10_TO_LN
+    assert expected_b > expected_c
+
+
+def test_hotword_bonus(language_model):
+    vocab = ["<pad>", "a", "b", "c", "|"]
+    frames = [[0.0, 0.0, 0.3, 0.7, 0.0], [1.0, 0.0, 0.0, 0.0, 0.0]]
+
+    plain = BeamSearchDecoder(FakeProcessor(vocab), beam_width=4)
+    assert plain.decode(log_probs(frames)) == "c"
+
+    # ln 0.3 + 5 (hotword) = 3.80 beats ln 0.7 = -0.36
+    boosted = BeamSearchDecoder(FakeProcessor(vocab), beam_width=4, hotwords=["B"], hotword_weight=5.0)
+    assert boosted.decode(log_probs(frames)) == "b"
+
+    # A weight below the acoustic gap (ln 0.7 - ln 0.3 = 0.85) is not enough
+    weak = BeamSearchDecoder(FakeProcessor(vocab), beam_width=4, hotwords=["b"], hotword_weight=0.5)
+    assert weak.decode(log_probs(frames)) == "c"
@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+from kinyvoice_ai.src.evaluation.evaluate import (
+    aggregate, calibration_data, fit_calibration, read_checkpoint, read_manifest
+)
+from kinyvoice_ai.src.utils.metrics import char_error_counts, word_error_counts
+
+
+def scored(utterance_id, domain, reference, hypothesis, audio_seconds=1.0, forward_seconds=0.1):
+    return {
+        "id": utterance_id,
+        "domain": domain,
+        "reference": reference,
+        "hypothesis": hypothesis,
+        "audio_seconds": audio_seconds,
+        "forward_seconds": forward_seconds,
+        "words": word_error_counts(reference, hypothesis).to_dict(),
+        "chars": char_error_counts(reference, hypothesis).to_dict(),
+    }
+
+
+def test_aggregate_weights_utterances_by_length():
+    results = [
+        scored("1", "news", "a b c d", "a b c d", audio_seconds=3.0, forward_seconds=0.3),
+        scored("2", "news", "a b", "a x"),
+        scored("3", "health", "a", "b"),
+        {"id": "4", "domain": "health", "error": "decode: bad file"},
+    ]
+    report = aggregate(results)
+
+    assert report["utterances"] == 3
+    assert report["failed"] == 1
+    assert report["audio_seconds"] == pytest.approx(5.0)
+    assert report["rtf"] == pytest.approx(0.5 / 5.0)
+    # Corpus WER is total errors over total reference words, not a mean of rates
+    assert report["wer"] == pytest.approx(2 / 7)
+    assert report["domains"]["news"]["wer"] == pytest.approx(1 / 6)
+    assert (report["domains"]["health"]["utterances"], report["domains"]["health"]["failed"]) == (1, 1)
+    assert report["domains"]["health"]["wer"] == pytest.approx(1.0)
+
+
+def test_aggregate_without_results():
+    report = aggregate([])
+    assert report["utterances"] == 0
+    assert report["wer"] is None
+    assert report["rtf"] is None
+
+
+def test_read_manifest_formats(tmp_path):
+    tsv = tmp_path / "manifest.tsv"
+    tsv.write_text("clips/a.wav\tMuraho\n\n/abs/b.wav\tIsi\thealth\n", encoding="utf-8")
+    first, second = read_manifest(str(tsv))
+    assert first.audio_path == os.path.join(str(tmp_path), "clips", "a.wav")
+    assert (first.id, first.reference, first.domain) == ("clips/a.wav", "Muraho", "general")
+    assert (second.audio_path, second.domain) == ("/abs/b.wav", "health")
+
+    jsonl = tmp_path / "manifest.jsonl"
+    jsonl.write_text(json.dumps({"id": 7, "audio_path": "c.wav", "text": "Amakuru"}) + "\n", encoding="utf-8")
+    (utterance,) = read_manifest(str(jsonl), default_domain="news")
+    assert (utterance.id, utterance.reference, utterance.domain) == ("7", "Amakuru", "news")
+
+
+def test_read_checkpoint_ignores_torn_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('{"id": "1"}\n{"id": "2"}\n{"id": ', encoding="utf-8")
+    assert [result["id"] for result in read_checkpoint(str(path))] == ["1", "2"]
+    assert read_checkpoint(str(tmp_path / "missing.jsonl")) == []
+
+
+def test_calibration_data_labels_words():
+    results = [
+        {**scored("1", "news", "Muraho isi", "muraho si"), "word_log_probs": [-0.1, -2.0]},
+        # Word scores that do not line up with the hypothesis are skipped
+        {**scored("2", "news", "a b", "a b"), "word_log_probs": [-0.1]},
+        {"id": "3", "domain": "news", "error": "forward: out of memory"},
+    ]
+    assert calibration_data(results) == ([-0.1, -2.0], [1, 0])
+
+
+def test_fit_calibration_without_words(tmp_path):
+    with pytest.raises(ValueError, match="word scores"):
+        fit_calibration([{"id": "1", "domain": "news", "error": "decode: bad file"}], str(tmp_path / "t.json"))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from kinyvoice_ai.src.model.longform import iter_window_batches, plan_windows, trim_window_logits
+
+SAMPLES_PER_FRAME = 320
+
+
+def window_logits(window):
+    """Fake ``[frames, vocab]`` logits whose first column is the absolute frame index"""
+    first = window.start // SAMPLES_PER_FRAME
+    frames = np.arange(first, first + (window.end - window.start) // SAMPLES_PER_FRAME)
+    return np.stack([frames, np.zeros_like(frames)], axis=1)
+
+
+def test_short_input_is_one_window():
+    assert plan_windows(1000, chunk_samples=2000, stride_samples=200) == [(0, 1000, 0, 0)]
+
+
+def test_stride_must_leave_room():
+    with pytest.raises(ValueError):
+        plan_windows(10000, chunk_samples=2000, stride_samples=1000)
+
+
+@pytest.mark.parametrize("num_frames", [101, 250, 537, 1000])
+def test_stitched_windows_cover_every_frame_once(num_frames):
+    windows = plan_windows(
+        num_frames * SAMPLES_PER_FRAME,
+        chunk_samples=100 * SAMPLES_PER_FRAME,
+        stride_samples=10 * SAMPLES_PER_FRAME,
+    )
+    assert windows[0].start == 0 and windows[-1].end == num_frames * SAMPLES_PER_FRAME
+    assert windows[0].left_stride == 0 and windows[-1].right_stride == 0
+    for previous, current in zip(windows, windows[1:]):
+        # Neighbours overlap by two strides so each keeps context at its edges
+        assert previous.end - current.start == 2 * 10 * SAMPLES_PER_FRAME
+
+    pieces = [trim_window_logits(window_logits(window), window) for window in windows]
+    stitched = np.concatenate(pieces, axis=0)
+    assert stitched[:, 0].tolist() == list(range(num_frames))
+
+
+def test_window_batches():
+    windows = plan_windows(1000 * SAMPLES_PER_FRAME, 100 * SAMPLES_PER_FRAME, 10 * SAMPLES_PER_FRAME)
+    batches = list(iter_window_batches(windows, 4))
+    assert [window for batch in batches for window in batch] == windows
+    assert all(len(batch) <= 4 for batch in batches)
+
+
+def test_stitch_logits():
+    torch = pytest.importorskip("torch")
+    from kinyvoice_ai.src.model.longform import stitch_logits
+
+    pieces = [torch.zeros(3, 5), torch.ones(2, 5)]
+    stitched = stitch_logits(pieces)
+    assert stitched.shape == (5, 5)
+    assert stitched[3:].eq(1).all()
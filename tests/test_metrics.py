@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from kinyvoice_ai.src.utils.metrics import (
+    ErrorCounts, align_counts, calculate_cer, calculate_wer, char_error_counts,
+    hypothesis_hits, normalize_text, word_error_counts
+)
+
+
+def edit_distance(reference, hypothesis):
+    """Textbook Levenshtein distance, the reference for the optimized alignment"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_token in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_token in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j - 1] + (ref_token != hyp_token),
+                previous[j] + 1,
+                current[j - 1] + 1,
+            ))
+        previous = current
+    return previous[-1]
+
+
+def random_tokens(rng, alphabet="abcd", max_length=12):
+    return [rng.choice(alphabet) for _ in range(rng.randint(0, max_length))]
+
+
+def test_normalize_text():
+    assert normalize_text("  Muraho, Isi!  ") == "muraho isi"
+    assert normalize_text("N'uko\tbi-ri\nGUTYO.") == "n'uko bi ri gutyo"
+    assert normalize_text("snake_case") == "snake case"
+    assert normalize_text("Café 2024") == "café 2024"
+    assert normalize_text("?!") == ""
+
+
+def test_align_counts_matches_edit_distance():
+    rng = random.Random(0)
+    for _ in range(500):
+        reference, hypothesis = random_tokens(rng), random_tokens(rng)
+        counts = align_counts(reference, hypothesis)
+        assert counts.errors == edit_distance(reference, hypothesis)
+        assert counts.reference_length == len(reference)
+        # The operations have to describe a real alignment of the two sequences
+        hits = len(reference) - counts.substitutions - counts.deletions
+        assert hits >= 0
+        assert hits + counts.substitutions + counts.insertions == len(hypothesis)
+
+
+@pytest.mark.parametrize("reference, hypothesis, expected", [
+    ("a b c", "a b c", (0, 0, 0)),
+    ("a b c", "a x c", (1, 0, 0)),
+    ("a b c", "a c", (0, 1, 0)),
+    ("a b c", "a b c d", (0, 0, 1)),
+    ("", "a b", (0, 0, 2)),
+    ("a b", "", (0, 2, 0)),
+])
+def test_word_error_counts(reference, hypothesis, expected):
+    counts = word_error_counts(reference, hypothesis)
+    assert (counts.substitutions, counts.deletions, counts.insertions) == expected
+
+
+def test_rates_match_jiwer():
+    rng = random.Random(1)
+    for _ in range(200):
+        reference = " ".join("".join(random_tokens(rng, "ab", 3)) or "a" for _ in range(rng.randint(1, 6)))
+        hypothesis = " ".join("".join(random_tokens(rng, "ab", 3)) or "b" for _ in range(rng.randint(1, 6)))
+        assert word_error_counts(reference, hypothesis).rate == pytest.approx(calculate_wer(reference, hypothesis))
+        assert char_error_counts(reference, hypothesis).rate == pytest.approx(calculate_cer(reference, hypothesis))
+
+
+def test_error_counts_sum_and_round_trip():
+    total = ErrorCounts()
+    total += word_error_counts("a b c d", "a x c")
+    total += word_error_counts("e f", "e f g")
+    assert total.to_dict() == {"substitutions": 1, "deletions": 1, "insertions": 1, "reference_length": 6}
+    assert total.rate == pytest.approx(3 / 6)
+    assert ErrorCounts.from_dict(total.to_dict()).to_dict() == total.to_dict()
+    assert ErrorCounts().rate is None
+
+
+def test_hypothesis_hits():
+    assert hypothesis_hits("a b c".split(), "a b c".split()) == [True, True, True]
+    assert hypothesis_hits("a b c".split(), "a x c".split()) == [True, False, True]
+    assert hypothesis_hits("a b c".split(), "a c".split()) == [True, True]
+    assert hypothesis_hits("a c".split(), "a b c".split()) == [True, False, True]
+    assert hypothesis_hits([], ["a"]) == [False]
+    assert hypothesis_hits(["a"], []) == []
+
+
+def is_subsequence(tokens, sequence):
+    remaining = iter(sequence)
+    return all(token in remaining for token in tokens)
+
+
+def test_hypothesis_hits_come_from_an_optimal_alignment():
+    rng = random.Random(2)
+    for _ in range(300):
+        reference, hypothesis = random_tokens(rng), random_tokens(rng)
+        hits = hypothesis_hits(reference, hypothesis)
+        assert len(hits) == len(hypothesis)
+        assert is_subsequence([token for token, hit in zip(hypothesis, hits) if hit], reference)
+        # Every missed hypothesis token is a substitution or insertion of that alignment
+        assert len(hypothesis) - sum(hits) <= edit_distance(reference, hypothesis)
@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from kinyvoice_ai.src.database import reader  # noqa: E402
+from kinyvoice_ai.src.database.reader import decode_cursor, encode_cursor  # noqa: E402
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone(timedelta(hours=2)))
+    transcription_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, transcription_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, str(transcription_id))
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bnVsbA", encode_cursor(datetime.now(), "not-a-uuid")])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+class FakeCursor:
+    def __init__(self, log, rows=()):
+        self.log = log
+        self.rows = list(rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.log.append((query, params))
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Records statements; ``run`` mirrors AsyncConnection without a thread pool"""
+
+    def __init__(self, rows=()):
+        self.log = []
+        self.rows = rows
+        self.autocommit = True
+
+    def cursor(self, name=None):
+        return FakeCursor(self.log, self.rows if name else ())
+
+    def rollback(self):
+        self.log.append(("ROLLBACK", None))
+
+    async def run(self, fn, *args):
+        await asyncio.sleep(0)
+        return fn(self, *args)
+
+
+def test_export_transaction_sets_its_own_timeouts(monkeypatch):
+    monkeypatch.setattr(reader.settings, "export_statement_timeout_s", 2.5)
+    monkeypatch.setattr(reader.settings, "export_idle_in_transaction_timeout_s", 30.0)
+    conn = FakeConnection()
+    reader._open_cursor(conn, "SELECT 1", {}, 100)
+    query, params = conn.log[0]
+    assert "statement_timeout" in query and "idle_in_transaction_session_timeout" in query
+    assert params == ("2500", "30000")
+    assert conn.autocommit is False
+
+    reader._close_cursor(conn, FakeCursor(conn.log))
+    assert conn.log[-1] == ("ROLLBACK", None) and conn.autocommit is True
+
+
+def test_concurrent_exports_are_capped(monkeypatch):
+    opened = []
+    release = None
+
+    @asynccontextmanager
+    async def fake_db_connection():
+        conn = FakeConnection(rows=[{column: None for column in reader.TRANSCRIPTION_COLUMNS}])
+        opened.append(conn)
+        await release.wait()
+        yield conn
+
+    monkeypatch.setattr(reader, "db_connection", fake_db_connection)
+    monkeypatch.setattr(reader.settings, "export_max_concurrent", 2)
+    monkeypatch.setattr(reader, "_export_slots", None)
+
+    async def drain():
+        return b"".join([chunk async for chunk in reader.export_transcriptions("ndjson")])
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        exports = [asyncio.create_task(drain()) for _ in range(3)]
+        for _ in range(10):
+            await asyncio.sleep(0)
+        busy = (len(opened), reader.export_slot_available())
+        release.set()
+        bodies = await asyncio.gather(*exports)
+        return busy, bodies, reader.export_slot_available()
+
+    busy, bodies, available = asyncio.run(scenario())
+    # The third export waits for a slot instead of taking a third connection
+    assert busy == (2, False)
+    assert len(opened) == 3 and all(body.count(b"\n") == 1 for body in bodies)
+    assert available
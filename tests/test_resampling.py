@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+import pytest
+
+from kinyvoice_ai.src.utils.resampling import output_length
+
+
+def tone(frequency, sample_rate, seconds, channels=None):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    wave = np.sin(2 * math.pi * frequency * t).astype(np.float32)
+    return wave if channels is None else np.stack([wave] * channels, axis=1)
+
+
+@pytest.mark.parametrize("orig_sr, target_sr, frames, expected", [
+    (16000, 16000, 1000, 1000),
+    (48000, 16000, 4800, 1600),
+    (44100, 16000, 441, 160),
+    (8000, 16000, 3, 6),
+    (22050, 16000, 1, 1),
+])
+def test_output_length(orig_sr, target_sr, frames, expected):
+    assert output_length(frames, orig_sr, target_sr) == expected
+
+
+@pytest.mark.parametrize("orig_sr", [8000, 22050, 44100, 48000])
+def test_resampled_tone_matches_the_analytic_signal(orig_sr):
+    pytest.importorskip("torch")
+    from kinyvoice_ai.src.utils.resampling import resample
+
+    resampled = resample(tone(440.0, orig_sr, 0.5), orig_sr, 16000).numpy()
+    expected = tone(440.0, 16000, 0.5)
+    assert resampled.shape[0] == output_length(int(orig_sr * 0.5), orig_sr, 16000)
+    # Edges see the zero padding of the filter; compare the interior
+    interior = slice(200, expected.shape[0] - 200)
+    assert np.max(np.abs(resampled[interior] - expected[interior])) < 1e-3
+
+
+def test_stereo_is_downmixed_in_the_same_pass():
+    pytest.importorskip("torch")
+    from kinyvoice_ai.src.utils.resampling import resample
+
+    left, right = tone(300.0, 48000, 0.2), tone(700.0, 48000, 0.2)
+    stereo = np.stack([left, right], axis=1)
+    mixed = resample(stereo, 48000, 16000).numpy()
+    separately = (resample(left, 48000, 16000) + resample(right, 48000, 16000)).numpy() / 2
+    np.testing.assert_allclose(mixed, separately, atol=1e-5)
+
+    kept = resample(stereo, 48000, 16000, mono=False).numpy()
+    assert kept.shape == (mixed.shape[0], 2)
+
+
+def test_batch_matches_single_buffers():
+    pytest.importorskip("torch")
+    from kinyvoice_ai.src.utils.resampling import resample, resample_batch
+
+    buffers = [tone(440.0, 44100, seconds) for seconds in (0.1, 0.35, 0.2)]
+    for batched, buffer in zip(resample_batch(buffers, 44100, 16000), buffers):
+        np.testing.assert_allclose(batched.numpy(), resample(buffer, 44100, 16000).numpy(), atol=1e-5)
+
+
+def test_mono_at_target_rate_is_not_copied():
+    pytest.importorskip("torch")
+    from kinyvoice_ai.src.utils.resampling import resample
+
+    audio = tone(440.0, 16000, 0.1)
+    resampled = resample(audio, 16000, 16000)
+    audio[0] = 5.0
+    assert float(resampled[0]) == 5.0
+
+
+@pytest.mark.parametrize("orig_sr", [8000, 44100, 48000])
+@pytest.mark.parametrize("chunk_ms", [20, 43])
+def test_chunked_stream_matches_whole_signal(orig_sr, chunk_ms):
+    pytest.importorskip("torch")
+    import torch
+    from kinyvoice_ai.src.utils.resampling import StreamResampler, resample
+
+    audio = tone(440.0, orig_sr, 1.0) + 0.3 * tone(3100.0, orig_sr, 1.0)
+    chunk = orig_sr * chunk_ms // 1000
+    resampler = StreamResampler(orig_sr, 16000)
+    pieces = [resampler.process(audio[i:i + chunk]) for i in range(0, audio.shape[0], chunk)]
+    pieces.append(resampler.flush())
+    streamed = torch.cat(pieces).numpy()
+
+    whole = resample(audio, orig_sr, 16000).numpy()
+    assert streamed.shape == whole.shape == (16000,)
+    assert resampler.samples_out == 16000
+    np.testing.assert_allclose(streamed, whole, atol=1e-5)
+
+
+def test_stream_at_target_rate_passes_through():
+    pytest.importorskip("torch")
+    from kinyvoice_ai.src.utils.resampling import StreamResampler
+
+    audio = tone(440.0, 16000, 0.1)
+    resampler = StreamResampler(16000, 16000)
+    np.testing.assert_array_equal(resampler.process(audio).numpy(), audio)
+    assert resampler.flush().shape[0] == 0
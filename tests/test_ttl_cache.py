@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from kinyvoice_ai.src.utils.ttl_cache import TTLCache
+
+
+def test_concurrent_misses_share_one_computation():
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def scenario():
+        cache = TTLCache(ttl_s=60)
+        values = await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(10)))
+        return cache, values
+
+    cache, values = asyncio.run(scenario())
+    assert calls == 1
+    assert values == [1] * 10
+    assert (cache.misses, cache.hits) == (1, 9)
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        if calls == 1:
+            raise RuntimeError("database unavailable")
+        return "fresh"
+
+    async def scenario():
+        cache = TTLCache(ttl_s=60)
+        outcomes = await asyncio.gather(
+            *(cache.get_or_compute("key", compute) for _ in range(3)), return_exceptions=True
+        )
+        return outcomes, await cache.get_or_compute("key", compute)
+
+    outcomes, retried = asyncio.run(scenario())
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert retried == "fresh"
+    assert calls == 2
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("kinyvoice_ai.src.utils.ttl_cache.time.monotonic", lambda: now[0])
+    values = iter(["first", "second"])
+
+    async def compute():
+        return next(values)
+
+    async def scenario():
+        cache = TTLCache(ttl_s=5)
+        first = await cache.get_or_compute("key", compute)
+        now[0] += 4
+        cached = await cache.get_or_compute("key", compute)
+        now[0] += 2
+        return first, cached, await cache.get_or_compute("key", compute)
+
+    assert asyncio.run(scenario()) == ("first", "first", "second")
+
+
+@pytest.mark.parametrize("max_entries", [1, 3])
+def test_oldest_entries_are_evicted(max_entries):
+    async def scenario():
+        cache = TTLCache(ttl_s=60, max_entries=max_entries)
+        for key in range(5):
+            await cache.get_or_compute(key, lambda key=key: asyncio.sleep(0, result=key))
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert list(cache._entries) == list(range(5 - max_entries, 5))
@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import pytest
+
+pytest.importorskip("soundfile")
+
+from kinyvoice_ai.src.utils.audio_processing import detect_speech_segments  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def tone(level_db, seconds, frequency=220.0):
+    """Sine whose RMS is ``level_db`` dBFS"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    amplitude = math.sqrt(2) * 10 ** (level_db / 20)
+    return (amplitude * np.sin(2 * math.pi * frequency * t)).astype(np.float32)
+
+
+def noise(level_db, seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return (10 ** (level_db / 20) * rng.standard_normal(int(SAMPLE_RATE * seconds))).astype(np.float32)
+
+
+def test_noise_only_has_no_speech():
+    assert detect_speech_segments(noise(-45.0, 3.0), SAMPLE_RATE) == []
+    assert detect_speech_segments(np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE) == []
+
+
+def test_speech_only_is_one_segment():
+    # Loud and quiet stretches, each longer than a bridgeable pause; the
+    # quiet ones sit at the 10th percentile but are still speech
+    audio = np.concatenate([tone(level, 0.5) for level in (-12.0, -25.0) * 4])
+    assert detect_speech_segments(audio, SAMPLE_RATE) == [(0, len(audio))]
+
+
+def test_mixed_audio_finds_each_utterance():
+    quiet = noise(-60.0, 1.0)
+    audio = np.concatenate([quiet, tone(-20.0, 1.0), quiet, tone(-20.0, 1.0), quiet])
+    padding = int(0.15 * SAMPLE_RATE)
+    segments = detect_speech_segments(audio, SAMPLE_RATE, padding_ms=150.0)
+
+    assert len(segments) == 2
+    frame = int(0.03 * SAMPLE_RATE)
+    for (start, end), speech_start in zip(segments, (SAMPLE_RATE, 3 * SAMPLE_RATE)):
+        # Frame-aligned edges, widened by the padding
+        assert abs(start - (speech_start - padding)) <= frame
+        assert abs(end - (speech_start + SAMPLE_RATE + padding)) <= frame
@@ -0,0 +1,204 @@
+import time
+from typing import List, Optional, Tuple
+import logging
+
+import numpy as np
+import torch
+
+from kinyvoice_ai.configs.settings import Settings
+from kinyvoice_ai.src.model.model import ASRBackend
+from kinyvoice_ai.src.model.executor import InferenceExecutor
+from kinyvoice_ai.src.utils.audio_processing import detect_speech_segments
+from kinyvoice_ai.src.utils.resampling import resample
+from kinyvoice_ai.src.utils.telemetry import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Whisper's encoder always sees 30 seconds of audio
+WINDOW_SECONDS = 30.0
+
+
+def pack_windows(spans: List[Tuple[int, int]], max_samples: int) -> List[Tuple[int, int]]:
+    """Merge consecutive speech spans into windows of at most ``max_samples``.
+
+    Windows are cut in the silence between spans, so words are not split
+    across windows; spans longer than a window are split hard.
+    """
+    pieces = []
+    for start, end in spans:
+        while end - start > max_samples:
+            pieces.append((start, start + max_samples))
+            start += max_samples
+        pieces.append((start, end))
+
+    windows = []
+    for start, end in pieces:
+        if windows and end - windows[-1][0] <= max_samples:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
+
+class WhisperBackend(ASRBackend):
+    """Encoder-decoder Whisper model for long-form, open-vocabulary domains.
+
+    Recordings are split at pauses into windows of up to 30 seconds, which
+    are generated in batches of ``batch_size``. Slower than the CTC model
+    per second of audio but more robust on long, conversational speech.
+    CTC-specific options such as ``decoder`` are ignored.
+    """
+
+    name = "whisper"
+    nominal_rtf = 0.3
+    supports_long_form = True
+    max_duration_s = None
+    estimated_memory_bytes = 1024 ** 3
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        language: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        num_beams: Optional[int] = None
+    ):
+        super().__init__()
+        self.model_name = model_name or settings.whisper_model_name
+        self.language = language or settings.whisper_language
+        self.batch_size = max(1, batch_size or settings.whisper_batch_size)
+        self.num_beams = max(1, num_beams or settings.whisper_num_beams)
+        self.sample_rate = 16000
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.model = None
+        self.processor = None
+        # Generation is sequential per batch; one worker keeps memory bounded
+        self.executor = InferenceExecutor(max_workers=1, intra_op_threads=settings.torch_intra_op_threads)
+
+    @property
+    def version(self) -> str:
+        return self.model_name
+
+    def is_loaded(self) -> bool:
+        return self.model is not None and self.processor is not None
+
+    def _load_weights(self):
+        # transformers is only imported once the engine is actually used
+        from transformers import WhisperForConditionalGeneration, WhisperProcessor
+
+        processor = WhisperProcessor.from_pretrained(self.model_name)
+        dtype = torch.float16 if self.device.type == "cuda" else torch.float32
+        model = WhisperForConditionalGeneration.from_pretrained(self.model_name, torch_dtype=dtype)
+        return processor, model.to(self.device).eval()
+
+    async def load(self):
+        """Load the Whisper processor and weights on the backend's worker"""
+        self.executor.start()
+        try:
+            self.processor, self.model = await self.executor.run(self._load_weights)
+        except Exception as e:
+            logger.error(f"Error loading Whisper model {self.model_name}: {e}")
+            self.executor.shutdown()
+            raise
+        logger.info(f"Whisper model {self.model_name} loaded on {self.device}")
+
+    async def unload(self):
+        """Release the weights and the worker thread"""
+        self.executor.shutdown()
+        self.model = None
+        self.processor = None
+        torch.cuda.empty_cache()
+
+    def memory_bytes(self) -> int:
+        if self.model is None:
+            return 0
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def decoder_label(self, decoder: Optional[str] = None) -> Optional[str]:
+        return "generate" if self.num_beams == 1 else f"generate-beam{self.num_beams}"
+
+    def _plan(self, audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        """Mono 16kHz waveform and the windows to generate for"""
+        waveform = resample(audio, sample_rate, self.sample_rate).numpy()
+        max_samples = int(WINDOW_SECONDS * self.sample_rate)
+        if len(waveform) <= max_samples:
+            return waveform, [(0, len(waveform))]
+        spans = detect_speech_segments(
+            waveform,
+            self.sample_rate,
+            threshold_db=settings.vad_threshold_db,
+            noise_ceiling_db=settings.vad_noise_ceiling_db,
+            min_speech_ms=settings.vad_min_speech_ms,
+            min_silence_ms=settings.vad_min_silence_ms,
+            padding_ms=settings.vad_padding_ms,
+        )
+        return waveform, pack_windows(spans, max_samples)
+
+    def _generate(self, chunks: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """Transcribe up to ``batch_size`` windows in one generate call"""
+        features = self.processor.feature_extractor(
+            chunks, sampling_rate=self.sample_rate, return_tensors="pt"
+        ).input_features.to(self.device, dtype=self.model.dtype)
+
+        generate_kwargs = {"task": "transcribe", "num_beams": self.num_beams}
+        if self.language:
+            generate_kwargs["language"] = self.language
+        with torch.no_grad(), STAGE_SECONDS.time(stage="forward"):
+            output = self.model.generate(
+                features,
+                max_new_tokens=settings.whisper_max_new_tokens,
+                return_dict_in_generate=True,
+                output_scores=True,
+                **generate_kwargs,
+            )
+            # Per-token log-probabilities of the chosen sequence
+            token_logprobs = self.model.compute_transition_scores(
+                output.sequences,
+                output.scores,
+                getattr(output, "beam_indices", None),
+                normalize_logits=self.num_beams == 1,
+            )
+
+        with STAGE_SECONDS.time(stage="decode_text"):
+            texts = self.processor.batch_decode(output.sequences, skip_special_tokens=True)
+        generated = output.sequences[:, -token_logprobs.shape[1]:]
+        valid = (generated != self.processor.tokenizer.pad_token_id) & torch.isfinite(token_logprobs)
+        mean_logprob = (token_logprobs.float() * valid).sum(dim=1) / valid.sum(dim=1).clamp(min=1)
+        return [
+            (text.strip(), float(confidence))
+            for text, confidence in zip(texts, torch.exp(mean_logprob).tolist())
+        ]
+
+    async def _transcribe(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        timings: Optional[dict] = None,
+        **options
+    ) -> Tuple[str, float]:
+        if not self.is_loaded():
+            raise RuntimeError("Model not loaded")
+
+        started = time.perf_counter()
+        waveform, windows = await self.executor.run(self._plan, audio, sample_rate)
+        if timings is not None:
+            timings["resample_time"] = timings.get("resample_time", 0.0) + time.perf_counter() - started
+        if not windows:
+            return "", 0.0
+
+        started = time.perf_counter()
+        outcomes = []
+        for i in range(0, len(windows), self.batch_size):
+            batch = windows[i:i + self.batch_size]
+            outcomes.extend(await self.executor.run(
+                self._generate, [waveform[start:end] for start, end in batch]
+            ))
+        if timings is not None:
+            timings["forward_time"] = timings.get("forward_time", 0.0) + time.perf_counter() - started
+
+        # Duration-weighted confidence over the windows
+        durations = [end - start for start, end in windows]
+        confidence = sum(c * d for (_, c), d in zip(outcomes, durations)) / sum(durations)
+        text = " ".join(text for text, _ in outcomes if text)
+        return text, confidence